@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
+    'core.middleware.RequestTimingMiddleware',  # SQL/шаблоны/кэш: Server-Timing + лог
+    'core.middleware.CompressionMiddleware',  # Brotli/gzip динамических ответов (статика - WhiteNoise)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',  # Для мультиязычности (i18n)
     'django.middleware.common.CommonMiddleware',
@@ -68,7 +70,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.TimedDjangoTemplates',  # DjangoTemplates + замер рендера
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -100,6 +102,28 @@ DATABASES = {
 }
 
 
+# Cache (с подсчётом попаданий для RequestTimingMiddleware)
+# Кэш объявлений сбрасывается увеличением версии (core/cache_utils.py), поэтому в
+# продакшене кэш должен быть общим для всех процессов: gunicorn workers, runbot,
+# management-команд (import_listings, archive_listings, send_notifications).
+# С locmem сброс из одного процесса не виден остальным до LISTINGS_CACHE_TIMEOUT.
+#   database - таблица в основной БД (создаёт migrate, миграция core 0020)
+#   redis    - CACHE_LOCATION=redis://host:6379/1 (пакет redis)
+#   locmem   - только разработка, один процесс
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'database')
+CACHE_BACKENDS = {
+    'locmem': ('core.instrumentation.InstrumentedLocMemCache', ''),
+    'database': ('core.instrumentation.InstrumentedDatabaseCache', 'core_cache'),
+    'redis': ('core.instrumentation.InstrumentedRedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -155,8 +179,39 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
-# WhiteNoise configuration for static files (без Manifest для избежания ошибок)
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# WhiteNoise: хешированные имена (manifest) + gzip/Brotli версии.
+# Отсутствующие в manifest файлы отдаются по исходному имени (см. core/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.PrecacheManifestStaticFilesStorage',
+    },
+}
+
+# Хешированные файлы WhiteNoise отдаёт с "max-age=10 лет, immutable".
+# Для нехешированных имён (старые ссылки /static/...) - короткий кэш
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=3600, cast=int)
+
+# Что Service Worker кэширует при установке (sw-precache.js генерируется при collectstatic)
+PWA_PRECACHE_PATTERNS = ['css/*', 'js/*', 'img/*', 'manifest.json']
+
+# Лента объявлений для Service Worker (/feed/listings.json, core/listing_feed.py):
+# сколько объявлений (первые страницы главной) и max-age ответа, сек
+PWA_FEED_SIZE = config('PWA_FEED_SIZE', default=100, cast=int)
+PWA_FEED_MAX_AGE = config('PWA_FEED_MAX_AGE', default=60, cast=int)
+
+
+def whitenoise_add_headers(headers, path, url):
+    """Service Worker: всегда свежий и с доступом ко всему сайту (scope '/')"""
+    if url.endswith(('/sw.js', '/sw-precache.js')):
+        headers['Cache-Control'] = 'no-cache'
+    if url.endswith('/sw.js'):
+        headers['Service-Worker-Allowed'] = '/'
+
+
+WHITENOISE_ADD_HEADERS_FUNCTION = whitenoise_add_headers
 
 # Media files configuration
 MEDIA_URL = '/media/'
@@ -206,6 +261,115 @@ if not DEBUG and SECURE_SSL_REDIRECT:
     SECURE_HSTS_PRELOAD = True
 
 
+# ========== ИНСТРУМЕНТАЦИЯ ЗАПРОСОВ (core/middleware.py) ==========
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=True, cast=bool)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)  # порог медленного запроса
+SLOW_REQUEST_SAMPLE_RATE = config('SLOW_REQUEST_SAMPLE_RATE', default=1.0, cast=float)  # доля логируемых с SQL
+SLOW_REQUEST_MAX_QUERIES = 20  # сколько SQL выводить в лог медленного запроса
+
+# ========== СЖАТИЕ ОТВЕТОВ (core/middleware.py) ==========
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)  # False - сжимает прокси
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)  # байт
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)  # 11 - слишком медленно для HTML на лету
+# BREACH: страницы с POST-формой и CSRF-токеном не сжимаются
+COMPRESSION_SKIP_CSRF_FORMS = config('COMPRESSION_SKIP_CSRF_FORMS', default=True, cast=bool)
+
+# ========== ASGI (core/views_async.py) ==========
+# True - главная, карточка объявления и список ветеринаров обслуживаются нативными
+# async views (для uvicorn/daphne через config.asgi). Под WSGI оставлять False
+USE_ASYNC_VIEWS = config('USE_ASYNC_VIEWS', default=False, cast=bool)
+
+# ========== МЕТРИКИ PROMETHEUS (core/metrics.py) ==========
+# /metrics доступен staff-пользователям или по заголовку Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Несколько gunicorn workers: общий каталог, куда каждый процесс сбрасывает свои счётчики,
+# /metrics суммирует их (пусто - значения только одного процесса). Очищать при деплое
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)  # сек
+# Порт /metrics для процесса бота (runbot), 0 - выключено
+BOT_METRICS_PORT = config('BOT_METRICS_PORT', default=0, cast=int)
+
+# ========== TELEGRAM БОТ (runbot) ==========
+# Адрес Bot API: для нагрузочных тестов - локальный core/fake_telegram.py (python manage.py bot_loadtest)
+TELEGRAM_API_BASE = config('TELEGRAM_API_BASE', default='https://api.telegram.org')
+BOT_WORKERS = config('BOT_WORKERS', default=4, cast=int)  # потоки для handlers, 0 - пул telebot
+BOT_QUEUE_SIZE = config('BOT_QUEUE_SIZE', default=100, cast=int)  # апдейтов в очереди до паузы polling
+# Кэш chat_id -> профиль в процессе бота (core/chat_profiles.py): чатов и секунд жизни записи.
+# Сброс между процессами - через общий кэш (CACHE_BACKEND); с locmem у каждого процесса свой,
+# и TTL остаётся задержкой, с которой бот видит изменения с сайта
+BOT_PROFILE_CACHE_SIZE = config('BOT_PROFILE_CACHE_SIZE', default=10000, cast=int)
+BOT_PROFILE_CACHE_TTL = config('BOT_PROFILE_CACHE_TTL', default=60, cast=int)
+# Поиск в боте (core/search.py): результатов на странице и сколько секунд кэшируется страница
+BOT_SEARCH_PAGE_SIZE = config('BOT_SEARCH_PAGE_SIZE', default=5, cast=int)
+BOT_SEARCH_CACHE_TIMEOUT = config('BOT_SEARCH_CACHE_TIMEOUT', default=120, cast=int)
+# Inline-режим (core/inline_index.py): адрес сайта для ссылок и миниатюр, обновление индекса
+# (изменения - раз в INLINE_INDEX_REFRESH сек, полная перестройка - INLINE_INDEX_REBUILD),
+# cache_time ответа - сколько Telegram отдаёт ответ на тот же запрос из своего кэша
+BOT_SITE_URL = config('BOT_SITE_URL', default='https://magaj.pythonanywhere.com')
+INLINE_INDEX_REFRESH = config('INLINE_INDEX_REFRESH', default=30, cast=int)
+INLINE_INDEX_REBUILD = config('INLINE_INDEX_REBUILD', default=600, cast=int)
+INLINE_CACHE_TIME = config('INLINE_CACHE_TIME', default=60, cast=int)
+
+# Очередь уведомлений (send_notifications): пауза между сообщениями в секундах.
+# Telegram ограничивает группы/каналы ~20 сообщениями в минуту
+NOTIFICATION_SEND_INTERVAL = config('NOTIFICATION_SEND_INTERVAL', default=3.0, cast=float)
+# Параллельная рассылка (core/telegram_async.py): одновременных запросов и общий лимит бота, сообщений/сек
+TELEGRAM_ASYNC_CONCURRENCY = config('TELEGRAM_ASYNC_CONCURRENCY', default=20, cast=int)
+TELEGRAM_GLOBAL_RATE = config('TELEGRAM_GLOBAL_RATE', default=25.0, cast=float)
+
+# ========== ОЧЕРЕДЬ МОДЕРАЦИИ (core/moderation.py) ==========
+MODERATION_BATCH_SIZE = 20  # объявлений на одну страницу проверки
+MODERATION_LEASE_MINUTES = config('MODERATION_LEASE_MINUTES', default=15, cast=int)  # аренда пачки модератором
+
+# ========== ДУБЛИКАТЫ ОБЪЯВЛЕНИЙ (core/duplicates.py) ==========
+# Фото: максимальное расстояние Хэмминга между dHash (не больше 7 - см. полосы LSH)
+DUPLICATE_PHOTO_DISTANCE = config('DUPLICATE_PHOTO_DISTANCE', default=6, cast=int)
+# Текст: минимальное сходство MinHash (оценка коэффициента Жаккара)
+DUPLICATE_TEXT_SIMILARITY = config('DUPLICATE_TEXT_SIMILARITY', default=0.6, cast=float)
+# True - повтор своего активного объявления с тем же фото не публикуется, иначе только пометка
+DUPLICATE_LISTINGS_BLOCK = config('DUPLICATE_LISTINGS_BLOCK', default=True, cast=bool)
+
+# ========== ИМПОРТ ОБЪЯВЛЕНИЙ (core/imports.py) ==========
+IMPORT_BATCH_SIZE = 100  # строк на один bulk_create
+IMPORT_WORKERS = config('IMPORT_WORKERS', default=4, cast=int)  # потоки обработки фото
+# Загрузки со страницы /manager/import/ и отчёты об ошибках (данные продавцов) - вне MEDIA_ROOT,
+# импортирует python manage.py import_listings --queue
+IMPORT_ROOT = config('IMPORT_ROOT', default=str(BASE_DIR / 'imports'))
+
+# ========== АРХИВ ОБЪЯВЛЕНИЙ (core/archive.py) ==========
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)  # проданные/снятые старше N дней
+ARCHIVE_ROOT = config('ARCHIVE_ROOT', default=str(BASE_DIR / 'archive'))  # сжатый JSONL (archive_listings --to jsonl)
+
+# ========== JSON API (core/api.py) ==========
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=20, cast=int)  # ?limit= по умолчанию
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
+API_MAX_AGE = config('API_MAX_AGE', default=30, cast=int)  # Cache-Control max-age ответов, сек
+
+# ========== СХЕМА ПОЛЕЙ ПО КАТЕГОРИЯМ (core/category_schema.py) ==========
+# /category-schema/: max-age ответа, сек (после max-age - ревалидация по ETag, 304)
+CATEGORY_SCHEMA_MAX_AGE = config('CATEGORY_SCHEMA_MAX_AGE', default=3600, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # WARNING - только медленные запросы (SLOW_REQUEST_MS); INFO - строка на каждый запрос
+        'core.performance': {
+            'handlers': ['console'],
+            'level': config('PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # ========== EMAIL CONFIGURATION (для восстановления пароля) ==========
 # Настройки SMTP для отправки писем
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -9,6 +9,7 @@ from django.conf.urls.i18n import i18n_patterns
 from django.contrib.sitemaps.views import sitemap
 from django.views.generic import TemplateView
 from core.sitemaps import AnimalSitemap, StaticPagesSitemap
+from core.views import metrics
 
 sitemaps = {
     'animals': AnimalSitemap,
@@ -21,6 +22,10 @@ urlpatterns = [
     # Sitemap & robots.txt (вне i18n, чтобы Google мог читать)
     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain'), name='robots_txt'),
+    # Prometheus (staff или METRICS_TOKEN)
+    path('metrics', metrics, name='metrics'),
+    # Read-only JSON API (core/api.py)
+    path('api/v1/', include('core.api')),
 ]
 
 # Основные URL patterns с поддержкой языков
@@ -8,8 +8,18 @@ from django.urls import path
 from django.shortcuts import render
 from unfold.admin import ModelAdmin
 from unfold.decorators import display
-from .models import Animal, Bid, Comment, UserProfile, Review, AnimalImage, Veterinarian, Offer, Transaction
+from .models import (
+    Animal, ArchivedAnimal, Bid, Comment, UserProfile, Review, AnimalImage, Veterinarian, Offer, Transaction,
+    TelegramNotification, BroadcastCampaign, BroadcastDelivery, TelegramFileCache,
+)
+from .broadcasts import cancel_campaign, retry_failed, start_campaign
+from .moderation import announce_listing, approve_listings, disapprove_listings
+from .cache_utils import bump_listings_version
+from .listing_feed import touch_listings
+from .paginators import EstimatedCountPaginator
+from .search import search_animals
 from django import forms
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -53,13 +63,31 @@ class AnimalAdmin(ModelAdmin):
     list_display = ['title', 'category_badge', 'price', 'owner', 'city', 'is_approved', 'is_vip', 'listing_type', 'is_paid', 'payment_receipt_preview', 'created_at']
     list_filter = ['is_approved', 'is_vip', 'listing_type', 'is_paid', 'is_sold', 'category', 'city', 'created_at']
     list_filter_submit = True  # Unfold feature: Submit button for filters
-    search_fields = ['title', 'description', 'phone', 'owner__username', 'breed']
+    # Поиск идёт через core.search (GIN индекс на Postgres), см. get_search_results
+    search_fields = ['title', 'breed', 'phone', 'owner__username']
+    search_help_text = 'Название/порода/описание, ID, телефон или @username'
     list_editable = ['is_approved', 'is_vip', 'is_paid']
-    date_hierarchy = 'created_at'
     readonly_fields = ['created_at', 'updated_at', 'payment_receipt_display']
+    raw_id_fields = ['owner', 'winner']
     inlines = [AnimalImageInline]
     list_per_page = 25  # Pagination
 
+    # Большая таблица: один JOIN вместо запроса на строку, без COUNT(*) всей таблицы
+    list_select_related = ['owner']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_animals(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Одобрение в форме или галочкой в списке (list_editable) - анонс в канал
+        if change and obj.is_approved and 'is_approved' in form.changed_data:
+            announce_listing(obj)
+
     @display(description='📁 Категория', ordering='category')
     def category_badge(self, obj):
         """Show category with coloured emoji badge"""
@@ -89,9 +117,9 @@ class AnimalAdmin(ModelAdmin):
     def payment_receipt_preview(self, obj):
         if obj.payment_receipt:
             return format_html(
-                '<a href="{}" target="_blank"><img src="{}" width="50" height="50" style="object-fit: cover; border: 2px solid #D4AF37; border-radius: 4px;" /></a>',
-                obj.payment_receipt.url,
-                obj.payment_receipt.url
+                '<a href="{}" target="_blank"><img src="{}" width="50" height="50" loading="lazy" style="object-fit: cover; border: 2px solid #D4AF37; border-radius: 4px;" /></a>',
+                obj.receipt_review_url,
+                obj.receipt_thumb_url
             )
         return '-'
 
@@ -101,8 +129,8 @@ class AnimalAdmin(ModelAdmin):
         if obj.payment_receipt:
             return format_html(
                 '<a href="{}" target="_blank"><img src="{}" style="max-width: 500px; max-height: 500px; border: 3px solid #D4AF37; border-radius: 8px; box-shadow: 0 4px 6px rgba(0,0,0,0.3);" /></a><br><br><a href="{}" target="_blank" style="color: #D4AF37; font-weight: bold; text-decoration: none;">🔗 Открыть в полном размере</a>',
-                obj.payment_receipt.url,
-                obj.payment_receipt.url,
+                obj.receipt_review_url,
+                obj.receipt_review_url,
                 obj.payment_receipt.url
             )
         return format_html('<span style="color: #999;">Чек не загружен</span>')
@@ -155,57 +183,81 @@ class AnimalAdmin(ModelAdmin):
     
     @display(description='✅ Одобрить выбранные объявления')
     def approve_animals(self, request, queryset):
-        """Approve selected animals"""
-        updated = queryset.update(is_approved=True)
-        self.message_user(request, f'{updated} объявлений одобрено.')
+        """Approve selected animals (один UPDATE, анонсы - в очередь send_notifications)"""
+        updated, queued = approve_listings(queryset)
+        self.message_user(request, f'{updated} объявлений одобрено, {queued} анонсов в очереди.')
     
     @display(description='❌ Снять с публикации')
     def disapprove_animals(self, request, queryset):
         """Disapprove selected animals"""
-        updated = queryset.update(is_approved=False)
+        updated = disapprove_listings(queryset)
         self.message_user(request, f'{updated} объявлений снято с публикации.')
     
     @display(description='⭐ Сделать VIP')
     def make_vip(self, request, queryset):
         """Make selected animals VIP"""
         updated = queryset.update(is_vip=True)
+        bump_listings_version()
         self.message_user(request, f'{updated} объявлений получили VIP статус.')
 
 
+class TouchListingMixin:
+    """
+    Ставка/комментарий - часть карточки: правка или удаление в админке
+    меняет версию объявления (listing_feed.touch_listings), иначе SW и
+    кэш лент показывали бы старую карточку
+    """
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        touch_listings([obj.animal_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        touch_listings([obj.animal_id])
+
+    def delete_queryset(self, request, queryset):
+        animal_ids = set(queryset.values_list('animal_id', flat=True))
+        super().delete_queryset(request, queryset)
+        touch_listings(animal_ids)
+
+
 @admin.register(Bid)
-class BidAdmin(ModelAdmin):
+class BidAdmin(TouchListingMixin, ModelAdmin):
     """
     Admin interface for Bid model
     """
     list_display = ['animal', 'bidder', 'amount', 'created_at']
-    list_filter = ['created_at', 'animal']
+    list_filter = ['created_at']  # фильтр по animal выводил список всех объявлений
     search_fields = ['bidder__username', 'animal__title']
     readonly_fields = ['created_at']
+    raw_id_fields = ['animal', 'bidder']
     ordering = ['-created_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('animal', 'bidder')
+    list_select_related = ['animal', 'bidder']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Comment)
-class CommentAdmin(ModelAdmin):
+class CommentAdmin(TouchListingMixin, ModelAdmin):
     """
     Admin interface for Comment model
     """
     list_display = ['author', 'animal', 'text_preview', 'created_at']
-    list_filter = ['created_at', 'animal']
+    list_filter = ['created_at']  # фильтр по animal выводил список всех объявлений
     list_filter_submit = True
     search_fields = ['author__username', 'animal__title', 'text']
     readonly_fields = ['created_at']
+    raw_id_fields = ['animal', 'author']
     ordering = ['-created_at']
+    list_select_related = ['animal', 'author']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     @display(description='Текст')
     def text_preview(self, obj):
         """Show first 50 characters of text"""
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('animal', 'author')
 
 
 @admin.register(UserProfile)
@@ -430,7 +482,12 @@ class AnimalImageAdmin(ModelAdmin):
     list_display = ['animal', 'image_preview', 'uploaded_at']
     list_filter = ['uploaded_at']
     search_fields = ['animal__title']
-    ordering = ['animal', '-uploaded_at']
+    raw_id_fields = ['animal']
+    # animal_id, а не animal: сортировка по FK тянула JOIN и Meta.ordering объявления
+    ordering = ['animal_id', '-uploaded_at']
+    list_select_related = ['animal']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     @display(description='Превью')
     def image_preview(self, obj):
@@ -452,7 +509,11 @@ class OfferAdmin(ModelAdmin):
     list_filter_submit = True
     search_fields = ['animal__title', 'buyer__username']
     readonly_fields = ['created_at']
+    raw_id_fields = ['animal', 'buyer']
     list_editable = ['status']
+    list_select_related = ['animal', 'buyer']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Информация о предложении', {
@@ -480,3 +541,114 @@ class OfferAdmin(ModelAdmin):
         """Reject selected offers"""
         updated = queryset.update(status='rejected')
         self.message_user(request, f'{updated} предложений отклонено.')
+
+
+@admin.register(TelegramNotification)
+class TelegramNotificationAdmin(ModelAdmin):
+    """
+    Очередь Telegram уведомлений (отправляет команда send_notifications)
+    """
+    list_display = ['chat_id', 'animal', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['chat_id', 'text']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    raw_id_fields = ['animal']
+    list_select_related = ['animal']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    actions = ['retry_notifications']
+    
+    @display(description='🔁 Отправить повторно')
+    def retry_notifications(self, request, queryset):
+        """Return failed notifications to the queue"""
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, available_at=timezone.now())
+        self.message_user(request, f'{updated} уведомлений возвращено в очередь.')
+
+
+@admin.register(ArchivedAnimal)
+class ArchivedAnimalAdmin(ModelAdmin):
+    """
+    Архив проданных и устаревших объявлений (команда archive_listings)
+    """
+    list_display = ['id', 'title', 'category', 'status', 'price', 'owner', 'created_at', 'archived_at']
+    list_filter = ['status', 'category', 'archived_at']
+    search_fields = ['title', 'owner__username']
+    list_select_related = ['owner']
+    raw_id_fields = ['owner']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BroadcastCampaign)
+class BroadcastCampaignAdmin(ModelAdmin):
+    """
+    Рассылки бота (отправляет команда run_broadcasts)
+    """
+    list_display = ['id', 'segment', 'segment_value', 'status', 'total', 'sent', 'failed', 'blocked', 'created_by', 'created_at']
+    list_filter = ['status', 'segment', 'created_at']
+    search_fields = ['text']
+    readonly_fields = ['total', 'sent', 'failed', 'blocked', 'created_at', 'started_at', 'finished_at']
+    raw_id_fields = ['created_by']
+    list_select_related = ['created_by']
+    
+    actions = ['start_campaigns', 'cancel_campaigns', 'retry_failed_deliveries']
+    
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+    
+    @display(description='▶️ Запустить рассылку')
+    def start_campaigns(self, request, queryset):
+        total = sum(start_campaign(campaign) for campaign in queryset.filter(status='draft'))
+        self.message_user(request, f'В очереди {total} получателей. Отправляет python manage.py run_broadcasts.')
+    
+    @display(description='⏹️ Отменить')
+    def cancel_campaigns(self, request, queryset):
+        for campaign in queryset:
+            cancel_campaign(campaign)
+        self.message_user(request, 'Рассылки отменены (уже доставленные сообщения остаются).')
+    
+    @display(description='🔁 Повторить ошибки')
+    def retry_failed_deliveries(self, request, queryset):
+        count = sum(retry_failed(campaign) for campaign in queryset)
+        self.message_user(request, f'{count} получателей возвращено в очередь.')
+
+
+@admin.register(BroadcastDelivery)
+class BroadcastDeliveryAdmin(ModelAdmin):
+    """
+    Статус рассылки по получателям (только просмотр)
+    """
+    list_display = ['campaign', 'chat_id', 'profile', 'status', 'error', 'sent_at']
+    list_filter = ['status', 'campaign']
+    search_fields = ['chat_id', 'profile__user__username']
+    list_select_related = ['campaign', 'profile__user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TelegramFileCache)
+class TelegramFileCacheAdmin(ModelAdmin):
+    """
+    file_id загруженных в Telegram фото (удаление записи - фото загрузится заново)
+    """
+    list_display = ['path', 'file_id', 'hits', 'created_at']
+    search_fields = ['path']
+    readonly_fields = ['path', 'content_hash', 'file_id', 'hits', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,323 @@
+"""
+Read-only JSON API (/api/v1/) для PWA и интеграций (бот, партнёры).
+
+    GET /api/v1/listings/?fields=id,title,price&category=pigeon&city=&listing_type=&limit=20&cursor=...
+    GET /api/v1/listings/<id>/?fields=...
+    GET /api/v1/sellers/<username>/
+    GET /api/v1/veterinarians/?city=&search=&cursor=...
+
+- только нужные колонки: ?fields= -> values() по списку колонок полей,
+  без моделей и шаблонов
+- курсорная пагинация по (is_vip, created_at, id) - порядок главной,
+  без OFFSET: следующая страница - один запрос по индексу
+- ETag по телу ответа (304 на If-None-Match); сжатие - CompressionMiddleware
+- списки и карточки объявлений кэшируются до изменения объявлений
+  (версия кэша из cache_utils)
+"""
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import path, reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .cache_utils import LISTINGS_CACHE_TIMEOUT, listings_cache_key
+from .category_schema import LISTING_FORM
+from .listing_feed import listing_version
+from .models import Animal, AnimalImage, Review, Veterinarian
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Field(NamedTuple):
+    columns: tuple  # колонки values()
+    value: Callable = None  # row -> значение; None - row[columns[0]]
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def _price(row):
+    return row['current_price'] if row['listing_type'] == 'auction' else row['price']
+
+
+# ==================== ПОЛЯ ====================
+
+LISTING_FIELDS = {
+    'id': Field(('id',)),
+    'title': Field(('title',)),
+    'category': Field(('category',)),
+    'city': Field(('city',)),
+    'price': Field(('price', 'current_price', 'listing_type'), _price),
+    'listing_type': Field(('listing_type',)),
+    'is_negotiable': Field(('is_negotiable',)),
+    'is_vip': Field(('is_vip',)),
+    'is_sold': Field(('is_sold',)),
+    'gender': Field(('gender',)),
+    'age': Field(('age',)),
+    'breed': Field(('breed',)),
+    'photo': Field(('main_photo',), lambda row: _media_url(row['main_photo'])),
+    'url': Field(('id',), lambda row: reverse('animal_detail', args=[row['id']])),
+    'seller': Field(('owner__username',)),
+    'created_at': Field(('created_at',)),
+    'version': Field(('updated_at',), lambda row: listing_version(row['updated_at'])),
+}
+LISTING_DEFAULT_FIELDS = ('id', 'title', 'category', 'city', 'price', 'listing_type', 'is_vip', 'photo', 'url')
+
+# Карточка: всё из списка + описание, контакты, аукцион и поля категорий (core/category_schema.py)
+LISTING_DETAIL_FIELDS = {
+    **LISTING_FIELDS,
+    'description': Field(('description',)),
+    'phone': Field(('phone',)),
+    'whatsapp_number': Field(('whatsapp_number',)),
+    'telegram_username': Field(('telegram_username',)),
+    'video_url': Field(('video_url',)),
+    'start_price': Field(('start_price',)),
+    'auction_end_date': Field(('auction_end_date',)),
+    'views': Field(('views_count',)),
+    'photos': Field((), None),  # галерея - отдельный запрос, только если запрошена
+    **{name: Field((name,)) for name in LISTING_FORM.field_names if name not in LISTING_FIELDS},
+}
+LISTING_DETAIL_DEFAULT_FIELDS = tuple(LISTING_DETAIL_FIELDS)
+
+VET_FIELDS = {
+    'id': Field(('id',)),
+    'name': Field(('name',)),
+    'city': Field(('city',)),
+    'address': Field(('address',)),
+    'phone': Field(('phone',)),
+    'whatsapp_number': Field(('whatsapp_number',)),
+    'description': Field(('description',)),
+    'is_vip': Field(('is_vip',)),
+    'photo': Field(('photo',), lambda row: _media_url(row['photo'])),
+    'url': Field(('id',), lambda row: reverse('veterinarian_detail', args=[row['id']])),
+}
+VET_DEFAULT_FIELDS = ('id', 'name', 'city', 'address', 'phone', 'is_vip', 'photo')
+
+# Ключ курсора: порядок главной, id - для однозначности
+CURSOR_COLUMNS = ('is_vip', 'created_at', 'id')
+
+
+def selected_fields(request, fields, default):
+    """?fields=a,b,c -> список имён (неизвестное поле - 400)"""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(fields)}")
+    return names
+
+
+def columns_for(fields, names, extra=()):
+    return list(dict.fromkeys([column for name in names for column in fields[name].columns] + list(extra)))
+
+
+def serialize(row, fields, names):
+    return {
+        name: fields[name].value(row) if fields[name].value else row[fields[name].columns[0]]
+        for name in names if fields[name].columns
+    }
+
+
+# ==================== КУРСОР ====================
+
+def encode_cursor(row):
+    values = [row['is_vip'], row['created_at'].isoformat(), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        is_vip, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return bool(is_vip), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise ApiError('Invalid cursor')
+
+
+def after_cursor(queryset, cursor):
+    """Строки после курсора при порядке (-is_vip, -created_at, -id)"""
+    if not cursor:
+        return queryset
+    is_vip, created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(is_vip__lt=is_vip)
+        | Q(is_vip=is_vip, created_at__lt=created_at)
+        | Q(is_vip=is_vip, created_at=created_at, id__lt=pk)
+    )
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def cursor_page(queryset, request, fields, names):
+    """Страница values() по курсору: {'results': [...], 'next': курсор или None}"""
+    limit = page_limit(request)
+    rows = list(
+        after_cursor(queryset, request.GET.get('cursor'))
+        .order_by('-is_vip', '-created_at', '-id')
+        .values(*columns_for(fields, names, CURSOR_COLUMNS))[:limit + 1]
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {'results': [serialize(row, fields, names) for row in rows[:limit]], 'next': next_cursor}
+
+
+# ==================== ОТВЕТ ====================
+
+def dump(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def json_response(request, body, max_age=None):
+    """JSON с ETag по телу: совпал If-None-Match - 304 без тела"""
+    etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.API_MAX_AGE if max_age is None else max_age)
+    return response
+
+
+def api_view(view):
+    """GET/HEAD, ApiError -> {'error': ...} с кодом"""
+    @require_safe
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=e.status, json_dumps_params={'ensure_ascii': False})
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def cached_body(name, request, build):
+    """Тело ответа по объявлениям - в кэше до их изменения (ключ - путь и параметры запроса)"""
+    digest = hashlib.sha1(request.get_full_path().encode()).hexdigest()[:16]
+    key = listings_cache_key(f'api:{name}:{digest}')
+    body = cache.get(key)
+    if body is None:
+        body = build()
+        cache.set(key, body, LISTINGS_CACHE_TIMEOUT)
+    return body
+
+
+# ==================== VIEWS ====================
+
+def listing_queryset(request):
+    listings = Animal.objects.filter(is_approved=True)
+    for param in ('category', 'city', 'listing_type'):
+        if request.GET.get(param):
+            listings = listings.filter(**{param: request.GET[param]})
+    if request.GET.get('sold') in ('0', 'false'):
+        listings = listings.filter(is_sold=False)
+    return listings
+
+
+@api_view
+def listings(request):
+    """Одобренные объявления, порядок главной (VIP, новые)"""
+    names = selected_fields(request, LISTING_FIELDS, LISTING_DEFAULT_FIELDS)
+    body = cached_body(
+        'listings', request,
+        lambda: dump(cursor_page(listing_queryset(request), request, LISTING_FIELDS, names)),
+    )
+    return json_response(request, body)
+
+
+@api_view
+def listing_detail(request, pk):
+    """Карточка объявления"""
+    names = selected_fields(request, LISTING_DETAIL_FIELDS, LISTING_DETAIL_DEFAULT_FIELDS)
+
+    def build():
+        row = (
+            Animal.objects.filter(pk=pk, is_approved=True)
+            .values(*columns_for(LISTING_DETAIL_FIELDS, names)).first()
+        )
+        if row is None:
+            return None
+        data = serialize(row, LISTING_DETAIL_FIELDS, names)
+        if 'photos' in names:
+            data['photos'] = [
+                _media_url(image) for image in
+                AnimalImage.objects.filter(animal_id=pk).order_by('pk').values_list('image', flat=True)
+            ]
+        return dump(data)
+
+    body = cached_body('listing', request, build)
+    if body is None:
+        raise ApiError('Not found', status=404)
+    return json_response(request, body)
+
+
+@api_view
+def seller(request, username):
+    """Сводка продавца: профиль, рейтинг по отзывам, число объявлений"""
+    user = (
+        User.objects.filter(username=username, is_active=True)
+        .values('id', 'username', 'date_joined', 'profile__is_verified', 'profile__total_sales')
+        .first()
+    )
+    if user is None:
+        raise ApiError('Not found', status=404)
+    reviews = Review.objects.filter(seller_id=user['id']).aggregate(rating=Avg('rating'), reviews=Count('id'))
+    listing_counts = Animal.objects.filter(owner_id=user['id'], is_approved=True).aggregate(
+        listings=Count('id'), active=Count('id', filter=Q(is_sold=False, status='active')),
+    )
+    data = {
+        'username': user['username'],
+        'date_joined': user['date_joined'],
+        'is_verified': bool(user['profile__is_verified']),
+        'total_sales': user['profile__total_sales'] or 0,
+        'rating': round(reviews['rating'], 1) if reviews['rating'] else None,
+        'reviews': reviews['reviews'],
+        'listings': listing_counts['listings'],
+        'active_listings': listing_counts['active'],
+        'url': reverse('seller_profile', args=[user['username']]),
+    }
+    return json_response(request, dump(data))
+
+
+@api_view
+def veterinarians(request):
+    """Одобренные ветклиники, VIP первыми"""
+    names = selected_fields(request, VET_FIELDS, VET_DEFAULT_FIELDS)
+    vets = Veterinarian.objects.filter(is_approved=True)
+    if request.GET.get('city'):
+        vets = vets.filter(city=request.GET['city'])
+    search = request.GET.get('search', '').strip()
+    if search:
+        vets = vets.filter(Q(name__icontains=search) | Q(description__icontains=search))
+    return json_response(request, dump(cursor_page(vets, request, VET_FIELDS, names)))
+
+
+urlpatterns = [
+    path('listings/', listings, name='api_listings'),
+    path('listings/<int:pk>/', listing_detail, name='api_listing_detail'),
+    path('sellers/<str:username>/', seller, name='api_seller'),
+    path('veterinarians/', veterinarians, name='api_veterinarians'),
+]
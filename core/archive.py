@@ -0,0 +1,159 @@
+"""
+Archival tier for sold and stale listings.
+
+Проданные, снятые и завершённые аукционы старше ARCHIVE_AFTER_DAYS
+переносятся из Animal (таблица главной, поиска, sitemap) в ArchivedAnimal
+вместе со ставками, комментариями и предложениями - снимком JSON.
+Снимок хранится:
+- 'db': в ArchivedAnimal.data
+- 'jsonl': в сжатом JSONL на диске (ARCHIVE_ROOT/<год-месяц>.jsonl.gz).
+  Каждая запись - отдельный gzip-член, в строке таблицы - файл и смещение:
+  файл целиком читается как обычный .jsonl.gz, а одна запись - без
+  распаковки всего файла.
+
+Первичный ключ архивной записи = pk объявления, старые ссылки /animal/<pk>/
+продолжают работать (views.animal_detail -> load_snapshot).
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Animal, ArchivedAnimal
+
+TARGETS = ('db', 'jsonl')
+
+
+def archivable_listings(days=None):
+    """Объявления для переноса в архив: проданы/сняты или аукцион закончился больше days дней назад"""
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    return Animal.objects.filter(
+        (Q(status__in=['sold', 'archived']) | Q(is_sold=True)) & Q(updated_at__lt=cutoff) |
+        Q(listing_type='auction', auction_end_date__lt=cutoff)
+    )
+
+
+def snapshot(animal):
+    """Полный снимок объявления со связанными данными (для JSON)"""
+    data = {}
+    for field in Animal._meta.concrete_fields:
+        value = getattr(animal, field.attname)
+        data[field.attname] = value.name if isinstance(field, models.FileField) else value
+    data['owner_username'] = animal.owner.username if animal.owner_id else ''
+    data['gallery'] = [image.image.name for image in animal.gallery.all()]
+    data['favorites_count'] = len(animal.favorites.all())
+    data['bids'] = [
+        {'id': bid.pk, 'bidder_id': bid.bidder_id, 'bidder': bid.bidder.username,
+         'amount': bid.amount, 'created_at': bid.created_at}
+        for bid in animal.bids.all()
+    ]
+    data['comments'] = [
+        {'id': comment.pk, 'author_id': comment.author_id, 'author': comment.author.username,
+         'text': comment.text, 'created_at': comment.created_at}
+        for comment in animal.comments.all()
+    ]
+    data['offers'] = [
+        {'id': offer.pk, 'buyer_id': offer.buyer_id, 'buyer': offer.buyer.username, 'price': offer.price,
+         'status': offer.status, 'message': offer.message, 'created_at': offer.created_at}
+        for offer in animal.offers.all()
+    ]
+    # Через JSON - Decimal/datetime становятся строками так же, как при чтении из файла
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def _archive_path(now):
+    return os.path.join(str(settings.ARCHIVE_ROOT), f'{now:%Y-%m}.jsonl.gz')
+
+
+def _append_members(path, snapshots):
+    """Дописать записи отдельными gzip-членами, вернуть смещения"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    offsets = []
+    with open(path, 'ab') as f:
+        for data in snapshots:
+            offsets.append(f.tell())
+            f.write(gzip.compress((json.dumps(data, ensure_ascii=False) + '\n').encode('utf-8')))
+        f.flush()
+        os.fsync(f.fileno())
+    return offsets
+
+
+def archive_batch(animals, target='db'):
+    """Перенести объявления в архив и удалить из Animal (вместе со ставками, комментариями, предложениями)"""
+    now = timezone.now()
+    snapshots = [snapshot(animal) for animal in animals]
+    archived = [
+        ArchivedAnimal(
+            id=animal.pk,
+            owner_id=animal.owner_id,
+            category=animal.category,
+            title=animal.title,
+            city=animal.city,
+            price=animal.current_price or animal.price,
+            status='sold' if animal.is_sold else animal.status,
+            main_photo=animal.main_photo.name,
+            created_at=animal.created_at,
+            archived_at=now,
+            data=data if target == 'db' else None,
+        )
+        for animal, data in zip(animals, snapshots)
+    ]
+    if target == 'jsonl':
+        # Файл пишется до commit: при откате останутся лишние записи в файле, но не потеря данных
+        path = _archive_path(now)
+        for item, offset in zip(archived, _append_members(path, snapshots)):
+            item.archive_file = os.path.relpath(path, str(settings.ARCHIVE_ROOT))
+            item.archive_offset = offset
+
+    with transaction.atomic():
+        # Без ignore_conflicts: архивная запись с тем же pk - ошибка и откат,
+        # объявление не удаляется, пока его снимок не сохранён
+        ArchivedAnimal.objects.bulk_create(archived)
+        Animal.objects.filter(pk__in=[animal.pk for animal in animals]).delete()
+    return len(archived)
+
+
+def archive_listings(days=None, target='db', batch_size=200, limit=None, progress=None):
+    """Архивировать все подходящие объявления пачками. Возвращает число перенесённых"""
+    if target not in TARGETS:
+        raise ValueError(f'Unknown archive target: {target}')
+
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        animals = list(
+            archivable_listings(days)
+            .order_by('pk')
+            .select_related('owner')
+            .prefetch_related('gallery', 'favorites', 'bids__bidder', 'comments__author', 'offers__buyer')[:size]
+        )
+        if not animals:
+            break
+        total += archive_batch(animals, target)
+        if progress:
+            progress(total)
+    return total
+
+
+def load_snapshot(archived):
+    """Снимок архивной записи: из БД или из gzip-члена файла"""
+    if archived.data is not None:
+        return archived.data
+    if not archived.archive_file:
+        return {}
+    path = os.path.join(str(settings.ARCHIVE_ROOT), archived.archive_file)
+    try:
+        with open(path, 'rb') as f:
+            f.seek(archived.archive_offset)
+            with gzip.GzipFile(fileobj=f) as member:
+                return json.loads(member.readline())
+    except (OSError, ValueError) as e:
+        print(f"Ошибка чтения архива {path}: {str(e)}")
+        return {}
@@ -0,0 +1,507 @@
+"""
+Benchmark suite for ZooBozor views.
+
+Прогоняет основные страницы через Django test client на текущей БД
+(обычно заполненной командой generate_synthetic_data) и считает:
+
+- латентность: p50 / p95 / p99, среднее, min / max (мс)
+- количество SQL запросов на запрос (median / max)
+- размер ответа (байты) и после сжатия CompressionMiddleware:
+  br_bytes / gzip_bytes, сокращение в процентах (compression_pct)
+
+Каждый сценарий выполняется в транзакции с откатом — ставки, просмотры и
+т.п. не накапливаются, и повторные прогоны сравнимы между собой.
+Запуск: python manage.py benchmark_views (см. команду).
+
+Пропускная способность WSGI и ASGI (sync views против core/views_async.py)
+при одинаковом числе воркеров - run_throughput / benchmark_asgi.
+"""
+import asyncio
+import importlib
+import io
+import logging
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from .models import Animal, Bid, Comment, Review
+
+
+class Scenario:
+    """Один сценарий: метод + URL (+ данные формы, заголовки, авторизация)"""
+
+    def __init__(self, name, url, method='get', data=None, headers=None, login=False):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.headers = headers or {}
+        self.login = login
+
+    def request_data(self, iteration):
+        return self.data(iteration) if callable(self.data) else self.data
+
+
+def percentile(values, pct):
+    """Процентиль с линейной интерполяцией (как numpy.percentile)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(timings_ms, query_counts, sizes, statuses):
+    return {
+        'iterations': len(timings_ms),
+        'p50_ms': round(percentile(timings_ms, 50), 2),
+        'p95_ms': round(percentile(timings_ms, 95), 2),
+        'p99_ms': round(percentile(timings_ms, 99), 2),
+        'mean_ms': round(statistics.fmean(timings_ms), 2) if timings_ms else 0.0,
+        'min_ms': round(min(timings_ms, default=0.0), 2),
+        'max_ms': round(max(timings_ms, default=0.0), 2),
+        'queries_median': statistics.median(query_counts) if query_counts else 0,
+        'queries_max': max(query_counts, default=0),
+        'response_bytes': int(statistics.median(sizes)) if sizes else 0,
+        'status_codes': sorted(set(statuses)),
+        # 4xx/5xx: время ошибки - не время страницы, с baseline не сравнивается
+        'failed': any(status >= 400 for status in statuses),
+    }
+
+
+# ==================== FIXTURES ====================
+
+def pick_fixtures():
+    """
+    Выбрать "тяжёлые" объекты из текущей БД: самое обсуждаемое объявление,
+    продавца с наибольшим числом объявлений, активный аукцион и покупателя.
+    """
+    approved = Animal.objects.filter(is_approved=True)
+
+    detail = (
+        approved.annotate(n=Count('comments')).order_by('-n', '-pk').only('pk').first()
+    )
+    seller = (
+        User.objects.annotate(n=Count('animals')).order_by('-n', 'pk').first()
+    )
+    auction = (
+        approved.filter(
+            category='pigeon', listing_type='auction', is_sold=False,
+            auction_end_date__gt=timezone.now() + timedelta(hours=1),
+        ).order_by('-pk').first()
+    )
+    bidder = None
+    if auction:
+        bidder = User.objects.exclude(pk=auction.owner_id).order_by('pk').first()
+
+    return {
+        'animal': detail,
+        'seller': seller,
+        'auction': auction,
+        'bidder': bidder,
+    }
+
+
+def default_scenarios(fixtures):
+    """Сценарии по умолчанию; пропускаются те, для которых нет данных"""
+    scenarios = [
+        Scenario('home', reverse('home')),
+        Scenario('home_page_50', reverse('home') + '?page=50'),
+        Scenario('home_filter_category_city', reverse('home') + '?category=pigeon&city=dushanbe'),
+        Scenario('home_filter_price', reverse('home') + '?price_min=100&price_max=5000'),
+        Scenario('home_search', reverse('home') + '?search=бойный'),
+        Scenario('home_htmx', reverse('home') + '?category=dog', headers={'HX-Request': 'true'}),
+        Scenario('listings_feed', reverse('listings_feed')),
+        Scenario('api_listings', reverse('api_listings') + '?limit=50'),
+    ]
+
+    animal = fixtures.get('animal')
+    if animal:
+        scenarios.append(Scenario('animal_detail', reverse('animal_detail', args=[animal.pk])))
+
+    seller = fixtures.get('seller')
+    if seller:
+        scenarios.append(Scenario('seller_profile', reverse('seller_profile', args=[seller.username])))
+        scenarios.append(Scenario('dashboard', reverse('dashboard'), login=seller))
+
+    auction, bidder = fixtures.get('auction'), fixtures.get('bidder')
+    if auction and bidder:
+        base = int(auction.current_price or auction.start_price or 0)
+        scenarios.append(Scenario(
+            'place_bid',
+            reverse('place_bid', args=[auction.pk]),
+            method='post',
+            data=lambda i: {'amount': base + 10 * (i + 1)},
+            login=bidder,
+        ))
+
+    return scenarios
+
+
+# ==================== RUNNER ====================
+
+class _Rollback(Exception):
+    pass
+
+
+ENCODINGS = ('br', 'gzip')
+
+
+def _body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+def compressed_sizes(send, scenario, raw_bytes):
+    """
+    Размер ответа с Accept-Encoding br и gzip. Ответ, оставленный без сжатия
+    (мелкий, форма с CSRF-токеном - BREACH), считается как есть
+    """
+    sizes = {}
+    for encoding in ENCODINGS:
+        response = send(
+            scenario.url, data=scenario.request_data(0),
+            headers={**scenario.headers, 'Accept-Encoding': encoding},
+        )
+        sizes[f'{encoding}_bytes'] = len(_body(response))
+    best = min(sizes.values())
+    sizes['compression_pct'] = round((1 - best / raw_bytes) * 100, 1) if raw_bytes else 0.0
+    return sizes
+
+
+def run_scenario(scenario, iterations=50, warmup=5):
+    # Ошибка во view записывается как статус 500, а не прерывает весь прогон
+    client = Client(raise_request_exception=False)
+    if scenario.login:
+        client.force_login(scenario.login)
+
+    timings, query_counts, sizes, statuses = [], [], [], []
+    send = getattr(client, scenario.method)
+
+    try:
+        with transaction.atomic():
+            for i in range(warmup + iterations):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = send(scenario.url, data=scenario.request_data(i), headers=scenario.headers)
+                    elapsed = (time.perf_counter() - start) * 1000
+                if i < warmup:
+                    continue
+                timings.append(elapsed)
+                query_counts.append(len(ctx.captured_queries))
+                sizes.append(len(_body(response)))
+                statuses.append(response.status_code)
+            results = summarize(timings, query_counts, sizes, statuses)
+            if scenario.method == 'get':
+                results.update(compressed_sizes(send, scenario, results['response_bytes']))
+            raise _Rollback
+    except _Rollback:
+        pass
+
+    return results
+
+
+def dataset_stats():
+    return {
+        'users': User.objects.count(),
+        'animals': Animal.objects.count(),
+        'bids': Bid.objects.count(),
+        'reviews': Review.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def run_benchmarks(iterations=50, warmup=5, only=None, stdout=None):
+    """
+    Прогнать все сценарии. Возвращает dict, готовый для json.dump:
+    {'meta': {...}, 'scenarios': {name: {...}}}
+    """
+    setup_test_environment()  # ALLOWED_HOSTS=testserver, locmem email
+
+    # Логи RequestTimingMiddleware на каждый запрос только мешают
+    perf_logger = logging.getLogger('core.performance')
+    previous_level = perf_logger.level
+    perf_logger.setLevel(logging.ERROR)
+
+    results = {}
+    try:
+        for scenario in default_scenarios(pick_fixtures()):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = run_scenario(scenario, iterations, warmup)
+            if stdout:
+                r = results[scenario.name]
+                stdout.write(
+                    f"{scenario.name:<28} p50={r['p50_ms']:>8.1f}ms  p95={r['p95_ms']:>8.1f}ms  "
+                    f"p99={r['p99_ms']:>8.1f}ms  queries={r['queries_median']:>4}  "
+                    f"size={r['response_bytes']:>8}B  br={r.get('br_bytes', '-'):>7}B  "
+                    f"gzip={r.get('gzip_bytes', '-'):>7}B  status={r['status_codes']}"
+                    f"{'  FAILED' if r['failed'] else ''}"
+                )
+    finally:
+        perf_logger.setLevel(previous_level)
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'iterations': iterations,
+            'warmup': warmup,
+            'dataset': dataset_stats(),
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(baseline, current, threshold_pct=20.0):
+    """
+    Сравнить с сохранённым baseline.
+    Возвращает (строки отчёта, список регрессий).
+    Регрессия: p50/p95 хуже более чем на threshold_pct %, больше SQL запросов
+    или ответы 4xx/5xx.
+    """
+    lines, regressions = [], []
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if now.get('failed'):
+            lines.append(f"{name:<28} (failed: status {now['status_codes']})")
+            regressions.append(f"{name}: status {now['status_codes']}")
+            continue
+        if not before:
+            lines.append(f'{name:<28} (new)')
+            continue
+        if before.get('failed') or any(status >= 400 for status in before.get('status_codes', ())):
+            lines.append(f"{name:<28} (baseline failed: status {before['status_codes']}, not compared)")
+            continue
+
+        parts = []
+        for metric in ('p50_ms', 'p95_ms'):
+            old, new = before[metric], now[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            parts.append(f'{metric}: {old:.1f} -> {new:.1f} ({change:+.0f}%)')
+            if change > threshold_pct:
+                regressions.append(f'{name}: {metric} {change:+.0f}%')
+
+        old_q, new_q = before['queries_median'], now['queries_median']
+        parts.append(f'queries: {old_q} -> {new_q}')
+        if new_q > old_q:
+            regressions.append(f'{name}: queries {old_q} -> {new_q}')
+
+        old_size, new_size = before.get('response_bytes', 0), now['response_bytes']
+        parts.append(f'size: {old_size} -> {new_size}B')
+        if 'br_bytes' in now:
+            parts.append(f"br: {before.get('br_bytes', '-')} -> {now['br_bytes']}B (-{now['compression_pct']}%)")
+
+        lines.append(f'{name:<28} ' + '  '.join(parts))
+    return lines, regressions
+
+
+# ==================== WSGI / ASGI THROUGHPUT ====================
+
+def throughput_urls(fixtures):
+    """Публичные страницы, у которых есть async версия (core/views_async.py)"""
+    urls = {
+        'home': reverse('home'),
+        'home_filter_category_city': reverse('home') + '?category=pigeon&city=dushanbe',
+        'home_page_50': reverse('home') + '?page=50',
+    }
+    animal = fixtures.get('animal')
+    if animal:
+        urls['animal_detail'] = reverse('animal_detail', args=[animal.pk])
+    return urls
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module('core.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def public_views(use_async):
+    """USE_ASYNC_VIEWS на время прогона (urls.py читает настройку при импорте)"""
+    try:
+        with override_settings(USE_ASYNC_VIEWS=use_async):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def _split_url(url):
+    path, _, query = url.partition('?')
+    return path, query
+
+
+def _wsgi_get(handler, url):
+    """Запрос напрямую в WSGIHandler - как от gunicorn, без сети"""
+    path, query = _split_url(url)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    result = handler(environ, lambda code, headers, exc_info=None: status.append(int(code.split()[0])))
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0], len(body)
+
+
+async def _asgi_get(handler, url):
+    """Запрос напрямую в ASGIHandler - как от uvicorn, без сети"""
+    path, query = _split_url(url)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    finished = asyncio.Event()
+    body_sent = False
+    status, size = 0, 0
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()  # клиент "отключается" только после ответа
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status, size
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            size += len(message.get('body', b''))
+            if not message.get('more_body'):
+                finished.set()
+
+    await handler(scope, receive, send)
+    finished.set()
+    return status, size
+
+
+def _throughput_summary(timings_ms, statuses, sizes, wall_s):
+    return {
+        'requests': len(timings_ms),
+        'rps': round(len(timings_ms) / wall_s, 1) if wall_s else 0.0,
+        'p50_ms': round(percentile(timings_ms, 50), 2),
+        'p95_ms': round(percentile(timings_ms, 95), 2),
+        'errors': sum(1 for status in statuses if status >= 500),
+        'response_bytes': int(statistics.median(sizes)) if sizes else 0,
+        'status_codes': sorted(set(statuses)),
+    }
+
+
+def wsgi_throughput(url, requests=200, concurrency=8):
+    """WSGI: concurrency потоков (как gunicorn --threads), каждый запрос занимает поток целиком"""
+    handler = WSGIHandler()
+
+    def fetch(_):
+        start = time.perf_counter()
+        status, size = _wsgi_get(handler, url)
+        return (time.perf_counter() - start) * 1000, status, size
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, range(requests)))
+    wall = time.perf_counter() - start
+    timings, statuses, sizes = zip(*results) if results else ((), (), ())
+    return _throughput_summary(list(timings), statuses, sizes, wall)
+
+
+def asgi_throughput(url, requests=200, concurrency=8):
+    """ASGI: один event loop, не больше concurrency запросов одновременно"""
+    handler = ASGIHandler()
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                start = time.perf_counter()
+                status, size = await _asgi_get(handler, url)
+                return (time.perf_counter() - start) * 1000, status, size
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(fetch() for _ in range(requests)))
+        return results, time.perf_counter() - start
+
+    results, wall = asyncio.run(run())
+    timings, statuses, sizes = zip(*results) if results else ((), (), ())
+    return _throughput_summary(list(timings), statuses, sizes, wall)
+
+
+def run_throughput(requests=200, concurrency=8, only=None, stdout=None):
+    """
+    Сравнить WSGI (sync views) и ASGI (async views) на одних и тех же URL.
+    Возвращает {'meta': {...}, 'scenarios': {name: {'wsgi': {...}, 'asgi': {...}}}}
+    """
+    setup_test_environment()  # ALLOWED_HOSTS=testserver
+
+    perf_logger = logging.getLogger('core.performance')
+    previous_level = perf_logger.level
+    perf_logger.setLevel(logging.ERROR)
+
+    results = {}
+    try:
+        urls = throughput_urls(pick_fixtures())
+        connection.close()  # дальше соединения открывают потоки воркеров
+        for name, url in urls.items():
+            if only and name not in only:
+                continue
+            with public_views(False):
+                wsgi = wsgi_throughput(url, requests, concurrency)
+            with public_views(True):
+                asgi = asgi_throughput(url, requests, concurrency)
+            results[name] = {'wsgi': wsgi, 'asgi': asgi}
+            if stdout:
+                change = (asgi['rps'] - wsgi['rps']) / wsgi['rps'] * 100 if wsgi['rps'] else 0.0
+                stdout.write(
+                    f"{name:<28} wsgi={wsgi['rps']:>7.1f} rps (p95 {wsgi['p95_ms']:.0f}ms)  "
+                    f"asgi={asgi['rps']:>7.1f} rps (p95 {asgi['p95_ms']:.0f}ms)  {change:+.0f}%  "
+                    f"errors={wsgi['errors']}/{asgi['errors']}"
+                )
+    finally:
+        perf_logger.setLevel(previous_level)
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'requests': requests,
+            'concurrency': concurrency,
+        },
+        'scenarios': results,
+    }
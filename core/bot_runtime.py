@@ -0,0 +1,202 @@
+"""
+Runtime helpers for the Telegram bot process (runbot).
+
+- InstrumentedTeleBot: время и ошибки каждого handler в core.metrics
+- timed_request_sender: время вызовов Bot API (send_message, send_photo...)
+- ChatSerialExecutor: пул потоков для handlers с порядком внутри чата
+"""
+import functools
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+import telebot
+from telebot import apihelper
+
+from django.db import close_old_connections
+
+from .metrics import (
+    bot_handler_duration, bot_handler_errors, bot_task_queue_depth, bot_task_wait,
+    telegram_send_duration, telegram_send_failures,
+)
+
+logger = logging.getLogger(__name__)
+
+# Long polling висит до timeout секунд - в гистограмме латентности только шум
+UNTIMED_API_METHODS = {'getUpdates'}
+
+
+def timed_request_sender(method, url, **kwargs):
+    """apihelper.CUSTOM_REQUEST_SENDER: запрос к Bot API с замером времени"""
+    api_method = url.rsplit('/', 1)[-1]
+    start = time.perf_counter()
+    try:
+        response = apihelper._get_req_session().request(method, url, **kwargs)
+    except requests.exceptions.Timeout:
+        telegram_send_failures.inc(method=api_method, reason='timeout')
+        raise
+    except requests.exceptions.RequestException:
+        telegram_send_failures.inc(method=api_method, reason='network')
+        raise
+
+    if api_method not in UNTIMED_API_METHODS:
+        telegram_send_duration.observe(time.perf_counter() - start, method=api_method)
+    if response.status_code != 200:
+        telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
+    return response
+
+
+def install_request_metrics():
+    apihelper.CUSTOM_REQUEST_SENDER = timed_request_sender
+
+
+def timed_handler(function):
+    """Обёртка handler: латентность и исключения по имени функции"""
+    name = function.__name__
+
+    @functools.wraps(function)  # inspect.signature() в telebot видит исходную сигнатуру
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            bot_handler_errors.inc(handler=name)
+            raise
+        finally:
+            bot_handler_duration.observe(time.perf_counter() - start, handler=name)
+
+    return wrapper
+
+
+# ==================== WORKER POOL ====================
+
+class ChatSerialExecutor:
+    """
+    Пул из N потоков с очередью, упорядоченной по чатам.
+
+    - задачи одного чата выполняются строго по очереди (порядок апдейтов
+      пользователя сохраняется), разные чаты - параллельно
+    - медленный /view с загрузкой фото занимает один поток, а не весь бот
+    - очередь ограничена queue_size: при переполнении submit() блокирует
+      поток polling, и новые апдейты остаются на стороне Telegram
+    - перед и после каждой задачи close_old_connections(), как в запросе Django
+    """
+
+    def __init__(self, workers=4, queue_size=100, on_error=None):
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._chats = {}       # key -> deque задач этого чата
+        self._ready = deque()  # чаты с задачами, которые сейчас никто не выполняет
+        self._pending = 0
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'bot-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        bot_task_queue_depth.set_function(lambda: self._pending)
+
+    def submit(self, key, task, *args, **kwargs):
+        with self._cond:
+            while self._pending >= self.queue_size and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError('Executor is shut down')
+
+            item = (task, args, kwargs, time.perf_counter())
+            queue = self._chats.get(key)
+            if queue is None:
+                # Чат свободен - сразу в список готовых
+                self._chats[key] = deque([item])
+                self._ready.append(key)
+            else:
+                # Чат уже в очереди или выполняется - задача подождёт предыдущие
+                queue.append(item)
+            self._pending += 1
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                task, args, kwargs, queued_at = self._chats[key].popleft()
+
+            bot_task_wait.observe(time.perf_counter() - queued_at)
+            close_old_connections()
+            try:
+                task(*args, **kwargs)
+            except Exception as e:
+                if not (self.on_error and self.on_error(e)):
+                    logger.exception(f"Bot task failed: {e}")
+            finally:
+                close_old_connections()
+
+            with self._cond:
+                self._pending -= 1
+                if self._chats[key]:
+                    self._ready.append(key)  # следующая задача этого чата
+                else:
+                    del self._chats[key]
+                self._cond.notify_all()
+
+    def shutdown(self, wait=True):
+        """Дождаться выполнения очереди и остановить потоки"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def chat_key(update):
+    """Ключ упорядочивания: id чата для сообщений и callback, иначе id пользователя"""
+    message = getattr(update, 'message', None)  # CallbackQuery
+    chat = getattr(update, 'chat', None) or getattr(message, 'chat', None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, 'from_user', None)  # InlineQuery и т.п.
+    if user is not None:
+        return user.id
+    return None
+
+
+# ==================== BOT ====================
+
+class InstrumentedTeleBot(telebot.TeleBot):
+    """
+    TeleBot, в котором каждый зарегистрированный handler замеряется.
+    С executor handlers выполняются в ChatSerialExecutor (threaded=False,
+    чтобы собственный пул telebot не использовался).
+    """
+
+    def __init__(self, *args, executor=None, **kwargs):
+        self.executor = executor
+        if executor is not None:
+            kwargs['threaded'] = False
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _build_handler_dict(handler, pass_bot=False, **filters):
+        return telebot.TeleBot._build_handler_dict(timed_handler(handler), pass_bot=pass_bot, **filters)
+
+    def _exec_task(self, task, *args, **kwargs):
+        if self.executor is None:
+            return super()._exec_task(task, *args, **kwargs)
+
+        key = chat_key(args[0]) if args else None
+        # Без чата (списки апдейтов для listeners) - отдельный ключ, без упорядочивания
+        self.executor.submit(key if key is not None else object(), task, *args, **kwargs)
+
+    def stop_bot(self):
+        super().stop_bot()
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -0,0 +1,197 @@
+"""
+Broadcast campaigns for the Telegram bot (/admin -> Рассылка сообщений).
+
+- сегмент (все / продавцы категории / продавцы города / участники
+  аукционов) разворачивается одним потоковым запросом в строки
+  BroadcastDelivery - список получателей фиксируется при запуске
+- отправка пачками через core.telegram_async (лимиты Telegram, 429)
+- прогресс в БД: после остановки run_broadcasts продолжает с
+  оставшихся pending, уже доставленным повторно не пишем
+- чаты, заблокировавшие бота, отвязываются от профиля (telegram_chat_id)
+"""
+import asyncio
+import logging
+from itertools import islice
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .chat_profiles import invalidate_chat
+from .models import Animal, Bid, BroadcastCampaign, BroadcastDelivery, UserProfile
+
+logger = logging.getLogger(__name__)
+
+RESOLVE_CHUNK_SIZE = 2000
+SEND_BATCH_SIZE = 200
+
+
+def segment_profiles(segment, value=''):
+    """Профили с привязанным Telegram, попадающие в сегмент"""
+    profiles = UserProfile.objects.exclude(telegram_chat_id__isnull=True).exclude(telegram_chat_id='')
+    if segment == 'sellers_category':
+        sellers = Animal.objects.filter(category=value, is_approved=True).values('owner_id')
+        profiles = profiles.filter(user_id__in=sellers)
+    elif segment == 'sellers_city':
+        sellers = Animal.objects.filter(city=value, is_approved=True).values('owner_id')
+        profiles = profiles.filter(user_id__in=sellers)
+    elif segment == 'bidders':
+        profiles = profiles.filter(user_id__in=Bid.objects.values('bidder_id'))
+    elif segment != 'all':
+        raise ValueError(f'Unknown broadcast segment: {segment}')
+    return profiles
+
+
+def resolve_recipients(campaign, chunk_size=RESOLVE_CHUNK_SIZE):
+    """
+    Зафиксировать получателей: один SELECT читается потоком (iterator),
+    строки вставляются пачками. Повторный вызов не создаёт дублей
+    """
+    rows = (
+        segment_profiles(campaign.segment, campaign.segment_value)
+        .order_by('pk')
+        .values_list('pk', 'telegram_chat_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        BroadcastDelivery.objects.bulk_create(
+            [BroadcastDelivery(campaign=campaign, profile_id=pk, chat_id=chat_id.strip()) for pk, chat_id in chunk],
+            ignore_conflicts=True,  # один chat_id у двух профилей
+        )
+    campaign.total = campaign.deliveries.count()
+    campaign.save(update_fields=['total'])
+    return campaign.total
+
+
+def start_campaign(campaign):
+    """Черновик -> очередь (получатели фиксируются сейчас)"""
+    resolve_recipients(campaign)
+    campaign.status = 'queued'
+    campaign.save(update_fields=['status'])
+    return campaign.total
+
+
+def cancel_campaign(campaign):
+    BroadcastCampaign.objects.filter(pk=campaign.pk, status__in=['draft', 'queued', 'running']).update(
+        status='cancelled', finished_at=timezone.now()
+    )
+
+
+def estimated_seconds(count):
+    """Сколько займёт отправка count сообщений при общем лимите бота"""
+    return count / settings.TELEGRAM_GLOBAL_RATE
+
+
+def campaign_progress(campaign):
+    """{'pending': n, 'sent': n, 'failed': n, 'blocked': n}"""
+    counts = dict.fromkeys(dict(BroadcastDelivery.STATUS_CHOICES), 0)
+    for row in campaign.deliveries.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    return counts
+
+
+# ==================== ОТПРАВКА ====================
+
+def _next_batch(campaign, after_id, size):
+    return list(
+        BroadcastDelivery.objects
+        .filter(campaign=campaign, status='pending', id__gt=after_id)
+        .order_by('id')[:size]
+    )
+
+
+def _record_batch(campaign, batch, results):
+    """Статусы доставок, отвязка заблокированных чатов и счётчики рассылки - одной транзакцией"""
+    now = timezone.now()
+    blocked_profiles = []
+    for delivery, result in zip(batch, results):
+        if result.ok:
+            delivery.status, delivery.sent_at, delivery.error = 'sent', now, ''
+        elif result.blocked:
+            delivery.status, delivery.error = 'blocked', result.error[:255]
+            if delivery.profile_id:
+                blocked_profiles.append(Q(pk=delivery.profile_id, telegram_chat_id=delivery.chat_id))
+        else:
+            delivery.status, delivery.error = 'failed', result.error[:255]
+
+    sent = sum(1 for d in batch if d.status == 'sent')
+    blocked = sum(1 for d in batch if d.status == 'blocked')
+    with transaction.atomic():
+        BroadcastDelivery.objects.bulk_update(batch, ['status', 'error', 'sent_at'])
+        if blocked_profiles:
+            condition = Q()
+            for q in blocked_profiles:
+                condition |= q
+            # Чат мог быть перепривязан за время рассылки - отвязываем только тот же chat_id
+            UserProfile.objects.filter(condition).update(telegram_chat_id=None)
+            # .update() не шлёт сигналов - сбрасываем кэш профилей бота сами
+            for delivery in batch:
+                if delivery.status == 'blocked' and delivery.profile_id:
+                    invalidate_chat(delivery.chat_id, delivery.profile_id)
+        BroadcastCampaign.objects.filter(pk=campaign.pk).update(
+            sent=F('sent') + sent,
+            blocked=F('blocked') + blocked,
+            failed=F('failed') + (len(batch) - sent - blocked),
+        )
+
+
+def _is_cancelled(campaign):
+    return BroadcastCampaign.objects.filter(pk=campaign.pk, status='cancelled').exists()
+
+
+async def _arun(campaign, batch_size, progress):
+    from .telegram_async import AsyncTelegramSender
+
+    last_id = 0
+    async with AsyncTelegramSender() as sender:
+        while True:
+            batch = await sync_to_async(_next_batch)(campaign, last_id, batch_size)
+            if not batch:
+                return True
+            results = await asyncio.gather(*(sender.send(d.chat_id, campaign.text) for d in batch))
+            await sync_to_async(_record_batch)(campaign, batch, results)
+            last_id = batch[-1].id
+            if progress:
+                await sync_to_async(progress)(campaign)
+            if await sync_to_async(_is_cancelled)(campaign):
+                return False
+
+
+def run_campaign(campaign, batch_size=SEND_BATCH_SIZE, progress=None):
+    """
+    Разослать оставшимся получателям. Возвращает True, если рассылка
+    завершена, False - если её отменили во время отправки
+    """
+    if campaign.status in ('draft', 'done', 'cancelled'):
+        return campaign.status == 'done'
+
+    update = {'status': 'running'}
+    if campaign.started_at is None:
+        update['started_at'] = timezone.now()
+    BroadcastCampaign.objects.filter(pk=campaign.pk).update(**update)
+
+    finished = async_to_sync(_arun)(campaign, batch_size, progress)
+    if finished:
+        BroadcastCampaign.objects.filter(pk=campaign.pk, status='running').update(
+            status='done', finished_at=timezone.now()
+        )
+    campaign.refresh_from_db()
+    logger.info(
+        f"Broadcast #{campaign.pk}: sent={campaign.sent} failed={campaign.failed} blocked={campaign.blocked}"
+    )
+    return finished
+
+
+def retry_failed(campaign):
+    """Вернуть ошибки (сеть, 5xx, исчерпан 429) в очередь"""
+    with transaction.atomic():
+        count = campaign.deliveries.filter(status='failed').update(status='pending', error='')
+        BroadcastCampaign.objects.filter(pk=campaign.pk).update(
+            failed=F('failed') - count, status='queued', finished_at=None
+        )
+    return count
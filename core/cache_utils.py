@@ -0,0 +1,65 @@
+"""
+Cache helpers for ZooBozor.
+
+Кэш данных по объявлениям версионируется: ключи содержат номер версии,
+и любое изменение объявлений (сохранение, удаление, массовая модерация)
+просто увеличивает версию - старые ключи истекают сами.
+
+Версия живёт в том же кэше, поэтому сброс виден другим процессам только с
+общим backend (settings.CACHE_BACKEND: database / redis, не locmem).
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+LISTINGS_VERSION_KEY = 'listings:version'
+LISTINGS_CACHE_TIMEOUT = 600
+
+
+def listings_version():
+    return cache.get_or_set(LISTINGS_VERSION_KEY, 1, None)
+
+
+def bump_listings_version():
+    """Сбросить весь кэш объявлений (вызывать после commit)"""
+    try:
+        cache.incr(LISTINGS_VERSION_KEY)
+    except ValueError:  # ключа ещё нет
+        cache.set(LISTINGS_VERSION_KEY, 2, None)
+
+
+def listings_cache_key(name):
+    return f'listings:{listings_version()}:{name}'
+
+
+async def alistings_cache_key(name):
+    version = await cache.aget_or_set(LISTINGS_VERSION_KEY, 1, None)
+    return f'listings:{version}:{name}'
+
+
+def cached_category_counts():
+    """Количество одобренных объявлений по категориям (блок статистики на главной)"""
+    from .models import Animal
+
+    key = listings_cache_key('category_counts')
+    counts = cache.get(key)
+    if counts is None:
+        counts = list(
+            Animal.objects.filter(is_approved=True).values('category').annotate(count=Count('id'))
+        )
+        cache.set(key, counts, LISTINGS_CACHE_TIMEOUT)
+    return counts
+
+
+async def acached_category_counts():
+    """Async версия cached_category_counts (core/views_async.py)"""
+    from .models import Animal
+
+    key = await alistings_cache_key('category_counts')
+    counts = await cache.aget(key)
+    if counts is None:
+        counts = [
+            row async for row in
+            Animal.objects.filter(is_approved=True).values('category').annotate(count=Count('id'))
+        ]
+        await cache.aset(key, counts, LISTINGS_CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,233 @@
+"""
+Declarative per-category form schema.
+
+Какие поля показывать и что обязательно для каждой категории
+(Animal.CATEGORY_CHOICES) описано одной таблицей, а не if-цепочками в
+views / clean() / шаблонах. Реестр строится один раз при импорте:
+
+- LISTING_FORM - AnimalForm (add_animal), partial-шаблоны
+  core/partials/*_fields.html
+- DYNAMIC_FORM - DynamicAnimalForm (поля pigeon_breed, livestock_breed...)
+
+Из реестра:
+- Meta.fields форм (common + поля всех групп)
+- валидация: registry.validate(form) - один lookup категории вместо if-ов
+- JSON схема для клиента (views.category_schema, кэшируется по ETag):
+  страница переключает поля без запроса на сервер
+"""
+import hashlib
+import json
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import EMPTY_VALUES, MaxValueValidator, MinValueValidator
+from django.db import models
+
+from .models import Animal
+
+
+class FieldSpec(NamedTuple):
+    name: str
+    required: bool = False
+    message: str = ''  # ошибка, если обязательное поле пустое
+    validators: tuple = ()
+
+
+class Group(NamedTuple):
+    template: str
+    fields: tuple
+
+
+class CategorySchema(NamedTuple):
+    category: str
+    label: str
+    group: str
+    template: str
+    fields: tuple  # FieldSpec
+
+    @property
+    def required(self):
+        return tuple(spec for spec in self.fields if spec.required)
+
+
+def _spec(field):
+    return field if isinstance(field, FieldSpec) else FieldSpec(field)
+
+
+def _widget(model_field):
+    """Тип виджета для клиента по полю модели"""
+    if model_field.choices:
+        return 'select'
+    if isinstance(model_field, models.BooleanField):
+        return 'checkbox'
+    if isinstance(model_field, (models.DecimalField, models.IntegerField, models.FloatField)):
+        return 'number'
+    return 'text'
+
+
+def _validate(spec, value):
+    """Ошибки одного поля по его FieldSpec (пустые необязательные не проверяются)"""
+    if value in EMPTY_VALUES or value is False:
+        return [spec.message or 'Обязательное поле'] if spec.required else []
+    errors = []
+    for validator in spec.validators:
+        try:
+            validator(value)
+        except ValidationError as e:
+            errors.extend(e.messages)
+    return errors
+
+
+class CategoryRegistry:
+    """
+    category -> CategorySchema. groups: {группа: Group}, category_groups:
+    {категория: группа}, остальные категории - default_group
+    """
+
+    def __init__(self, groups, category_groups, default_group='basic'):
+        self.groups = {
+            name: Group(group.template, tuple(_spec(field) for field in group.fields))
+            for name, group in groups.items()
+        }
+        self.default_group = default_group
+        self.schemas = {}
+        for category, label in Animal.CATEGORY_CHOICES:
+            name = category_groups.get(category, default_group)
+            group = self.groups[name]
+            self.schemas[category] = CategorySchema(category, label, name, group.template, group.fields)
+
+        self.field_names = tuple(dict.fromkeys(
+            spec.name for group in self.groups.values() for spec in group.fields
+        ))
+        self.json = json.dumps(self.as_dict(), ensure_ascii=False, sort_keys=True)
+        self.etag = hashlib.sha1(self.json.encode()).hexdigest()[:16]
+
+    def __getitem__(self, category):
+        return self.schemas[category]
+
+    def get(self, category):
+        """Схема категории; неизвестная / пустая - группа по умолчанию"""
+        schema = self.schemas.get(category)
+        if schema is None:
+            group = self.groups[self.default_group]
+            schema = CategorySchema(category or '', '', self.default_group, group.template, group.fields)
+        return schema
+
+    @property
+    def templates(self):
+        """[(группа, шаблон)] - все partial-шаблоны для страницы формы"""
+        return [(name, group.template) for name, group in self.groups.items()]
+
+    @property
+    def category_groups(self):
+        return {category: schema.group for category, schema in self.schemas.items()}
+
+    def validate(self, form):
+        """Проверить поля категории формы; ошибки - в form.add_error"""
+        schema = self.get(form.cleaned_data.get('category'))
+        for spec in schema.fields:
+            if spec.name in form.errors:  # уже не прошло проверку поля формы
+                continue
+            for error in _validate(spec, form.cleaned_data.get(spec.name)):
+                form.add_error(spec.name, error)
+
+    def as_dict(self):
+        """Схема для клиента: поля групп (виджет, подпись, варианты) и группа каждой категории"""
+        groups = {}
+        for name, group in self.groups.items():
+            fields = []
+            for spec in group.fields:
+                model_field = Animal._meta.get_field(spec.name)
+                field = {
+                    'name': spec.name,
+                    'label': str(model_field.verbose_name),
+                    'widget': _widget(model_field),
+                    'required': spec.required,
+                    'help_text': str(model_field.help_text),
+                }
+                if model_field.choices:
+                    field['choices'] = [[value, str(label)] for value, label in model_field.choices]
+                for validator in spec.validators:
+                    if isinstance(validator, MinValueValidator):
+                        field['min'] = float(validator.limit_value)
+                    elif isinstance(validator, MaxValueValidator):
+                        field['max'] = float(validator.limit_value)
+                fields.append(field)
+            groups[name] = {'fields': fields}
+        categories = {
+            category: {'label': str(schema.label), 'group': schema.group}
+            for category, schema in self.schemas.items()
+        }
+        return {'groups': groups, 'categories': categories, 'default_group': self.default_group}
+
+
+LIVESTOCK = ('cow', 'sheep', 'goat', 'horse')
+PETS = ('cat', 'dog')
+
+WEIGHT_VALIDATORS = (
+    MinValueValidator(0.1, 'Вес должен быть больше 0'),
+    MaxValueValidator(5000, 'Проверьте вес: больше 5000 кг'),
+)
+
+# ==================== AnimalForm (add_animal) ====================
+
+LISTING_FORM = CategoryRegistry(
+    groups={
+        'pigeon': Group('core/partials/pigeon_fields.html', (
+            FieldSpec('breed', True, 'Укажите породу голубя'),
+            'gender', 'color_variety', 'age', 'game_style', 'flight_duration',
+        )),
+        'livestock': Group('core/partials/livestock_fields.html', (
+            'breed', 'age', 'gender_livestock',
+            FieldSpec('weight', validators=WEIGHT_VALIDATORS),
+            'color_variety', 'health_status',
+        )),
+        'pet': Group('core/partials/pet_fields.html', (
+            'breed', 'age', 'gender', 'color_variety', 'health_status', 'has_passport',
+        )),
+        'transport': Group('core/partials/transport_fields.html', (
+            FieldSpec('transport_type', True, 'Выберите тип транспорта'),
+            FieldSpec('route_from', True, 'Укажите, откуда'),
+            FieldSpec('route_to', True, 'Укажите, куда'),
+            'departure_time', 'available_days', 'cargo_capacity',
+        )),
+        'basic': Group('core/partials/basic_fields.html', ('age', 'breed', 'gender')),
+    },
+    category_groups={
+        'pigeon': 'pigeon',
+        'transport': 'transport',
+        **dict.fromkeys(LIVESTOCK, 'livestock'),
+        **dict.fromkeys(PETS, 'pet'),
+    },
+)
+
+# ==================== DynamicAnimalForm ====================
+
+DYNAMIC_FORM = CategoryRegistry(
+    groups={
+        'pigeon': Group('core/partials/form_fields.html', (
+            FieldSpec('pigeon_breed', True, 'Укажите породу голубя'),
+            FieldSpec('gender_pigeon', True, 'Укажите пол голубя'),
+            'flight_duration', 'game_style',
+        )),
+        'livestock': Group('core/partials/form_fields.html', (
+            FieldSpec('livestock_breed', True, 'Укажите породу'),
+            'gender_livestock',
+            FieldSpec('weight', True, 'Укажите вес животного', WEIGHT_VALIDATORS),
+            FieldSpec('age', True, 'Укажите возраст'),
+        )),
+        'pet': Group('core/partials/form_fields.html', (
+            FieldSpec('pet_breed', True, 'Укажите породу питомца'),
+            'gender', 'age', 'has_passport',
+        )),
+        'bird': Group('core/partials/form_fields.html', ('pet_breed', 'gender', 'age')),
+        'basic': Group('core/partials/form_fields.html', ('gender', 'age')),
+    },
+    category_groups={
+        'pigeon': 'pigeon',
+        'parrot': 'bird',
+        'bird_other': 'bird',
+        **dict.fromkeys(LIVESTOCK, 'livestock'),
+        **dict.fromkeys(PETS, 'pet'),
+    },
+)
@@ -0,0 +1,172 @@
+"""
+chat_id -> UserProfile cache for the Telegram bot process.
+
+Каждое сообщение и нажатие кнопки в runbot начинается с поиска профиля
+по telegram_chat_id. Здесь результат запоминается в памяти процесса
+(LRU, BOT_PROFILE_CACHE_SIZE чатов, TTL BOT_PROFILE_CACHE_TTL секунд):
+хранится только снимок (id профиля, пользователь, is_staff, is_superuser,
+username, email, date_joined), из него на каждый вызов собираются новые
+экземпляры UserProfile/User через from_db - потоки бота не делят
+объекты, а остальные поля загрузятся из БД при обращении (deferred).
+
+Сброс:
+- post_save/post_delete UserProfile (signals.py) - /connect, user_settings,
+  сохранение пользователя (в т.ч. снятие is_staff в админке); запись
+  сбрасывается и по новому, и по старому chat_id
+- другие процессы (бот при правке на сайте и наоборот) узнают о сбросе
+  через общий кэш (settings.CACHE_BACKEND): после commit чату и профилю
+  выдаётся новая метка, запись хранит метки на момент загрузки и при
+  расхождении загружается заново - один get_many на обращение вместо JOIN
+- .update() без сигналов (отвязка заблокированных чатов рассылкой) -
+  invalidate_chat() вручную
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import bot_profile_cache_lookups
+from .models import UserProfile
+
+# Порядок как у полей модели User - этого требует Model.from_db для неполного набора полей
+USER_FIELDS = ('id', 'is_superuser', 'username', 'email', 'is_staff', 'date_joined')
+PROFILE_FIELDS = ('id', 'user_id', 'telegram_chat_id')
+MISSING = object()
+
+
+class ChatProfile(NamedTuple):
+    profile_id: int
+    user: tuple  # значения USER_FIELDS
+
+
+class CachedChat(NamedTuple):
+    profile: ChatProfile  # None - чат не привязан
+    stamp: tuple  # метки общего кэша на момент загрузки (shared_stamp)
+
+
+class ChatProfileCache:
+    """LRU с TTL: chat_id -> CachedChat"""
+
+    def __init__(self, size=None, ttl=None):
+        self.size = size or settings.BOT_PROFILE_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.BOT_PROFILE_CACHE_TTL
+        self.entries = OrderedDict()  # chat_id -> (expires_at, CachedChat)
+        self.lock = threading.Lock()
+
+    def get(self, chat_id):
+        with self.lock:
+            item = self.entries.get(chat_id)
+            if item is None:
+                return MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self.entries[chat_id]
+                return MISSING
+            self.entries.move_to_end(chat_id)
+            return value
+
+    def set(self, chat_id, value):
+        with self.lock:
+            self.entries[chat_id] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(chat_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, chat_id=None, profile_id=None):
+        """Сбросить запись чата и все записи профиля (старый chat_id после перепривязки)"""
+        with self.lock:
+            if chat_id is not None:
+                self.entries.pop(str(chat_id), None)
+            if profile_id is not None:
+                for key, (_, value) in list(self.entries.items()):
+                    if value.profile is not None and value.profile.profile_id == profile_id:
+                        del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+chat_profiles = ChatProfileCache()
+
+
+# ==================== СБРОС МЕЖДУ ПРОЦЕССАМИ ====================
+
+def _chat_key(chat_id):
+    return f'bot_profiles:chat:{chat_id}'
+
+
+def _profile_key(profile_id):
+    return f'bot_profiles:profile:{profile_id}'
+
+
+def shared_stamp(chat_id, profile_id=None):
+    """Метки чата и профиля в общем кэше (None - не сбрасывались за TTL)"""
+    keys = [_chat_key(chat_id)]
+    if profile_id is not None:
+        keys.append(_profile_key(profile_id))
+    values = cache.get_many(keys)
+    return tuple(values.get(key) for key in keys)
+
+
+def _publish(chat_id, profile_id):
+    # Метка нужна, пока живут записи, загруженные до сброса, - не дольше TTL
+    token = uuid.uuid4().hex
+    keys = {}
+    if chat_id is not None:
+        keys[_chat_key(chat_id)] = token
+    if profile_id is not None:
+        keys[_profile_key(profile_id)] = token
+    if keys:
+        cache.set_many(keys, chat_profiles.ttl + 1)
+
+
+def _load(chat_id):
+    row = (
+        UserProfile.objects.filter(telegram_chat_id=chat_id)
+        .values_list('pk', *[f'user__{field}' for field in USER_FIELDS])
+        .first()
+    )
+    return ChatProfile(row[0], tuple(row[1:])) if row else None
+
+
+def _build(chat_id, entry):
+    user = User.from_db('default', USER_FIELDS, entry.user)
+    profile = UserProfile.from_db('default', PROFILE_FIELDS, [entry.profile_id, user.pk, chat_id])
+    profile.user = user
+    return profile
+
+
+def profile_for_chat(chat_id):
+    """UserProfile привязанного к чату аккаунта (profile.user заполнен) или None"""
+    chat_id = str(chat_id)
+    cached = chat_profiles.get(chat_id)
+    if cached is not MISSING:
+        profile_id = cached.profile.profile_id if cached.profile is not None else None
+        if shared_stamp(chat_id, profile_id) != cached.stamp:
+            cached = MISSING  # сброшено в другом процессе
+    if cached is MISSING:
+        bot_profile_cache_lookups.inc(result='miss')
+        entry = _load(chat_id)
+        stamp = shared_stamp(chat_id, entry.profile_id if entry is not None else None)
+        cached = CachedChat(entry, stamp)
+        chat_profiles.set(chat_id, cached)
+    else:
+        bot_profile_cache_lookups.inc(result='hit')
+    return _build(chat_id, cached.profile) if cached.profile is not None else None
+
+
+def invalidate_chat(chat_id=None, profile_id=None):
+    """
+    Сбросить запись чата/профиля: в этом процессе сразу, в остальных -
+    после commit (до него другой процесс загрузил бы из БД старые данные)
+    """
+    chat_profiles.invalidate(chat_id, profile_id)
+    if chat_id is not None or profile_id is not None:
+        transaction.on_commit(lambda: _publish(chat_id, profile_id))
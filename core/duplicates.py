@@ -0,0 +1,195 @@
+"""
+Duplicate listing detection for ZooBozor.
+
+Продавцы перевыкладывают одно и то же объявление. Для каждого объявления
+хранятся два отпечатка:
+- photo_hash: 64-битный dHash главного фото (core.image_utils.photo_dhash),
+  похожесть - расстояние Хэмминга
+- text_minhash: MinHash заголовка и описания по символьным 4-граммам,
+  похожесть - оценка коэффициента Жаккара (SimHash на коротких текстах
+  объявлений слишком шумный: одно изменённое слово - 10+ бит разницы)
+
+Похожие объявления ищутся не попарным сравнением, а через LSH: отпечатки
+режутся на полосы, полосы лежат в индексированной таблице AnimalFingerprintBand.
+Кандидаты - объявления, у которых совпала хотя бы одна полоса (один запрос
+по индексу), затем для них проверяется точная похожесть.
+- фото: 8 полос по 8 бит - при расстоянии до 7 бит полоса совпадает всегда
+- текст: 16 полос по 2 значения - при сходстве 0.5 кандидат находится с
+  вероятностью 99%
+"""
+import hashlib
+import random
+import re
+
+from django.conf import settings
+from django.db.models import Q
+
+from .image_utils import photo_dhash
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+PHOTO_BANDS = 8
+PHOTO_BAND_BITS = HASH_BITS // PHOTO_BANDS
+
+SHINGLE_SIZE = 4
+MIN_TEXT_LENGTH = 20  # у коротких текстов отпечаток неустойчив
+MINHASH_PERMUTATIONS = 32
+MINHASH_ROWS = 2  # значений в полосе LSH
+
+# Хэш-функции MinHash: (a * x + b) mod p. Seed фиксирован - подписи
+# в базе должны считаться одними и теми же функциями
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+def to_signed(value):
+    """Беззнаковый 64-битный хэш -> значение для BigIntegerField"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def hamming(a, b):
+    return bin((a ^ b) & HASH_MASK).count('1')
+
+
+def normalize_text(text):
+    text = (text or '').lower().replace('ё', 'е')
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def text_minhash(text):
+    """MinHash-подпись текста (список из MINHASH_PERMUTATIONS чисел) или None для короткого текста"""
+    text = normalize_text(text)
+    if len(text) < MIN_TEXT_LENGTH:
+        return None
+
+    shingles = {_hash64(text[i:i + SHINGLE_SIZE]) for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return [
+        min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) & 0xFFFFFFFF
+        for a, b in PERMUTATIONS
+    ]
+
+
+def text_similarity(a, b):
+    """Оценка коэффициента Жаккара по двум подписям"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def photo_bands(value):
+    value &= HASH_MASK
+    mask = (1 << PHOTO_BAND_BITS) - 1
+    return [(band, (value >> (band * PHOTO_BAND_BITS)) & mask) for band in range(PHOTO_BANDS)]
+
+
+def text_bands(signature):
+    return [
+        (band, int.from_bytes(hashlib.blake2b(
+            repr(signature[start:start + MINHASH_ROWS]).encode(), digest_size=4
+        ).digest(), 'big') >> 1)  # 31 бит - помещается в IntegerField
+        for band, start in enumerate(range(0, len(signature), MINHASH_ROWS))
+    ]
+
+
+def animal_bands(animal):
+    """[(kind, band, value)] для таблицы AnimalFingerprintBand"""
+    rows = []
+    if animal.photo_hash is not None:
+        rows += [('photo', band, value) for band, value in photo_bands(animal.photo_hash)]
+    if animal.text_minhash:
+        rows += [('text', band, value) for band, value in text_bands(animal.text_minhash)]
+    return rows
+
+
+def fingerprint(animal):
+    """
+    Посчитать отпечатки объявления (до водяного знака и до save()).
+    Фото хэшируется только новое (незакоммиченный файл).
+    """
+    old = (animal.photo_hash, animal.text_minhash)
+    if animal.main_photo and not animal.main_photo._committed:
+        try:
+            animal.photo_hash = to_signed(photo_dhash(animal.main_photo))
+        except Exception as e:
+            print(f"Ошибка хэша фото: {str(e)}")
+            animal.photo_hash = None
+    animal.text_minhash = text_minhash(f'{animal.title}\n{animal.description}')
+
+    animal._fingerprinted = True
+    animal._fingerprint_changed = getattr(animal, '_fingerprint_changed', False) or \
+        (animal.photo_hash, animal.text_minhash) != old
+
+
+def store_bands(animal):
+    """Переписать полосы LSH объявления (после save())"""
+    from .models import AnimalFingerprintBand
+
+    AnimalFingerprintBand.objects.filter(animal=animal).delete()
+    AnimalFingerprintBand.objects.bulk_create([
+        AnimalFingerprintBand(animal=animal, kind=kind, band=band, value=value)
+        for kind, band, value in animal_bands(animal)
+    ])
+
+
+def find_duplicates(animal, limit=5):
+    """
+    Похожие объявления того же продавца (владелец или телефон).
+    Возвращает [(объявление, 'photo' | 'text', похожесть 0..1)], сначала фото и самые похожие.
+    """
+    from .models import Animal, AnimalFingerprintBand
+
+    if not getattr(animal, '_fingerprinted', False):
+        fingerprint(animal)
+
+    buckets = Q()
+    for kind, band, value in animal_bands(animal):
+        buckets |= Q(kind=kind, band=band, value=value)
+    if not buckets:
+        return []
+
+    same_seller = Q(owner_id=animal.owner_id)
+    if animal.phone:
+        same_seller |= Q(phone=animal.phone)
+
+    candidates = (
+        Animal.objects
+        .filter(same_seller, pk__in=AnimalFingerprintBand.objects.filter(buckets).values('animal_id'))
+        .exclude(status='archived')
+        .only('id', 'title', 'owner_id', 'phone', 'status', 'is_approved', 'photo_hash', 'text_minhash')
+    )
+    if animal.pk:
+        candidates = candidates.exclude(pk=animal.pk)
+
+    matches = []
+    for candidate in candidates:
+        if animal.photo_hash is not None and candidate.photo_hash is not None:
+            distance = hamming(animal.photo_hash, candidate.photo_hash)
+            if distance <= settings.DUPLICATE_PHOTO_DISTANCE:
+                matches.append((candidate, 'photo', 1 - distance / HASH_BITS))
+                continue
+        if animal.text_minhash and candidate.text_minhash:
+            similarity = text_similarity(animal.text_minhash, candidate.text_minhash)
+            if similarity >= settings.DUPLICATE_TEXT_SIMILARITY:
+                matches.append((candidate, 'text', similarity))
+
+    matches.sort(key=lambda match: (match[1] != 'photo', -match[2]))
+    return matches[:limit]
+
+
+def blocking_duplicate(animal, matches):
+    """
+    Дубликат, из-за которого объявление не публикуется: то же фото
+    в активном объявлении того же владельца. Остальные совпадения - только пометка.
+    """
+    if not settings.DUPLICATE_LISTINGS_BLOCK:
+        return None
+    for candidate, kind, _similarity in matches:
+        if kind == 'photo' and candidate.owner_id == animal.owner_id and candidate.status == 'active':
+            return candidate
+    return None
@@ -0,0 +1,246 @@
+"""
+Streaming data exports for staff (объявления, ставки, предложения, транзакции).
+
+Строки читаются через values_list().iterator(chunk_size=...) - без создания
+моделей и без загрузки всей таблицы в память, и отдаются генератором
+кусками по ~64 КБ: StreamingHttpResponse в views.export_data и файл/stdout
+в команде export_data. Память постоянная при любом числе строк.
+
+Форматы: csv, jsonl и parquet (колоночный, нужен pyarrow - опционально).
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Animal, Bid, Offer, Transaction
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # parquet недоступен, csv/jsonl работают
+    pyarrow = None
+
+DEFAULT_CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ExportError(ValueError):
+    """Неизвестный набор данных/формат или недоступен pyarrow"""
+
+
+@dataclass
+class Dataset:
+    model: type
+    # (имя колонки, поле для values_list, тип для parquet)
+    columns: list
+    # поле категории животного для фильтра (None - фильтр не поддерживается)
+    category_field: str = None
+
+
+DATASETS = {
+    'animals': Dataset(Animal, [
+        ('id', 'id', 'int'),
+        ('category', 'category', 'str'),
+        ('title', 'title', 'str'),
+        ('listing_type', 'listing_type', 'str'),
+        ('price', 'price', 'decimal'),
+        ('start_price', 'start_price', 'decimal'),
+        ('current_price', 'current_price', 'decimal'),
+        ('auction_end_date', 'auction_end_date', 'datetime'),
+        ('city', 'city', 'str'),
+        ('gender', 'gender', 'str'),
+        ('breed', 'breed', 'str'),
+        ('phone', 'phone', 'str'),
+        ('status', 'status', 'str'),
+        ('is_approved', 'is_approved', 'bool'),
+        ('is_vip', 'is_vip', 'bool'),
+        ('views_count', 'views_count', 'int'),
+        ('owner_id', 'owner_id', 'int'),
+        ('owner', 'owner__username', 'str'),
+        ('created_at', 'created_at', 'datetime'),
+        ('updated_at', 'updated_at', 'datetime'),
+    ], category_field='category'),
+    'bids': Dataset(Bid, [
+        ('id', 'id', 'int'),
+        ('animal_id', 'animal_id', 'int'),
+        ('category', 'animal__category', 'str'),
+        ('bidder_id', 'bidder_id', 'int'),
+        ('bidder', 'bidder__username', 'str'),
+        ('amount', 'amount', 'decimal'),
+        ('created_at', 'created_at', 'datetime'),
+    ], category_field='animal__category'),
+    'offers': Dataset(Offer, [
+        ('id', 'id', 'int'),
+        ('animal_id', 'animal_id', 'int'),
+        ('category', 'animal__category', 'str'),
+        ('buyer_id', 'buyer_id', 'int'),
+        ('buyer', 'buyer__username', 'str'),
+        ('price', 'price', 'decimal'),
+        ('status', 'status', 'str'),
+        ('created_at', 'created_at', 'datetime'),
+    ], category_field='animal__category'),
+    'transactions': Dataset(Transaction, [
+        ('id', 'id', 'int'),
+        ('user_id', 'user_id', 'int'),
+        ('user', 'user__username', 'str'),
+        ('amount', 'amount', 'decimal'),
+        ('transaction_type', 'transaction_type', 'str'),
+        ('description', 'description', 'str'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+}
+
+
+def available_formats():
+    return [fmt for fmt in CONTENT_TYPES if fmt != 'parquet' or pyarrow is not None]
+
+
+def export_filename(dataset, fmt):
+    return f'{dataset}.{fmt}'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(dataset, date_from=None, date_to=None, category=None):
+    """
+    values_list для выгрузки. date_from/date_to - даты (включительно),
+    фильтр по created_at диапазоном, чтобы работал индекс.
+    """
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise ExportError(f'Unknown dataset: {dataset}')
+
+    queryset = spec.model.objects.all()
+    if date_from:
+        queryset = queryset.filter(created_at__gte=_day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=_day_start(date_to + timedelta(days=1)))
+    if category:
+        if not spec.category_field:
+            raise ExportError(f'Dataset {dataset} has no category filter')
+        queryset = queryset.filter(**{spec.category_field: category})
+
+    # Без сортировки модели (-created_at): по pk - проход по первичному ключу
+    return queryset.order_by('pk').values_list(*[field for _, field, _ in spec.columns])
+
+
+def stream_export(dataset, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    """Генератор байтов выгрузки (для StreamingHttpResponse и команды)"""
+    if fmt not in CONTENT_TYPES:
+        raise ExportError(f'Unknown format: {fmt}')
+    if fmt == 'parquet' and pyarrow is None:
+        raise ExportError('Parquet export requires pyarrow (pip install pyarrow)')
+
+    spec = DATASETS.get(dataset)
+    queryset = export_queryset(dataset, **filters)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    names = [name for name, _, _ in spec.columns]
+
+    if fmt == 'csv':
+        return _stream_csv(names, rows)
+    if fmt == 'jsonl':
+        return _stream_jsonl(names, rows)
+    return _stream_parquet(spec.columns, rows, chunk_size)
+
+
+def _stream_csv(names, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM: Excel открывает UTF-8 с кириллицей
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _json_default(value):
+    # Decimal -> строка (без потери точности), datetime -> ISO 8601
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _stream_jsonl(names, rows):
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(parts).encode('utf-8')
+            parts, size = [], 0
+    yield ''.join(parts).encode('utf-8')
+
+
+# ==================== PARQUET ====================
+
+class _DrainSink(io.RawIOBase):
+    """Файл для ParquetWriter: записанное забирается кусками через drain()"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_type(kind):
+    return {
+        'int': pyarrow.int64(),
+        'str': pyarrow.string(),
+        'decimal': pyarrow.decimal128(12, 2),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+    }[kind]
+
+
+def _stream_parquet(columns, rows, chunk_size):
+    """Каждые chunk_size строк - одна row group, отдаётся сразу после записи"""
+    schema = pyarrow.schema([(name, _arrow_type(kind)) for name, _, kind in columns])
+    sink = _DrainSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='snappy')
+
+    def write_group(batch):
+        writer.write_table(pyarrow.Table.from_pylist(
+            [dict(zip(schema.names, row)) for row in batch], schema=schema
+        ))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            write_group(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_group(batch)
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,526 @@
+"""
+Local fake Telegram Bot API server for load testing.
+
+Нагрузочный тест runbot и core.utils.send_telegram_message без
+обращения к api.telegram.org: FakeTelegramServer отвечает на методы
+Bot API, которыми пользуется проект (getUpdates, sendMessage, sendPhoto,
+editMessageText, answerCallbackQuery, answerInlineQuery, setWebhook,
+setMyCommands, getMe ...), записывает все вызовы и по настройке
+добавляет задержку, ответы 429 (retry_after) и 500.
+
+Бот направляется на сервер настройкой TELEGRAM_API_BASE, токен любой.
+
+BotLoadDriver - тысячи пользователей одновременно: у каждого свой чат,
+действия (/start, поиск, кнопка, /help, inline-запрос) идут по очереди -
+следующее после ответа бота на предыдущее. Время ответа - от выдачи
+апдейта в getUpdates до первого ответа бота в этот чат.
+
+    python manage.py bot_loadtest --run-bot --users 2000 --actions 5
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from email.policy import HTTP
+from itertools import count
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .benchmarks import percentile
+
+FAKE_TOKEN = '123456:fake-load-test-token'
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'ZooBozor', 'username': 'zoobozor_load_bot'}
+# Методы, к которым применяются задержка и ошибки (getUpdates всегда отвечает сразу)
+SEND_METHODS = {
+    'sendMessage', 'sendPhoto', 'editMessageText', 'answerCallbackQuery', 'answerInlineQuery',
+}
+MAX_LONG_POLL = 50  # сек, как у Telegram
+
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 429: 'Too Many Requests', 500: 'Internal Server Error'}
+
+
+class Call(NamedTuple):
+    method: str
+    params: dict
+    status: int
+    at: float
+
+
+class FakeTelegramServer:
+    """
+    Bot API на 127.0.0.1: asyncio-сервер в отдельном потоке - тысячи
+    keep-alive соединений и long polling без потока на соединение,
+    задержка ответа не занимает поток
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0,
+                 rate_429=0.0, retry_after=1, error_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self.calls = []
+        self.updates = []  # (update_id, update) - ещё не подтверждённые ботом
+        self.delivered_at = {}  # update_id -> когда бот получил апдейт
+        self.update_ids = count(1)
+        self.message_ids = count(1)
+        self.lock = threading.Lock()
+        self.on_call = None  # callable(method, params) после успешного ответа (в потоке сервера)
+        self.polled = threading.Event()  # бот хотя бы раз вызвал getUpdates
+
+        self.loop = None
+        self.server = None
+        self.writers = set()
+        self.closing = False
+        self.new_updates = None  # asyncio.Event, создаётся в цикле сервера
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.new_updates = asyncio.Event()
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._serve_connection, self.host, self.port, backlog=1024)
+            )
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+            self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name='fake-telegram', daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    async def _shutdown(self):
+        """Закрыть сервер и открытые соединения, long polling ответит пустым списком"""
+        self.closing = True
+        self.new_updates.set()
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        if tasks:
+            await asyncio.wait(tasks, timeout=1)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ---------- HTTP ----------
+
+    async def _serve_connection(self, reader, writer):
+        """HTTP/1.1 keep-alive: запросы одного соединения по очереди"""
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                _, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await _read_body(reader, headers)
+
+                path = urlsplit(target)
+                method = path.path.rstrip('/').rsplit('/', 1)[-1]
+                params = dict(parse_qsl(path.query))
+                params.update(_parse_body(headers.get('content-type', ''), body))
+
+                status, response = await self.handle(method, params)
+                self.record(method, params, status)  # до ответа - клиент видит вызов уже записанным
+                payload = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    # ---------- апдейты ----------
+
+    def next_update_id(self):
+        with self.lock:
+            return next(self.update_ids)
+
+    def push_update(self, kind, payload, update_id=None):
+        """Поставить апдейт в очередь getUpdates (из любого потока), вернуть update_id"""
+        if update_id is None:
+            update_id = self.next_update_id()
+        with self.lock:
+            self.updates.append((update_id, {'update_id': update_id, kind: payload}))
+        self.loop.call_soon_threadsafe(self.new_updates.set)
+        return update_id
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        deadline = time.monotonic() + min(float(params.get('timeout') or 0), MAX_LONG_POLL)
+        self.polled.set()
+        while True:
+            self.new_updates.clear()
+            with self.lock:
+                # offset подтверждает прочитанные
+                self.updates = [item for item in self.updates if item[0] >= offset]
+                batch = self.updates[:limit]
+                now = time.monotonic()
+                for update_id, _ in batch:
+                    self.delivered_at.setdefault(update_id, now)
+            remaining = deadline - now
+            if batch or remaining <= 0 or self.closing:
+                return [update for _, update in batch]
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    # ---------- ответы ----------
+
+    def _message(self, params, **content):
+        chat_id = params.get('chat_id', 0)
+        return {
+            'message_id': next(self.message_ids),
+            'from': BOT_USER,
+            'chat': {'id': _int(chat_id), 'type': 'channel' if str(chat_id).startswith(('-', '@')) else 'private'},
+            'date': int(time.time()),
+            **content,
+        }
+
+    def _result(self, method, params):
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'sendMessage':
+            return self._message(params, text=params.get('text', ''))
+        if method == 'sendPhoto':
+            message = self._message(params, caption=params.get('caption', ''))
+            photo = params.get('photo', '')
+            file_id = photo if photo and not photo.startswith('<file') else f"fake-file-{message['message_id']}"
+            message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1280, 'height': 960}]
+            return message
+        if method == 'editMessageText':
+            return self._message(params, text=params.get('text', ''), message_id=_int(params.get('message_id')))
+        return True  # answerCallbackQuery, answerInlineQuery, setWebhook, setMyCommands, ...
+
+    async def handle(self, method, params):
+        """(HTTP статус, JSON ответа) - с задержкой и ошибками по настройке"""
+        if method == 'getUpdates':
+            return 200, {'ok': True, 'result': await self._get_updates(params)}
+        if method in SEND_METHODS:
+            delay = self.latency_ms + (self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+            roll = self.random.random()
+            if roll < self.rate_429:
+                return 429, {
+                    'ok': False, 'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.retry_after}',
+                    'parameters': {'retry_after': self.retry_after},
+                }
+            if roll < self.rate_429 + self.error_rate:
+                return 500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}
+        return 200, {'ok': True, 'result': self._result(method, params)}
+
+    def record(self, method, params, status):
+        with self.lock:
+            self.calls.append(Call(method, params, status, time.monotonic()))
+        if status == 200 and self.on_call is not None:
+            self.on_call(method, params)
+
+    def stats(self):
+        """Вызовы по методам и внесённые ошибки"""
+        with self.lock:
+            calls = list(self.calls)
+        return {
+            'calls': dict(Counter(call.method for call in calls)),
+            'injected_429': sum(1 for call in calls if call.status == 429),
+            'injected_500': sum(1 for call in calls if call.status == 500),
+        }
+
+
+async def _read_body(reader, headers):
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if not size:
+                await reader.readline()
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    return await reader.readexactly(int(headers.get('content-length') or 0))
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _parse_body(content_type, body):
+    """Параметры из JSON, x-www-form-urlencoded или multipart (файлы - '<file name>')"""
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        # Как в form-данных: всё строками, вложенные объекты - JSON строкой
+        return {
+            key: value if isinstance(value, str) else json.dumps(value)
+            for key, value in json.loads(body).items()
+        }
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy=HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                params[name] = f'<file {part.get_filename()}>'
+            else:
+                params[name] = part.get_payload(decode=True).decode('utf-8')
+        return params
+    return dict(parse_qsl(body.decode('utf-8')))
+
+
+# ==================== НАГРУЗКА НА БОТА ====================
+
+ACTIONS = ('/start', 'search', 'callback', '/help', 'inline')
+# Сколько сообщений бот отправляет в ответ (/start: убрать старую клавиатуру + приветствие)
+EXPECTED_REPLIES = {'/start': 2}
+SEARCH_QUERIES = ('бойный', 'голубь', 'кеклик', 'бойнный', 'алабай', 'фазан', 'николаевский')
+FIRST_CHAT_ID = 10_000_000
+
+
+class _Pending:
+    """Действие пользователя, ждущее ответа бота"""
+
+    def __init__(self, user, kind, update_id, replies):
+        self.user = user
+        self.kind = kind
+        self.update_id = update_id
+        self.replies = replies  # сколько ответов ещё ждём
+        self.answered = False
+
+
+class BotLoadDriver:
+    """
+    users пользователей, у каждого actions действий подряд (следующее - после
+    ответа бота). Ответ на сообщение - sendMessage/sendPhoto в чат, на кнопку -
+    answerCallbackQuery, на inline-запрос - answerInlineQuery. Время ответа -
+    до первого сообщения, следующее действие - после всех EXPECTED_REPLIES
+    """
+
+    def __init__(self, server, users=1000, actions=5, seed=None):
+        self.server = server
+        self.users = users
+        self.actions = actions
+        self.random = random.Random(seed)
+        self.pending = {}  # ключ ожидаемого ответа -> _Pending
+        self.done_actions = Counter()
+        self.latencies = defaultdict(list)  # kind -> мс
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.remaining = users * actions
+        self.started = self.last_reply = None
+
+    def _user(self, user):
+        return {'id': FIRST_CHAT_ID + user, 'is_bot': False, 'first_name': f'Load {user}',
+                'username': f'load_user_{user}', 'language_code': 'ru'}
+
+    def _send_next(self, user):
+        step = self.done_actions[user]
+        action = ACTIONS[(user + step) % len(ACTIONS)]
+        sender = self._user(user)
+        chat = {'id': sender['id'], 'type': 'private', 'first_name': sender['first_name']}
+        now = int(time.time())
+        replies = 1
+
+        if action == 'callback':
+            kind = 'callback'
+            key_id = f'cb{user}-{step}'
+            payload = {
+                'id': key_id, 'from': sender, 'chat_instance': str(user), 'data': 'back_to_main',
+                'message': {'message_id': step + 1, 'from': BOT_USER, 'chat': chat, 'date': now, 'text': 'menu'},
+            }
+            key = ('answerCallbackQuery', key_id)
+            update_kind = 'callback_query'
+        elif action == 'inline':
+            kind = 'inline'
+            key_id = f'iq{user}-{step}'
+            payload = {'id': key_id, 'from': sender, 'query': self.random.choice(SEARCH_QUERIES)[:4], 'offset': ''}
+            key = ('answerInlineQuery', key_id)
+            update_kind = 'inline_query'
+        else:
+            kind = 'search' if action == 'search' else 'command'
+            text = self.random.choice(SEARCH_QUERIES) if action == 'search' else action
+            replies = EXPECTED_REPLIES.get(text, 1)
+            payload = {'message_id': step + 1, 'from': sender, 'chat': chat, 'date': now, 'text': text}
+            if kind == 'command':
+                payload['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+            key = ('chat', str(sender['id']))
+            update_kind = 'message'
+
+        update_id = self.server.next_update_id()
+        with self.lock:
+            self.pending[key] = _Pending(user, kind, update_id, replies)
+        self.server.push_update(update_kind, payload, update_id)
+
+    def on_call(self, method, params):
+        if method in ('sendMessage', 'sendPhoto'):
+            key = ('chat', str(params.get('chat_id')))
+        elif method == 'answerCallbackQuery':
+            key = (method, params.get('callback_query_id'))
+        elif method == 'answerInlineQuery':
+            key = (method, params.get('inline_query_id'))
+        else:
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            item = self.pending.get(key)
+            if item is None:
+                return
+            delivered_at = self.server.delivered_at.get(item.update_id)
+            if delivered_at is None:
+                return  # запоздалый ответ на предыдущее действие
+            if not item.answered:
+                self.latencies[item.kind].append((now - delivered_at) * 1000)
+                item.answered = True
+                self.last_reply = now
+            item.replies -= 1
+            if item.replies > 0:
+                return
+            del self.pending[key]
+            user = item.user
+            self.done_actions[user] += 1
+            self.remaining -= 1
+            more = self.done_actions[user] < self.actions
+            if not self.remaining:
+                self.finished.set()
+        if more:
+            self._send_next(user)
+
+    def run(self, timeout=300):
+        self.server.on_call = self.on_call
+        self.started = time.monotonic()
+        for user in range(self.users):
+            self._send_next(user)
+        self.finished.wait(timeout)
+        self.server.on_call = None
+        return self.summary()
+
+    def summary(self):
+        all_ms = [ms for values in self.latencies.values() for ms in values]
+        answered = len(all_ms)
+        # До последнего ответа: зависшие действия не растягивают время на весь timeout
+        wall_s = (self.last_reply or self.started) - self.started
+        return {
+            'users': self.users,
+            'actions_per_user': self.actions,
+            'updates': self.users * self.actions,
+            'answered': answered,
+            'unanswered': self.users * self.actions - answered,
+            'wall_s': round(wall_s, 2),
+            'updates_per_s': round(answered / wall_s, 1) if wall_s else 0.0,
+            **_latency_summary(all_ms),
+            'by_kind': {kind: {'count': len(values), **_latency_summary(values)}
+                        for kind, values in sorted(self.latencies.items())},
+            **self.server.stats(),
+        }
+
+
+def _latency_summary(values_ms):
+    if not values_ms:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'p50_ms': round(percentile(values_ms, 50), 1),
+        'p95_ms': round(percentile(values_ms, 95), 1),
+        'p99_ms': round(percentile(values_ms, 99), 1),
+        'max_ms': round(max(values_ms), 1),
+    }
+
+
+# ==================== НАГРУЗКА НА ОТПРАВКУ ====================
+
+def run_send_load(server, messages=1000, concurrency=32, use_async=False):
+    """
+    Разослать messages сообщений в разные чаты через фейковый сервер:
+    core.utils.send_telegram_message в concurrency потоках или
+    core.telegram_async (use_async). TELEGRAM_API_BASE должен указывать на server
+    """
+    from asgiref.sync import async_to_sync
+
+    from .telegram_async import AsyncTelegramSender
+    from .utils import send_telegram_message
+
+    chats = [FIRST_CHAT_ID + number for number in range(messages)]
+    text = 'Нагрузочный тест ZooBozor'
+
+    def timed(chat_id):
+        started = time.perf_counter()
+        ok = send_telegram_message(chat_id, text)
+        return ok, (time.perf_counter() - started) * 1000
+
+    async def atimed_all():
+        async with AsyncTelegramSender(token=FAKE_TOKEN, concurrency=concurrency, global_rate=10 ** 6) as sender:
+            async def one(chat_id):
+                started = time.perf_counter()
+                ok = await sender.send_message(chat_id, text)
+                return ok, (time.perf_counter() - started) * 1000
+            return await asyncio.gather(*(one(chat_id) for chat_id in chats))
+
+    started = time.perf_counter()
+    if use_async:
+        results = async_to_sync(atimed_all)()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, chats))
+    wall_s = time.perf_counter() - started
+
+    sent = sum(1 for ok, _ in results if ok)
+    return {
+        'sender': 'telegram_async' if use_async else 'utils.send_telegram_message',
+        'messages': messages,
+        'concurrency': concurrency,
+        'sent': sent,
+        'failed': messages - sent,
+        'wall_s': round(wall_s, 2),
+        'messages_per_s': round(sent / wall_s, 1) if wall_s else 0.0,
+        **_latency_summary([ms for _, ms in results]),
+        **server.stats(),
+    }
@@ -7,6 +7,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from .models import Animal, AnimalImage, Review, Comment, Bid, Veterinarian
+from .category_schema import LISTING_FORM
 
 
 # � МОБИЛЬНАЯ АДАПТИВНОСТЬ - CSS классы
@@ -156,13 +157,12 @@ class AnimalForm(forms.ModelForm):
     class Meta:
         model = Animal
         fields = [
-            'category', 'title', 'description', 'gender', 'age', 'breed',
+            'category', 'title', 'description',
             'price', 'is_negotiable', 'listing_type', 'start_price', 'auction_end_date', 'payment_receipt',
             'main_photo', 'video_url', 'city', 'phone', 'whatsapp_number', 'telegram_username',
-            'is_vip', 'transport_type', 'route_from', 'route_to',
-            'departure_time', 'available_days', 'cargo_capacity',
-            'weight', 'gender_livestock', 'color_variety', 'health_status',
-            'flight_duration', 'game_style', 'has_passport',
+            'is_vip',
+            # Поля категорий - из реестра (core/category_schema.py)
+            *LISTING_FORM.field_names,
         ]
         widgets = {
             'category': forms.Select(attrs={
@@ -244,6 +244,12 @@ class AnimalForm(forms.ModelForm):
             }),
         }
 
+    def clean(self):
+        """Обязательные поля и проверки категории - по реестру LISTING_FORM"""
+        cleaned_data = super().clean()
+        LISTING_FORM.validate(self)
+        return cleaned_data
+
 
 class AnimalImageForm(forms.ModelForm):
     """Form for uploading additional images with VIP limit validation"""
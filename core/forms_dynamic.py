@@ -3,6 +3,7 @@
 """
 from django import forms
 from .models import Animal
+from .category_schema import DYNAMIC_FORM
 
 
 class DynamicAnimalForm(forms.ModelForm):
@@ -17,14 +18,8 @@ class DynamicAnimalForm(forms.ModelForm):
             'category', 'title', 'description', 'price', 'city', 'main_photo',
             'phone', 'whatsapp_number', 'telegram_username',
             
-            # Специфичные поля для голубей
-            'pigeon_breed', 'flight_duration', 'game_style', 'gender_pigeon',
-            
-            # Специфичные поля для скота
-            'weight', 'age', 'livestock_breed', 'gender_livestock',
-            
-            # Специфичные поля для питомцев
-            'pet_breed', 'has_passport', 'gender',
+            # Специфичные поля категорий: голуби, скот, питомцы (core/category_schema.py)
+            *DYNAMIC_FORM.field_names,
             
             # Видео
             'video_url',
@@ -121,30 +116,8 @@ class DynamicAnimalForm(forms.ModelForm):
     
     def clean(self):
         """
-        Валидация специфичных полей в зависимости от категории
+        Валидация специфичных полей в зависимости от категории (реестр DYNAMIC_FORM)
         """
         cleaned_data = super().clean()
-        category = cleaned_data.get('category')
-        
-        # Валидация для голубей
-        if category == 'pigeon':
-            if not cleaned_data.get('pigeon_breed'):
-                self.add_error('pigeon_breed', 'Укажите породу голубя')
-            if not cleaned_data.get('gender_pigeon'):
-                self.add_error('gender_pigeon', 'Укажите пол голубя')
-        
-        # Валидация для скота
-        if category in ['cow', 'sheep', 'horse', 'goat']:
-            if not cleaned_data.get('weight'):
-                self.add_error('weight', 'Укажите вес животного')
-            if not cleaned_data.get('livestock_breed'):
-                self.add_error('livestock_breed', 'Укажите породу')
-            if not cleaned_data.get('age'):
-                self.add_error('age', 'Укажите возраст')
-        
-        # Валидация для питомцев
-        if category in ['dog', 'cat']:
-            if not cleaned_data.get('pet_breed'):
-                self.add_error('pet_breed', 'Укажите породу питомца')
-        
+        DYNAMIC_FORM.validate(self)
         return cleaned_data
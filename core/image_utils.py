@@ -0,0 +1,73 @@
+"""
+Image helpers for ZooBozor: уменьшенные копии загруженных изображений.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Размеры чеков оплаты: превью для таблиц (w-20 / 50px, с запасом для retina)
+# и версия для проверки модератором (читается номер и сумма)
+RECEIPT_THUMB_SIZE = (160, 160)
+RECEIPT_THUMB_QUALITY = 70
+RECEIPT_REVIEW_SIZE = (1280, 1280)
+RECEIPT_REVIEW_QUALITY = 80
+
+
+def resized_jpeg(source, size, quality):
+    """
+    Уменьшить изображение до size (с сохранением пропорций) и пережать в JPEG.
+    Учитывает EXIF-поворот (скриншоты и фото чеков с телефона).
+    Возвращает ContentFile.
+    """
+    source.seek(0)
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        img.thumbnail(size, Image.LANCZOS)
+
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    source.seek(0)
+    return ContentFile(output.getvalue())
+
+
+def receipt_versions(receipt):
+    """
+    Превью и версия для проверки чека оплаты.
+    receipt - FieldFile/UploadedFile. Возвращает {'thumb': (name, file), 'review': (name, file)}.
+    """
+    base = os.path.splitext(os.path.basename(receipt.name))[0]
+    return {
+        'thumb': (f'{base}.jpg', resized_jpeg(receipt, RECEIPT_THUMB_SIZE, RECEIPT_THUMB_QUALITY)),
+        'review': (f'{base}.jpg', resized_jpeg(receipt, RECEIPT_REVIEW_SIZE, RECEIPT_REVIEW_QUALITY)),
+    }
+
+
+def photo_dhash(source, hash_size=8):
+    """
+    Перцептивный хэш (dHash) изображения: 64 бита.
+    Устойчив к пережатию, уменьшению и водяному знаку - у повторно
+    загруженного фото расстояние Хэмминга до оригинала несколько бит.
+    """
+    source.seek(0)
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img).convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = list(img.getdata())
+    source.seek(0)
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
@@ -0,0 +1,294 @@
+"""
+Bulk listing import for partner sellers (CSV/JSONL + ZIP архив с фото).
+
+Каждая строка проверяется правилами AnimalForm (как при добавлении на сайте),
+фото берётся из архива по имени в колонке main_photo. Проверенные строки
+пишутся пачками через bulk_create; водяной знак, сохранение фото и отпечатки
+для поиска дубликатов считаются параллельно в пуле потоков (Pillow отпускает
+GIL при обработке изображений). Ошибки - по строкам в CSV.
+
+Используется командой import_listings. Страница /manager/import/ только
+ставит задачу (ImportJob) - файлы и отчёт об ошибках (с телефонами и
+описаниями продавцов) лежат в IMPORT_ROOT вне MEDIA_ROOT, импортирует
+import_listings --queue, отчёт отдаёт staff-only view.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import models, transaction
+from django.utils import timezone
+
+from .duplicates import animal_bands, fingerprint
+from .forms import AnimalForm
+from .models import Animal, AnimalFingerprintBand, ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Платные опции не импортируются - только через оплату на сайте
+EXCLUDED_FIELDS = ('is_vip', 'payment_receipt')
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'да', '+')
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+ERRORS_PREVIEW = 50  # ошибок в ImportJob.errors_preview для страницы
+
+
+class ImportFileError(ValueError):
+    """Файл данных или архив не читается"""
+
+
+@dataclass
+class ImportResult:
+    total: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)  # [(номер строки, поле, сообщение)]
+
+    @property
+    def failed(self):
+        return len({row for row, _, _ in self.errors})
+
+    def write_errors(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(['row', 'field', 'error'])
+        writer.writerows(self.errors)
+
+
+def read_rows(data_file, fmt):
+    """Строки файла данных: (номер, dict). fmt - 'csv' или 'jsonl'"""
+    text = io.TextIOWrapper(data_file, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=2):  # 1 - заголовок
+            yield number, row
+    elif fmt == 'jsonl':
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+    else:
+        raise ImportFileError(f'Unknown format: {fmt}')
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+class PhotoArchive:
+    """ZIP с фото: поиск по имени файла без учёта папок и регистра"""
+
+    def __init__(self, archive_file):
+        try:
+            self.zip = zipfile.ZipFile(archive_file)
+        except zipfile.BadZipFile as e:
+            raise ImportFileError(f'Bad photo archive: {e}')
+        self.members = {
+            os.path.basename(info.filename).lower(): info
+            for info in self.zip.infolist() if not info.is_dir()
+        }
+
+    def get(self, name):
+        info = self.members.get(os.path.basename(name or '').lower())
+        if info is None:
+            raise KeyError(name)
+        if info.file_size > MAX_PHOTO_BYTES:
+            raise ValueError(f'{name}: file is larger than {MAX_PHOTO_BYTES // (1024 * 1024)} MB')
+        return SimpleUploadedFile(os.path.basename(info.filename), self.zip.read(info))
+
+
+BOOLEAN_FIELDS = {f.name for f in Animal._meta.get_fields() if isinstance(f, models.BooleanField)}
+
+
+def form_data(row):
+    """Строка файла -> data для AnimalForm"""
+    data = {}
+    for key, value in row.items():
+        if key is None or key in EXCLUDED_FIELDS or key == 'main_photo' or value is None:
+            continue
+        value = str(value).strip()
+        if key in BOOLEAN_FIELDS:
+            # 'true'/'false' понимают и CheckboxInput, и NullBooleanSelect; пусто - не указано
+            if value:
+                data[key] = 'true' if value.lower() in TRUE_VALUES else 'false'
+            continue
+        data[key] = value
+    return data
+
+
+def build_animal(row, archive, owner):
+    """Проверить строку правилами AnimalForm. Возвращает (Animal, None) или (None, [(поле, ошибка)])"""
+    if not isinstance(row, dict):
+        return None, [('', f'Invalid JSON: {row}')]
+
+    try:
+        files = {'main_photo': archive.get(row.get('main_photo'))}
+    except KeyError:
+        return None, [('main_photo', f"Photo not found in archive: {row.get('main_photo') or '(empty)'}")]
+    except ValueError as e:
+        return None, [('main_photo', str(e))]
+
+    form = AnimalForm(form_data(row), files)
+    if not form.is_valid():
+        return None, [(name, error) for name, errors in form.errors.items() for error in errors]
+
+    animal = form.save(commit=False)
+    animal.owner = owner
+    animal.is_approved = False  # Требует модерации, как и на сайте
+    if animal.listing_type == 'auction' and not animal.current_price:
+        animal.current_price = animal.start_price
+    return animal, None
+
+
+def process_photo(animal):
+    """В потоке пула: отпечатки, водяной знак и запись фото в хранилище (как Animal.save)"""
+    fingerprint(animal)
+    animal._add_watermark()
+    if not animal.main_photo._committed:  # водяной знак не удался - сохраняем оригинал
+        animal.main_photo.save(animal.main_photo.name, animal.main_photo.file, save=False)
+    return animal
+
+
+def _create_batch(animals, pool, result):
+    animals = list(pool.map(process_photo, animals))
+    try:
+        with transaction.atomic():
+            Animal.objects.bulk_create(animals)
+            AnimalFingerprintBand.objects.bulk_create([
+                AnimalFingerprintBand(animal=animal, kind=kind, band=band, value=value)
+                for animal in animals
+                for kind, band, value in animal_bands(animal)
+            ])
+    except Exception:
+        for animal in animals:  # файлы уже записаны - убираем
+            animal.main_photo.delete(save=False)
+        raise
+    result.created += len(animals)
+
+
+def import_listings(data_file, fmt, archive_file, owner, batch_size=None, workers=None, progress=None):
+    """
+    Импорт объявлений. progress(result) вызывается после каждой пачки.
+    Возвращает ImportResult (ошибки по строкам - result.write_errors()).
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    workers = workers or settings.IMPORT_WORKERS
+    archive = PhotoArchive(archive_file)
+    result = ImportResult()
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import') as pool:
+        for number, row in read_rows(data_file, fmt):
+            result.total += 1
+            animal, errors = build_animal(row, archive, owner)
+            if errors:
+                result.errors.extend((number, name, error) for name, error in errors)
+                continue
+
+            batch.append(animal)
+            if len(batch) >= batch_size:
+                _create_batch(batch, pool, result)
+                batch = []
+                if progress:
+                    progress(result)
+
+        if batch:
+            _create_batch(batch, pool, result)
+            if progress:
+                progress(result)
+    return result
+
+
+# ==================== ОЧЕРЕДЬ (страница /manager/import/) ====================
+
+def job_dir(job):
+    return Path(settings.IMPORT_ROOT) / str(job.pk)
+
+
+def errors_path(job):
+    """CSV с ошибками по строкам (есть, если job.failed)"""
+    return job_dir(job) / 'errors.csv'
+
+
+def _save_upload(upload, path):
+    with open(path, 'wb') as stream:
+        for chunk in upload.chunks():
+            stream.write(chunk)
+
+
+def queue_import(data_file, photos, owner, created_by=None):
+    """Сохранить загруженные файлы в IMPORT_ROOT и поставить ImportJob в очередь"""
+    # Задача видна worker-у после commit - когда файлы уже записаны
+    with transaction.atomic():
+        job = ImportJob.objects.create(owner=owner, created_by=created_by, format=detect_format(data_file.name))
+        directory = job_dir(job)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            _save_upload(data_file, directory / 'data')
+            _save_upload(photos, directory / 'photos.zip')
+        except OSError:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+    return job
+
+
+def claim_job():
+    """
+    Забрать следующую задачу из очереди (queued -> running).
+    SKIP LOCKED: два worker-а не возьмут одну задачу (PostgreSQL).
+    """
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.filter(status='queued').order_by('created_at', 'id')
+            .select_for_update(skip_locked=True).first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def _job_progress(job):
+    def progress(result):
+        job.total, job.created, job.failed = result.total, result.created, result.failed
+        job.save(update_fields=['total', 'created', 'failed'])
+    return progress
+
+
+def run_job(job, workers=None):
+    """Выполнить ImportJob. Загруженные файлы удаляются, отчёт об ошибках остаётся"""
+    directory = job_dir(job)
+    try:
+        with open(directory / 'data', 'rb') as data_file, open(directory / 'photos.zip', 'rb') as archive:
+            result = import_listings(
+                data_file, job.format, archive, job.owner, workers=workers, progress=_job_progress(job),
+            )
+    except (OSError, ImportFileError) as e:
+        job.status, job.error = 'failed', str(e)[:255]
+    except Exception as e:
+        logger.exception(f"Import job #{job.pk} failed")
+        job.status, job.error = 'failed', f'{type(e).__name__}: {e}'[:255]
+    else:
+        if result.errors:
+            with open(errors_path(job), 'w', newline='', encoding='utf-8') as stream:
+                result.write_errors(stream)
+        job.status = 'done'
+        job.total, job.created, job.failed = result.total, result.created, result.failed
+        job.errors_preview = [list(error) for error in result.errors[:ERRORS_PREVIEW]]
+    finally:
+        for name in ('data', 'photos.zip'):
+            (directory / name).unlink(missing_ok=True)
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
@@ -0,0 +1,208 @@
+"""
+In-memory prefix index of active listings for the bot's inline mode.
+
+@bot голубь бойный в любом чате - Telegram ждёт ответ на inline-запрос
+считанные секунды и шлёт его на каждое нажатие клавиши. Поэтому ответ
+собирается без БД: в процессе бота держится отсортированный список
+(слово, pk) по названиям и породам активных объявлений, каждое слово
+запроса - префикс (бойн -> бойный), слова пересекаются.
+
+Обновление - в фоновом потоке (start):
+- каждые INLINE_INDEX_REFRESH секунд: объявления с updated_at новее
+  прошлого обновления (добавить / обновить / убрать неактивные) и
+  COUNT активных - если число не совпало (удаление, update() без
+  updated_at), индекс строится заново
+- раз в INLINE_INDEX_REBUILD секунд - полная перестройка
+"""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Animal
+
+logger = logging.getLogger(__name__)
+
+INDEX_FIELDS = ('title', 'breed', 'pigeon_breed', 'livestock_breed', 'pet_breed')
+ROW_FIELDS = (
+    'pk', 'title', 'breed', 'pigeon_breed', 'livestock_breed', 'pet_breed', 'category', 'city',
+    'price', 'current_price', 'listing_type', 'is_vip', 'created_at', 'main_photo',
+    'is_approved', 'is_sold', 'status',
+)
+MAX_RESULTS = 50  # Telegram: не больше 50 результатов на ответ
+CLOCK_SKEW = timedelta(seconds=5)  # запас для транзакций, закоммиченных позже своего updated_at
+
+
+class Entry(NamedTuple):
+    pk: int
+    title: str
+    breed: str
+    category: str
+    city: str
+    price: object
+    listing_type: str
+    is_vip: bool
+    created_at: float
+    photo: str
+
+
+def active_listings():
+    return Animal.objects.filter(is_approved=True, is_sold=False, status='active')
+
+
+def tokenize(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def _is_active(row):
+    return row['is_approved'] and not row['is_sold'] and row['status'] == 'active'
+
+
+def _entry(row):
+    category = dict(Animal.CATEGORY_CHOICES).get(row['category'], row['category'])
+    city = dict(Animal.CITY_CHOICES).get(row['city'], row['city'] or '')
+    breed = next((row[field] for field in INDEX_FIELDS[1:] if row[field]), '')
+    return Entry(
+        pk=row['pk'],
+        title=row['title'],
+        breed=breed,
+        category=category,
+        city=city,
+        price=row['current_price'] if row['listing_type'] == 'auction' else row['price'],
+        listing_type=row['listing_type'],
+        is_vip=row['is_vip'],
+        created_at=row['created_at'].timestamp(),
+        photo=row['main_photo'] or '',
+    )
+
+
+def _tokens(row):
+    return {token for field in INDEX_FIELDS for token in tokenize(row[field])}
+
+
+class InlineIndex:
+    """Префиксный индекс: entries pk -> Entry, tokens - отсортированный список (слово, pk)"""
+
+    def __init__(self):
+        self.entries = {}
+        self.tokens = []
+        self.entry_tokens = {}
+        self.refreshed_at = None
+        self.rebuilt_at = 0.0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------- обновление ----------
+
+    def rebuild(self):
+        """Построить индекс заново одним SELECT"""
+        started = timezone.now()
+        entries, entry_tokens, tokens = {}, {}, []
+        for row in active_listings().order_by().values(*ROW_FIELDS).iterator(chunk_size=2000):
+            entries[row['pk']] = _entry(row)
+            entry_tokens[row['pk']] = _tokens(row)
+            tokens.extend((token, row['pk']) for token in entry_tokens[row['pk']])
+        tokens.sort()
+        with self.lock:
+            self.entries, self.entry_tokens, self.tokens = entries, entry_tokens, tokens
+            self.refreshed_at = started
+            self.rebuilt_at = time.monotonic()
+        logger.info(f"Inline index rebuilt: {len(entries)} listings, {len(tokens)} tokens")
+
+    def refresh(self):
+        """Догрузить изменения с прошлого обновления; при расхождении числа объявлений - rebuild"""
+        if self.refreshed_at is None or time.monotonic() - self.rebuilt_at > settings.INLINE_INDEX_REBUILD:
+            self.rebuild()
+            return
+
+        started = timezone.now()
+        rows = list(
+            Animal.objects.filter(updated_at__gte=self.refreshed_at - CLOCK_SKEW).order_by().values(*ROW_FIELDS)
+        )
+        with self.lock:
+            for row in rows:
+                self._remove(row['pk'])
+                if _is_active(row):
+                    self._add(row)
+            self.refreshed_at = started
+            size = len(self.entries)
+
+        if active_listings().count() != size:
+            self.rebuild()
+
+    def _add(self, row):
+        pk = row['pk']
+        self.entries[pk] = _entry(row)
+        self.entry_tokens[pk] = _tokens(row)
+        for token in self.entry_tokens[pk]:
+            insort(self.tokens, (token, pk))
+
+    def _remove(self, pk):
+        self.entries.pop(pk, None)
+        for token in self.entry_tokens.pop(pk, ()):
+            position = bisect_left(self.tokens, (token, pk))
+            if position < len(self.tokens) and self.tokens[position] == (token, pk):
+                del self.tokens[position]
+
+    def start(self, interval=None):
+        """Построить индекс и обновлять его в фоновом потоке"""
+        interval = interval or settings.INLINE_INDEX_REFRESH
+        self.rebuild()
+
+        def loop():
+            while not self.stopped.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Inline index refresh failed: {str(e)}")
+                finally:
+                    close_old_connections()
+
+        self.thread = threading.Thread(target=loop, name='inline-index', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    # ---------- поиск ----------
+
+    def _prefix_pks(self, prefix):
+        position = bisect_left(self.tokens, (prefix,))
+        pks = set()
+        while position < len(self.tokens) and self.tokens[position][0].startswith(prefix):
+            pks.add(self.tokens[position][1])
+            position += 1
+        return pks
+
+    def search(self, query, offset=0, limit=MAX_RESULTS):
+        """
+        Объявления, где каждое слово запроса - начало слова названия/породы.
+        Пустой запрос - все активные. VIP первыми, затем новые
+        """
+        words = sorted(set(tokenize(query)), key=len, reverse=True)  # длинные префиксы - меньше кандидатов
+        with self.lock:
+            if words:
+                pks = self._prefix_pks(words[0])
+                for word in words[1:]:
+                    if not pks:
+                        break
+                    pks &= self._prefix_pks(word)
+                entries = [self.entries[pk] for pk in pks]
+            else:
+                entries = list(self.entries.values())
+        entries.sort(key=lambda entry: (entry.is_vip, entry.created_at), reverse=True)
+        return entries[offset:offset + limit]
+
+
+inline_index = InlineIndex()
@@ -0,0 +1,135 @@
+"""
+Per-request instrumentation for ZooBozor.
+
+Собирает метрики текущего запроса (SQL, шаблоны, кэш) в contextvar,
+который выставляет core.middleware.RequestTimingMiddleware:
+
+- SQL: connection.execute_wrapper (включается в middleware)
+- шаблоны: TimedDjangoTemplates (TEMPLATES['BACKEND'])
+- кэш: Instrumented*Cache / CacheMetricsMixin (CACHES['BACKEND'], settings.CACHE_BACKEND)
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+
+
+current_metrics = ContextVar('current_request_metrics', default=None)
+
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Счётчики одного HTTP запроса"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (sql, duration_ms)
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def duplicate_queries(self):
+        """
+        Одинаковый SQL с разными параметрами - типичный признак N+1.
+        Возвращает {sql: count} только для повторяющихся запросов.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def slowest_queries(self, limit):
+        return sorted(self.queries, key=lambda q: q[1], reverse=True)[:limit]
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper - время каждого SQL запроса"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        metrics.queries.append((sql, duration))
+        metrics.db_ms += duration
+
+
+def record_cache_lookup(hits, misses):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+# ==================== ШАБЛОНЫ ====================
+
+class TimedTemplate(DjangoTemplate):
+    """Шаблон, который учитывает время рендера в метриках запроса"""
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates backend с замером времени рендера.
+    {% include %} рендерится внутри родителя и отдельно не считается.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+# ==================== КЭШ ====================
+
+class CacheMetricsMixin:
+    """
+    Подсчёт попаданий/промахов кэша для метрик запроса.
+    Подмешивается к любому backend: class X(CacheMetricsMixin, RedisCache)
+    (get_many базового BaseCache вызывает get() и учитывается автоматически)
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    """LocMemCache с подсчётом попаданий"""
+
+
+class InstrumentedDatabaseCache(CacheMetricsMixin, DatabaseCache):
+    """DatabaseCache с подсчётом попаданий (таблица: manage.py createcachetable)"""
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    """RedisCache с подсчётом попаданий (нужен пакет redis)"""
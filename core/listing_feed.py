@@ -0,0 +1,94 @@
+"""
+Compact JSON feed of recent listings for the Service Worker (static/sw.js).
+
+Лента - то, что пользователь видит на главной (VIP первыми, затем
+новые): id, название, цена, фото и версия объявления (updated_at).
+Ставки и комментарии тоже обновляют updated_at (touch_listings), так что
+версия меняется при любом изменении того, что показывает карточка.
+SW сравнивает версию из ленты с версией закэшированной карточки
+(заголовок X-Listing-Version): совпала - карточка из кэша с обновлением
+в фоне, нет - сначала сеть, кэш только без сети.
+
+Ответ собирается один раз на версию кэша объявлений (cache_utils) -
+любое изменение объявлений даёт новую ленту и новый ETag.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache_utils import LISTINGS_CACHE_TIMEOUT, bump_listings_version, listings_cache_key
+from .models import Animal
+
+FEED_FIELDS = ('pk', 'title', 'price', 'current_price', 'listing_type', 'main_photo', 'updated_at')
+VERSION_HEADER = 'X-Listing-Version'
+
+
+def listing_version(updated_at):
+    """
+    Версия объявления: меняется при каждом сохранении (updated_at, auto_now).
+    С микросекундами - ставка через секунду после правки тоже новая версия
+    """
+    return str(int(updated_at.timestamp()) * 1_000_000 + updated_at.microsecond)
+
+
+def touch_listings(animal_ids):
+    """
+    Обновить updated_at объявлений после новой ставки/комментария или их
+    удаления: сами Bid/Comment карточку не сохраняют, а версия (и кэш
+    лент/API) должна смениться. update() без сигналов - кэш сбрасываем сами
+    """
+    Animal.objects.filter(pk__in=list(animal_ids)).update(updated_at=timezone.now())
+    transaction.on_commit(bump_listings_version)
+
+
+def mark_cacheable(request, response, version):
+    """
+    Разрешить SW кэшировать карточку (заголовок с версией). Страницу с
+    flash-сообщением (после комментария, ставки) не помечаем - иначе оно
+    показывалось бы снова при каждом открытии из кэша
+    """
+    if not len(get_messages(request)):
+        response[VERSION_HEADER] = version
+    return response
+
+
+def feed_listings(limit):
+    return (
+        Animal.objects.filter(is_approved=True)
+        .order_by('-is_vip', '-created_at')
+        .values(*FEED_FIELDS)[:limit]
+    )
+
+
+def build_feed(limit=None):
+    """Тело ленты (bytes, компактный JSON)"""
+    listings = []
+    for row in feed_listings(limit or settings.PWA_FEED_SIZE):
+        price = row['current_price'] if row['listing_type'] == 'auction' else row['price']
+        listings.append({
+            'id': row['pk'],
+            'title': row['title'],
+            'price': str(price) if price is not None else None,
+            'url': reverse('animal_detail', args=[row['pk']]),
+            'thumb': default_storage.url(row['main_photo']) if row['main_photo'] else None,
+            'v': listing_version(row['updated_at']),
+        })
+    return json.dumps({'listings': listings}, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def cached_feed():
+    """(body, etag) - из кэша, пока не изменились объявления"""
+    key = listings_cache_key('pwa_feed')
+    feed = cache.get(key)
+    if feed is None:
+        body = build_feed()
+        feed = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        cache.set(key, feed, LISTINGS_CACHE_TIMEOUT)
+    return feed
@@ -0,0 +1,44 @@
+"""
+Django management command: move sold and stale listings to the archive tier
+Usage:
+    python manage.py archive_listings                 # старше ARCHIVE_AFTER_DAYS, снимки в БД
+    python manage.py archive_listings --days 90 --to jsonl
+    python manage.py archive_listings --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from core.archive import TARGETS, archivable_listings, archive_listings
+
+
+class Command(BaseCommand):
+    help = 'Archive sold, withdrawn and finished-auction listings with their bids, comments and offers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive listings inactive for more than N days')
+        parser.add_argument('--to', dest='target', choices=TARGETS, default='db',
+                            help='db - snapshot in ArchivedAnimal.data, jsonl - compressed JSONL in ARCHIVE_ROOT')
+        parser.add_argument('--batch-size', type=int, default=200, help='Listings per transaction')
+        parser.add_argument('--limit', type=int, help='Stop after N listings')
+        parser.add_argument('--dry-run', action='store_true', help='Only count listings to archive')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_listings(options['days']).count()
+            self.stdout.write(f'📦 Listings to archive: {count}')
+            return
+
+        def progress(total):
+            self.stdout.write(f'  archived: {total}')
+
+        try:
+            total = archive_listings(
+                days=options['days'], target=options['target'],
+                batch_size=options['batch_size'], limit=options['limit'], progress=progress,
+            )
+        except IntegrityError as e:
+            # Пачка откатилась: объявления на месте, уже перенесённые пачки сохранены
+            raise CommandError(f'Archive conflict, batch rolled back: {e}')
+        self.stdout.write(self.style.SUCCESS(f"✅ Archived {total} listing(s) ({options['target']})"))
@@ -0,0 +1,42 @@
+"""
+Django management command to compare WSGI and ASGI throughput
+Usage:
+    python manage.py benchmark_asgi --requests 200 --concurrency 8
+    python manage.py benchmark_asgi --output benchmarks/asgi.json
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import run_throughput
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/sec of sync views under WSGI and core.views_async under ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario and server type')
+        parser.add_argument('--concurrency', type=int, default=8, help='Worker threads (WSGI) / in-flight requests (ASGI)')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Run only this scenario (repeatable)')
+        parser.add_argument('--output', help='Write results as JSON')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"⏱️ WSGI vs ASGI: {options['requests']} requests, concurrency {options['concurrency']}"
+        ))
+        results = run_throughput(
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            only=options['scenarios'],
+            stdout=self.stdout,
+        )
+
+        if options['output']:
+            path = Path(options['output'])
+            if not path.is_absolute():
+                path = Path(settings.BASE_DIR) / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'✅ Results saved: {path}'))
@@ -0,0 +1,69 @@
+"""
+Django management command to benchmark core views
+Usage:
+    python manage.py generate_synthetic_data --animals 100000
+    python manage.py benchmark_views --output benchmarks/baseline.json
+    python manage.py benchmark_views --compare benchmarks/baseline.json
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and SQL query counts of core views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured warm-up requests per scenario')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Run only this scenario (repeatable)')
+        parser.add_argument('--output', help='Write results as JSON (e.g. benchmarks/baseline.json)')
+        parser.add_argument('--compare', help='Compare against a previously saved JSON baseline')
+        parser.add_argument('--threshold', type=float, default=20.0, help='Allowed p50/p95 regression, percent')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            path = Path(options['compare'])
+            if not path.exists():
+                raise CommandError(f'Baseline not found: {path}')
+            baseline = json.loads(path.read_text(encoding='utf-8'))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"⏱️ Benchmark: {options['iterations']} iterations, {options['warmup']} warm-up"
+        ))
+        results = run_benchmarks(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['scenarios'],
+            stdout=self.stdout,
+        )
+
+        failed = [name for name, r in results['scenarios'].items() if r['failed']]
+        for name in failed:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {name}: status {results['scenarios'][name]['status_codes']} - timings are not meaningful"
+            ))
+
+        if options['output']:
+            path = Path(options['output'])
+            if not path.is_absolute():
+                path = Path(settings.BASE_DIR) / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'✅ Results saved: {path}'))
+
+        if baseline is not None:
+            lines, regressions = compare_results(baseline, results, options['threshold'])
+            self.stdout.write(self.style.MIGRATE_HEADING('📊 Compared to baseline'))
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(f'❌ {regression}'))
+                raise CommandError(f'{len(regressions)} regression(s) over {options["threshold"]}%')
+            self.stdout.write(self.style.SUCCESS('✅ No regressions'))
@@ -0,0 +1,138 @@
+"""
+Django management command to load-test the Telegram bot against a local fake Bot API
+Usage:
+    python manage.py bot_loadtest --run-bot --users 2000 --actions 5
+    python manage.py bot_loadtest --port 8081          # бот запускается отдельно:
+        TELEGRAM_API_BASE=http://127.0.0.1:8081 TELEGRAM_BOT_TOKEN=1:fake python manage.py runbot
+    python manage.py bot_loadtest --target send --messages 2000 --concurrency 32
+    python manage.py bot_loadtest --run-bot --latency-ms 50 --rate-429 0.01 --output benchmarks/bot.json
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.fake_telegram import FAKE_TOKEN, BotLoadDriver, FakeTelegramServer, run_send_load
+
+
+class Command(BaseCommand):
+    help = 'Load-test runbot or Telegram sending against a local fake Telegram Bot API server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['bot', 'send', 'send-async'], default='bot',
+                            help='bot - runbot handlers; send - utils.send_telegram_message; send-async - core.telegram_async')
+        parser.add_argument('--users', type=int, default=1000, help='Simulated chats (bot)')
+        parser.add_argument('--actions', type=int, default=5, help='Actions per user, each after the previous reply (bot)')
+        parser.add_argument('--messages', type=int, default=1000, help='Messages to send (send, send-async)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Sender threads / in-flight requests (send)')
+        parser.add_argument('--port', type=int, default=0, help='Fake API port (0 = any free port)')
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Added latency per Bot API call')
+        parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- latency')
+        parser.add_argument('--rate-429', type=float, default=0.0, help='Share of calls answered 429 Too Many Requests')
+        parser.add_argument('--retry-after', type=int, default=1, help='retry_after of injected 429, seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls answered 500')
+        parser.add_argument('--seed', type=int, help='Random seed (fault injection, queries)')
+        parser.add_argument('--run-bot', action='store_true', help='Start runbot in a subprocess pointed at the fake API')
+        parser.add_argument('--bot-workers', type=int, default=settings.BOT_WORKERS, help='runbot --workers (with --run-bot)')
+        parser.add_argument('--timeout', type=int, default=300, help='Give up waiting for replies after N seconds')
+        parser.add_argument('--output', help='Write results as JSON')
+
+    def handle(self, *args, **options):
+        server = FakeTelegramServer(
+            port=options['port'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            rate_429=options['rate_429'],
+            retry_after=options['retry_after'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        with server:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'🧪 Fake Telegram Bot API: {server.url}'))
+            if options['target'] == 'bot':
+                results = self.run_bot_load(server, options)
+            else:
+                with override_settings(TELEGRAM_API_BASE=server.url):
+                    results = run_send_load(
+                        server,
+                        messages=options['messages'],
+                        concurrency=options['concurrency'],
+                        use_async=options['target'] == 'send-async',
+                    )
+
+        self.print_results(results)
+        if options['output']:
+            path = Path(options['output'])
+            if not path.is_absolute():
+                path = Path(settings.BASE_DIR) / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'✅ Results saved: {path}'))
+
+    def run_bot_load(self, server, options):
+        bot = None
+        if options['run_bot']:
+            env = {
+                **os.environ,
+                'TELEGRAM_API_BASE': server.url,
+                'TELEGRAM_BOT_TOKEN': os.environ.get('TELEGRAM_BOT_TOKEN') or FAKE_TOKEN,
+            }
+            bot = subprocess.Popen(
+                [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'runbot',
+                 '--workers', str(options['bot_workers'])],
+                env=env, stdout=subprocess.DEVNULL,
+            )
+        else:
+            self.stdout.write(
+                f'Start the bot: TELEGRAM_API_BASE={server.url} TELEGRAM_BOT_TOKEN={FAKE_TOKEN} python manage.py runbot'
+            )
+
+        try:
+            self.stdout.write('⏳ Waiting for the bot to poll getUpdates...')
+            if not server.polled.wait(60 if bot else options['timeout']):
+                raise CommandError('The bot never called getUpdates')
+
+            self.stdout.write(
+                f"🤖 {options['users']} users x {options['actions']} actions"
+            )
+            driver = BotLoadDriver(server, users=options['users'], actions=options['actions'], seed=options['seed'])
+            return driver.run(timeout=options['timeout'])
+        finally:
+            if bot is not None:
+                bot.terminate()
+                try:
+                    bot.wait(10)
+                except subprocess.TimeoutExpired:
+                    bot.kill()
+
+    def print_results(self, results):
+        if 'updates' in results:
+            self.stdout.write(
+                f"answered {results['answered']}/{results['updates']} in {results['wall_s']}s "
+                f"-> {results['updates_per_s']} updates/s"
+            )
+            rows = [('all', results)] + list(results['by_kind'].items())
+        else:
+            self.stdout.write(
+                f"{results['sender']}: sent {results['sent']}/{results['messages']} in {results['wall_s']}s "
+                f"-> {results['messages_per_s']} messages/s"
+            )
+            rows = [('send', results)]
+
+        self.stdout.write(f"{'':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<10} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}"
+            )
+        self.stdout.write(
+            f"API calls: {results['calls']}, injected 429: {results['injected_429']}, 500: {results['injected_500']}"
+        )
+        if results.get('unanswered') or results.get('failed'):
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Without reply: {results.get('unanswered') or results.get('failed')}"
+            ))
@@ -0,0 +1,59 @@
+"""
+Django management command: streaming export of listings, bids, offers and transactions
+Usage:
+    python manage.py export_data animals --output animals.csv
+    python manage.py export_data bids --format jsonl --from 2026-01-01 --to 2026-01-31
+    python manage.py export_data animals --format parquet --category pigeon --output pigeons.parquet
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.exports import CONTENT_TYPES, DATASETS, DEFAULT_CHUNK_SIZE, ExportError, stream_export
+
+
+def date_arg(value):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+class Command(BaseCommand):
+    help = 'Export data as CSV, JSONL or Parquet in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', default='csv', choices=list(CONTENT_TYPES))
+        parser.add_argument('--output', '-o', default='-', help='File path, "-" for stdout')
+        parser.add_argument('--from', dest='date_from', type=date_arg, help='created_at from (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=date_arg, help='created_at to, inclusive (YYYY-MM-DD)')
+        parser.add_argument('--category', help='Animal category (animals, bids, offers)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(
+                options['dataset'], options['format'],
+                chunk_size=options['chunk_size'],
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                category=options['category'],
+            )
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        to_stdout = options['output'] == '-'
+        output = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+        size = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if not to_stdout:
+                output.close()
+
+        if not to_stdout:
+            self.stdout.write(self.style.SUCCESS(f"✅ {options['output']}: {size / 1024:.1f} KB"))
@@ -0,0 +1,49 @@
+"""
+Django management command to compute duplicate-detection fingerprints for existing listings
+Usage:
+    python manage.py fingerprint_listings
+    python manage.py fingerprint_listings --force
+"""
+from django.core.management.base import BaseCommand
+
+from core.duplicates import store_bands, text_minhash, to_signed
+from core.image_utils import photo_dhash
+from core.models import Animal
+
+
+class Command(BaseCommand):
+    help = 'Compute photo/text hashes and LSH bands for listings created before duplicate detection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompute even if hashes already exist')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        animals = Animal.objects.exclude(status='archived')
+        if not options['force']:
+            animals = animals.filter(photo_hash__isnull=True, text_minhash__isnull=True)
+        animals = animals.only('id', 'title', 'description', 'main_photo', 'photo_hash', 'text_minhash')
+
+        done = failed = 0
+        for animal in animals.iterator(chunk_size=options['batch_size']):
+            try:
+                # Фото уже с водяным знаком - dHash к нему устойчив
+                with animal.main_photo.open('rb'):
+                    photo_hash = to_signed(photo_dhash(animal.main_photo))
+            except Exception as e:
+                photo_hash = None
+                self.stdout.write(self.style.WARNING(f'⚠️ Animal #{animal.pk}: photo not hashed ({e})'))
+
+            animal.photo_hash = photo_hash
+            animal.text_minhash = text_minhash(f'{animal.title}\n{animal.description}')
+            # update(), а не save(): без сигналов и без обработки main_photo
+            Animal.objects.filter(pk=animal.pk).update(
+                photo_hash=animal.photo_hash, text_minhash=animal.text_minhash
+            )
+            store_bands(animal)
+            if photo_hash is None and animal.text_minhash is None:
+                failed += 1
+            else:
+                done += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Listings fingerprinted: {done}, without fingerprint: {failed}'))
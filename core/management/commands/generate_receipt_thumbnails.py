@@ -0,0 +1,48 @@
+"""
+Django management command to create preview versions of existing payment receipts
+Usage:
+    python manage.py generate_receipt_thumbnails
+    python manage.py generate_receipt_thumbnails --force
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.image_utils import receipt_versions
+from core.models import Animal
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and review versions for uploaded payment receipts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate even if versions already exist')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        animals = Animal.objects.filter(payment_receipt__isnull=False).exclude(payment_receipt='')
+        if not options['force']:
+            animals = animals.filter(
+                Q(payment_receipt_thumb__isnull=True) | Q(payment_receipt_thumb='') |
+                Q(payment_receipt_review__isnull=True) | Q(payment_receipt_review='')
+            )
+        animals = animals.only('id', 'payment_receipt', 'payment_receipt_thumb', 'payment_receipt_review')
+
+        done = failed = 0
+        for animal in animals.iterator(chunk_size=options['batch_size']):
+            try:
+                with animal.payment_receipt.open('rb'):
+                    versions = receipt_versions(animal.payment_receipt)
+                animal.delete_receipt_versions()
+                animal.payment_receipt_thumb.save(*versions['thumb'], save=False)
+                animal.payment_receipt_review.save(*versions['review'], save=False)
+                # update(), а не save(): без сигналов и без обработки main_photo
+                Animal.objects.filter(pk=animal.pk).update(
+                    payment_receipt_thumb=animal.payment_receipt_thumb.name,
+                    payment_receipt_review=animal.payment_receipt_review.name,
+                )
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'❌ Animal #{animal.pk}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Receipts processed: {done}, failed: {failed}'))
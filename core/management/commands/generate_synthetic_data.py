@@ -0,0 +1,288 @@
+"""
+Django management command to generate synthetic marketplace data
+for load testing and benchmarks (see benchmark_views)
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image
+
+from core.models import Animal, Bid, Comment, Review, UserProfile
+
+
+SYNTHETIC_PREFIX = 'synth_'
+PLACEHOLDER_PHOTO = 'animals/synthetic/placeholder.jpg'
+
+BREEDS = {
+    'cat': ['Британская', 'Персидская', 'Мейн-кун', 'Сиамская', 'Сфинкс'],
+    'dog': ['Немецкая овчарка', 'Алабай', 'Хаски', 'Лабрадор', 'Тойтерьер'],
+    'parrot': ['Волнистый', 'Корелла', 'Ара', 'Жако', 'Неразлучник'],
+    'canary': ['Гарцский роллер', 'Глостер', 'Йоркширская'],
+    'partridge': ['Кеклик горный', 'Кеклик азиатский'],
+    'chicken': ['Брама', 'Кохинхин', 'Бойцовая', 'Леггорн', 'Орловская'],
+    'pigeon': ['Бойный', 'Статный', 'Николаевский', 'Таджикский бойный', 'Иранский', 'Армавирский'],
+    'rabbit': ['Фландр', 'Карликовый', 'Калифорнийский'],
+    'horse': ['Ахалтекинская', 'Карабаир', 'Локайская'],
+    'cow': ['Абердин-ангус', 'Голштинская', 'Швицкая', 'Местная'],
+    'goat': ['Зааненская', 'Нубийская', 'Ангорская'],
+    'sheep': ['Гиссарская', 'Эдильбаевская', 'Каракульская'],
+    'fish': ['Гуппи', 'Скалярия', 'Золотая рыбка', 'Петушок'],
+    'hamster': ['Джунгарский', 'Сирийский'],
+    'turtle': ['Красноухая', 'Среднеазиатская'],
+    'bird_other': ['Фазан', 'Перепел', 'Павлин'],
+    'reptile': ['Игуана', 'Геккон', 'Питон'],
+    'transport': ['Спринтер', 'Портер', 'Минивэн'],
+    'other': ['Разное'],
+}
+
+DESCRIPTION_PARTS = [
+    'Здоровый, активный, хорошо кушает.',
+    'Привит по возрасту, есть все документы.',
+    'Продаю в связи с переездом.',
+    'Родители чемпионы выставок.',
+    'Торг уместен, звоните в любое время.',
+    'Возможна доставка по городу.',
+    'Отличная игра, держится в воздухе долго.',
+    'Спокойный характер, приучен к рукам.',
+]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Временно отключить auto_now/auto_now_add, чтобы задать даты вручную"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, listings, bids, reviews, comments and favorites for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=100000, help='Number of Animal listings')
+        parser.add_argument('--users', type=int, default=2000, help='Number of users (sellers and buyers)')
+        parser.add_argument('--bids', type=int, default=8, help='Max bids per auction')
+        parser.add_argument('--reviews', type=int, default=5000, help='Number of seller reviews')
+        parser.add_argument('--comments', type=int, default=50000, help='Number of comments')
+        parser.add_argument('--favorites', type=int, default=50000, help='Number of favorites')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (reproducible data)')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated synthetic data first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=SYNTHETIC_PREFIX).delete()
+            self.stdout.write(self.style.WARNING(f'🗑️ Deleted {deleted} synthetic rows'))
+
+        self.ensure_placeholder_photo()
+
+        with explicit_timestamps(User, Animal, Bid, Review, Comment):
+            user_ids = self.create_users(options['users'])
+            auctions = self.create_animals(options['animals'], user_ids)
+            self.create_bids(auctions, user_ids, options['bids'])
+            self.create_reviews(options['reviews'], user_ids)
+            self.create_comments(options['comments'], user_ids)
+        self.create_favorites(options['favorites'], user_ids)
+
+        self.stdout.write(self.style.SUCCESS('✅ Synthetic data generated'))
+
+    # ==================== HELPERS ====================
+
+    def ensure_placeholder_photo(self):
+        """Одна заглушка на все объявления: шаблоны и бот получают реальный файл"""
+        if default_storage.exists(PLACEHOLDER_PHOTO):
+            return
+        output = BytesIO()
+        Image.new('RGB', (800, 600), (212, 175, 55)).save(output, format='JPEG', quality=70)
+        default_storage.save(PLACEHOLDER_PHOTO, ContentFile(output.getvalue()))
+
+    def random_date(self, days):
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 24 * 3600))
+
+    def bulk_create(self, model, objects, **kwargs):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size, **kwargs)
+
+    def ids_of_new_users(self, start_index):
+        # bulk_create на MySQL не возвращает pk - перечитываем id из БД
+        return list(
+            User.objects.filter(username__startswith=SYNTHETIC_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )[start_index:]
+
+    # ==================== GENERATORS ====================
+
+    def create_users(self, count):
+        existing = User.objects.filter(username__startswith=SYNTHETIC_PREFIX).count()
+        password = make_password('synthetic-benchmark')  # хешируем один раз
+        users = [
+            User(
+                username=f'{SYNTHETIC_PREFIX}user_{existing + i}',
+                email=f'{SYNTHETIC_PREFIX}user_{existing + i}@example.com',
+                password=password,
+                date_joined=self.random_date(730),
+            )
+            for i in range(count)
+        ]
+        self.bulk_create(User, users)
+        user_ids = self.ids_of_new_users(existing)
+
+        # bulk_create не вызывает post_save - профили создаём сами
+        self.bulk_create(UserProfile, [
+            UserProfile(
+                user_id=user_id,
+                phone=f'+99290{self.rng.randint(1000000, 9999999)}',
+                is_verified=self.rng.random() < 0.1,
+                total_sales=self.rng.randint(0, 30),
+            )
+            for user_id in user_ids
+        ])
+        self.stdout.write(f'👥 Users: {len(user_ids)}')
+        return user_ids
+
+    def build_animal(self, owner_id):
+        category = self.rng.choice(Animal.CATEGORY_CHOICES)[0]
+        city = self.rng.choice(Animal.CITY_CHOICES)[0]
+        breed = self.rng.choice(BREEDS.get(category, BREEDS['other']))
+        created_at = self.random_date(365)
+        price = Decimal(self.rng.randint(5, 2000) * 10)
+
+        status = self.rng.choices(['active', 'sold', 'archived'], weights=[85, 10, 5])[0]
+        animal = Animal(
+            category=category,
+            title=f'{breed} - {self.rng.choice(["продаю", "срочно", "отличный", "молодой", "пара"])}',
+            description=' '.join(self.rng.sample(DESCRIPTION_PARTS, 3)),
+            gender=self.rng.choice(Animal.GENDER_CHOICES)[0],
+            age=f'{self.rng.randint(1, 36)} мес.',
+            breed=breed,
+            price=price,
+            is_negotiable=self.rng.random() < 0.3,
+            city=city,
+            owner_id=owner_id,
+            phone=f'+99290{self.rng.randint(1000000, 9999999)}',
+            main_photo=PLACEHOLDER_PHOTO,
+            status=status,
+            is_sold=status == 'sold',
+            is_vip=self.rng.random() < 0.05,
+            is_approved=self.rng.random() < 0.9,
+            views_count=self.rng.randint(0, 5000),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        if category == 'pigeon':
+            animal.pigeon_breed = breed
+            if self.rng.random() < 0.3:
+                animal.listing_type = 'auction'
+                animal.start_price = price
+                animal.current_price = price
+                animal.auction_end_date = self.now + timedelta(days=self.rng.randint(-10, 20))
+                animal.is_paid = self.rng.random() < 0.7
+        return animal
+
+    def create_animals(self, count, user_ids):
+        # Продавцов меньше, чем покупателей: ~30% пользователей выставляют объявления
+        sellers = user_ids[:max(1, len(user_ids) * 3 // 10)]
+        auctions = []
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            batch = [self.build_animal(self.rng.choice(sellers)) for _ in range(size)]
+            Animal.objects.bulk_create(batch)
+            auctions.extend(a for a in batch if a.listing_type == 'auction' and a.pk)
+            created += size
+            self.stdout.write(f'🐾 Animals: {created}/{count}')
+        return auctions
+
+    def create_bids(self, auctions, user_ids, max_bids):
+        bids = []
+        updated = []
+        for animal in auctions:
+            amount = animal.start_price
+            bid_time = animal.created_at
+            for _ in range(self.rng.randint(0, max_bids)):
+                bidder_id = self.rng.choice(user_ids)
+                if bidder_id == animal.owner_id:
+                    continue
+                amount += Decimal(self.rng.randint(1, 20) * 10)
+                bid_time += timedelta(minutes=self.rng.randint(5, 600))
+                bids.append(Bid(animal_id=animal.pk, bidder_id=bidder_id, amount=amount, created_at=bid_time))
+            if amount != animal.current_price:
+                animal.current_price = amount
+                updated.append(animal)
+        self.bulk_create(Bid, bids)
+        Animal.objects.bulk_update(updated, ['current_price'], batch_size=self.batch_size)
+        self.stdout.write(f'🔨 Bids: {len(bids)} on {len(auctions)} auctions')
+
+    def create_reviews(self, count, user_ids):
+        if len(user_ids) < 2:
+            return
+        # Один отзыв на пару продавец/покупатель (UniqueConstraint)
+        pairs = set()
+        attempts = 0
+        while len(pairs) < count and attempts < count * 5:
+            attempts += 1
+            pairs.add(tuple(self.rng.sample(user_ids, 2)))
+        self.bulk_create(Review, [
+            Review(
+                seller_id=seller_id,
+                buyer_id=buyer_id,
+                rating=self.rng.choices([1, 2, 3, 4, 5], weights=[3, 4, 10, 30, 53])[0],
+                comment=self.rng.choice(DESCRIPTION_PARTS),
+                created_at=self.random_date(365),
+            )
+            for seller_id, buyer_id in pairs
+        ], ignore_conflicts=True)
+        self.stdout.write(f'⭐ Reviews: {len(pairs)}')
+
+    def synthetic_animal_ids(self):
+        return list(
+            Animal.objects.filter(owner__username__startswith=SYNTHETIC_PREFIX)
+            .values_list('id', flat=True)
+        )
+
+    def create_comments(self, count, user_ids):
+        animal_ids = self.synthetic_animal_ids()
+        if not animal_ids:
+            return
+        comments = [
+            Comment(
+                animal_id=self.rng.choice(animal_ids),
+                author_id=self.rng.choice(user_ids),
+                text=self.rng.choice(['Актуально?', 'Какая последняя цена?', 'Можно фото?', 'Где находитесь?']),
+                created_at=self.random_date(365),
+            )
+            for _ in range(count)
+        ]
+        self.bulk_create(Comment, comments)
+        self.stdout.write(f'💬 Comments: {count}')
+
+    def create_favorites(self, count, user_ids):
+        animal_ids = self.synthetic_animal_ids()
+        if not animal_ids:
+            return
+        Favorite = Animal.favorites.through
+        pairs = {(self.rng.choice(animal_ids), self.rng.choice(user_ids)) for _ in range(count)}
+        self.bulk_create(Favorite, [
+            Favorite(animal_id=animal_id, user_id=user_id) for animal_id, user_id in pairs
+        ], ignore_conflicts=True)
+        self.stdout.write(f'❤️ Favorites: {len(pairs)}')
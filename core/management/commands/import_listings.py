@@ -0,0 +1,94 @@
+"""
+Django management command: bulk import of listings for partner sellers
+Usage:
+    python manage.py import_listings listings.csv photos.zip --owner farm_hisor
+    python manage.py import_listings listings.jsonl photos.zip --owner farm_hisor --errors errors.csv
+    python manage.py import_listings --queue          # задачи со страницы /manager/import/
+    python manage.py import_listings --queue --once   # выполнить очередь и выйти (cron)
+
+Колонки - поля AnimalForm (category, title, description, price, city, phone, ...),
+main_photo - имя файла в архиве.
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.imports import ImportFileError, claim_job, detect_format, import_listings, run_job
+
+
+class Command(BaseCommand):
+    help = 'Import listings from CSV/JSONL with a ZIP archive of photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('data', nargs='?', help='CSV or JSONL file')
+        parser.add_argument('photos', nargs='?', help='ZIP archive with photos')
+        parser.add_argument('--owner', help='Username of the seller')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: by file extension')
+        parser.add_argument('--errors', default='import_errors.csv', help='Per-row error report (CSV)')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk_create (default IMPORT_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Photo processing threads (default IMPORT_WORKERS)')
+        parser.add_argument('--queue', action='store_true', help='Run import jobs queued on /manager/import/')
+        parser.add_argument('--once', action='store_true', help='With --queue: run queued jobs and exit')
+        parser.add_argument('--poll', type=float, default=10.0, help='With --queue: seconds between checks of an empty queue')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            self.run_queue(options)
+            return
+        if not (options['data'] and options['photos'] and options['owner']):
+            raise CommandError('data, photos and --owner are required (or use --queue)')
+
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['owner']}")
+
+        def progress(result):
+            self.stdout.write(f'  rows: {result.total}, created: {result.created}, errors: {result.failed}')
+
+        fmt = options['format'] or detect_format(options['data'])
+        try:
+            with open(options['data'], 'rb') as data_file, open(options['photos'], 'rb') as archive:
+                result = import_listings(
+                    data_file, fmt, archive, owner,
+                    batch_size=options['batch_size'], workers=options['workers'], progress=progress,
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        if result.errors:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as stream:
+                result.write_errors(stream)
+            self.stdout.write(self.style.WARNING(f"⚠️ {result.failed} row(s) rejected, see {options['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Imported {result.created} of {result.total} listing(s) for @{owner.username} (awaiting moderation)'
+        ))
+
+    def run_queue(self, options):
+        self.stdout.write(self.style.SUCCESS('📦 Import worker started'))
+        job = None
+        try:
+            while True:
+                close_old_connections()
+                job = claim_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                self.stdout.write(f'📥 #{job.pk} for @{job.owner.username} ({job.format})')
+                run_job(job, workers=options['workers'])
+                if job.status == 'done':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✅ #{job.pk}: imported {job.created} of {job.total}, {job.failed} row(s) rejected'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'❌ #{job.pk}: {job.error}'))
+        except KeyboardInterrupt:
+            if job is not None and job.status == 'running':
+                # Повтор создал бы уже импортированные строки ещё раз - задача завершается ошибкой
+                job.status, job.error = 'failed', f'Interrupted after {job.created} listing(s)'
+                job.save(update_fields=['status', 'error'])
+            self.stdout.write(self.style.WARNING('\n⚠️ Worker stopped by user'))
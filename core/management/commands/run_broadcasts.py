@@ -0,0 +1,69 @@
+"""
+Django management command: worker for bot broadcast campaigns
+Usage:
+    python manage.py run_broadcasts          # работает постоянно
+    python manage.py run_broadcasts --once   # разослать очередь и выйти (cron)
+    python manage.py run_broadcasts --campaign 12
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.broadcasts import SEND_BATCH_SIZE, campaign_progress, estimated_seconds, run_campaign
+from core.models import BroadcastCampaign
+
+
+class Command(BaseCommand):
+    help = 'Send queued Telegram broadcast campaigns with rate limiting (resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send queued campaigns and exit')
+        parser.add_argument('--campaign', type=int, help='Send only this campaign')
+        parser.add_argument('--poll', type=float, default=10.0, help='Seconds between checks of an empty queue')
+        parser.add_argument('--batch-size', type=int, default=SEND_BATCH_SIZE, help='Recipients per batch')
+
+    def handle(self, *args, **options):
+        if options['campaign']:
+            campaign = BroadcastCampaign.objects.filter(pk=options['campaign']).first()
+            if campaign is None:
+                raise CommandError(f"Campaign #{options['campaign']} not found")
+            self.send(campaign, options['batch_size'])
+            return
+
+        self.stdout.write(self.style.SUCCESS('📢 Broadcast worker started'))
+        try:
+            while True:
+                close_old_connections()
+                campaign = (
+                    BroadcastCampaign.objects.filter(status__in=['queued', 'running']).order_by('created_at').first()
+                )
+                if campaign is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                self.send(campaign, options['batch_size'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n⚠️ Worker stopped by user (progress is saved)'))
+
+    def send(self, campaign, batch_size):
+        pending = campaign_progress(campaign)['pending']
+        self.stdout.write(
+            f'📨 #{campaign.pk} {campaign.get_segment_display()}: {pending}/{campaign.total} left, '
+            f'~{estimated_seconds(pending) / 60:.1f} min'
+        )
+
+        def progress(campaign):
+            campaign.refresh_from_db(fields=['sent', 'failed', 'blocked'])
+            self.stdout.write(
+                f'   sent={campaign.sent} failed={campaign.failed} blocked={campaign.blocked} / {campaign.total}'
+            )
+
+        finished = run_campaign(campaign, batch_size=batch_size, progress=progress)
+        if finished:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ #{campaign.pk} done: sent {campaign.sent}, failed {campaign.failed}, blocked {campaign.blocked}'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(f'⏹️ #{campaign.pk} {campaign.get_status_display()}'))
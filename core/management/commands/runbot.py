@@ -2,23 +2,76 @@
 Django management command to run the GolubBozor Telegram Bot
 Premium Edition with Inline Keyboards & Markdown Formatting
 """
+import os
+
 import telebot
 from telebot import types
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from django.db import models
 from django.utils import timezone
-from core.models import Pigeon, UserProfile, Bid
+from core.models import Animal, UserProfile, Bid, BroadcastCampaign
 from core.utils import TELEGRAM_BOT_TOKEN
+from core.chat_profiles import profile_for_chat
+from core.bot_runtime import ChatSerialExecutor, InstrumentedTeleBot, install_request_metrics
+from core.metrics import start_metrics_server
+from core.moderation import pending_listings
+from core.inline_index import MAX_RESULTS as INLINE_MAX_RESULTS, inline_index
+from core.search import bot_search_page, recall_bot_query, remember_bot_query
+from core.notifications import animal_photo_path
+from core.telegram_files import (
+    cached_file_id, forget_file_id, is_stale_file_id_error, photo_file_id, remember_file_id,
+)
+from core.broadcasts import (
+    cancel_campaign, campaign_progress, estimated_seconds, segment_profiles, start_campaign,
+)
 
 
 class Command(BaseCommand):
     help = 'Run the GolubBozor Telegram Bot (Premium Edition)'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metrics-port', type=int, default=settings.BOT_METRICS_PORT,
+            help='Serve Prometheus /metrics on 127.0.0.1:<port> (0 = disabled)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.BOT_WORKERS,
+            help='Handler worker threads with per-chat ordering (0 = pyTelegramBotAPI default pool)'
+        )
+        parser.add_argument(
+            '--queue-size', type=int, default=settings.BOT_QUEUE_SIZE,
+            help='Max queued updates before polling pauses (backpressure)'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('🦅 Starting GolubBozor Premium Bot...'))
         
-        bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
+        # Метрики: латентность handlers и вызовов Bot API
+        install_request_metrics()
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+            self.stdout.write(self.style.SUCCESS(f"📈 Metrics: http://127.0.0.1:{options['metrics_port']}/metrics"))
+        
+        # Пул потоков: медленный handler одного чата не блокирует остальных,
+        # апдейты одного чата выполняются по порядку
+        executor = None
+        if options['workers'] > 0:
+            executor = ChatSerialExecutor(workers=options['workers'], queue_size=options['queue_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"🧵 Workers: {options['workers']}, queue: {options['queue_size']}"
+            ))
+        
+        # Bot API: реальный или локальный фейковый сервер (TELEGRAM_API_BASE, bot_loadtest)
+        telebot.apihelper.API_URL = f"{settings.TELEGRAM_API_BASE.rstrip('/')}/bot{{0}}/{{1}}"
+        
+        bot = InstrumentedTeleBot(TELEGRAM_BOT_TOKEN, executor=executor)
+        if executor is not None:
+            executor.on_error = bot._handle_exception
+        
+        # Индекс объявлений для inline-режима, обновляется в фоне
+        inline_index.start()
+        self.stdout.write(self.style.SUCCESS(f'🔎 Inline index: {len(inline_index)} listings'))
         
         # ==================== SET BOT COMMANDS ====================
         commands = [
@@ -37,10 +90,9 @@ class Command(BaseCommand):
         # ==================== HELPER FUNCTIONS ====================
         
         def get_user_from_telegram(chat_id):
-            """Fetch UserProfile from Telegram chat_id"""
+            """Fetch UserProfile from Telegram chat_id (кэш в памяти процесса - core/chat_profiles.py)"""
             try:
-                profile = UserProfile.objects.filter(telegram_chat_id=str(chat_id)).first()
-                return profile
+                return profile_for_chat(chat_id)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Error fetching user: {str(e)}'))
                 return None
@@ -77,6 +129,31 @@ class Command(BaseCommand):
                 welcome += f"\n\nПривет, *{profile.user.username}*! 💎"
             return welcome
         
+        def send_listing_photo(chat_id, animal, caption, markup):
+            """
+            Фото объявления: по file_id из кэша (core/telegram_files.py), иначе
+            загрузка файла с запоминанием file_id; без локального файла - по URL
+            """
+            path = animal_photo_path(animal)
+            if path and os.path.isfile(path):
+                file_id, digest = cached_file_id(path)
+                if file_id:
+                    try:
+                        return bot.send_photo(chat_id, file_id, caption=caption,
+                                              parse_mode='Markdown', reply_markup=markup)
+                    except telebot.apihelper.ApiTelegramException as e:
+                        if e.error_code != 400 or not is_stale_file_id_error(e.description):
+                            raise
+                        forget_file_id(path, digest)
+                with open(path, 'rb') as photo:
+                    sent = bot.send_photo(chat_id, photo, caption=caption,
+                                          parse_mode='Markdown', reply_markup=markup)
+                remember_file_id(path, digest, photo_file_id(sent))
+                return sent
+            
+            photo_url = f"https://magaj.pythonanywhere.com{animal.main_photo.url}"
+            return bot.send_photo(chat_id, photo_url, caption=caption, parse_mode='Markdown', reply_markup=markup)
+        
         # ==================== COMMAND HANDLERS ====================
         
         @bot.message_handler(commands=['start'])
@@ -138,10 +215,10 @@ class Command(BaseCommand):
             
             # Generate profile info
             user = profile.user
-            count_total = Pigeon.objects.filter(owner=user).count()
-            count_active = Pigeon.objects.filter(owner=user, is_approved=True, is_sold=False).count()
-            count_auctions = Pigeon.objects.filter(owner=user, listing_type='auction', is_approved=True, is_sold=False).count()
-            count_vip = Pigeon.objects.filter(owner=user, is_vip=True).count()
+            count_total = Animal.objects.filter(owner=user).count()
+            count_active = Animal.objects.filter(owner=user, is_approved=True, is_sold=False).count()
+            count_auctions = Animal.objects.filter(owner=user, listing_type='auction', is_approved=True, is_sold=False).count()
+            count_vip = Animal.objects.filter(owner=user, is_vip=True).count()
             
             profile_text = (
                 "👤 *ЛИЧНОЕ ДЕЛО*\n\n"
@@ -176,7 +253,7 @@ class Command(BaseCommand):
                 )
                 return
             
-            pigeons = Pigeon.objects.filter(owner=profile.user, is_approved=True)[:5]
+            pigeons = Animal.objects.filter(owner=profile.user, is_approved=True)[:5]
             
             if not pigeons:
                 pigeons_text = (
@@ -324,14 +401,14 @@ class Command(BaseCommand):
             
             # Get statistics for admin panel
             total_users = User.objects.count()
-            total_pigeons = Pigeon.objects.count()
-            pending_approval = Pigeon.objects.filter(is_approved=False).count()
-            pending_payments = Pigeon.objects.filter(
+            total_pigeons = Animal.objects.count()
+            pending_approval = pending_listings().count()
+            pending_payments = Animal.objects.filter(
                 listing_type='auction',
                 is_paid=False,
                 payment_receipt__isnull=False
             ).exclude(payment_receipt='').count()
-            active_auctions = Pigeon.objects.filter(
+            active_auctions = Animal.objects.filter(
                 listing_type='auction',
                 is_approved=True,
                 is_sold=False,
@@ -400,6 +477,204 @@ class Command(BaseCommand):
                 reply_markup=markup
             )
         
+        # ==================== BROADCASTS (core/broadcasts.py) ====================
+        
+        def broadcast_menu():
+            """Меню рассылок: выбор сегмента + последние рассылки"""
+            text = (
+                "📢 *РАССЫЛКА СООБЩЕНИЙ*\n\n"
+                "Выберите, кому отправить. Сообщения уходят с учётом лимитов Telegram, "
+                "заблокировавшие бота отвязываются автоматически.\n"
+            )
+            markup = types.InlineKeyboardMarkup(row_width=2)
+            markup.add(
+                types.InlineKeyboardButton('👥 Всем', callback_data='bc_seg:all'),
+                types.InlineKeyboardButton('🔨 Участникам аукционов', callback_data='bc_seg:bidders'),
+            )
+            markup.add(
+                types.InlineKeyboardButton('🏷️ Продавцам категории', callback_data='bc_pick:sellers_category'),
+                types.InlineKeyboardButton('📍 Продавцам города', callback_data='bc_pick:sellers_city'),
+            )
+            recent = BroadcastCampaign.objects.exclude(status='draft')[:3]
+            if recent:
+                text += "\n*Последние рассылки:*\n"
+            for campaign in recent:
+                text += f"#{campaign.pk} {campaign.get_status_display()}: {campaign.sent}/{campaign.total}\n"
+                markup.add(types.InlineKeyboardButton(
+                    f'📊 #{campaign.pk} прогресс', callback_data=f'bc_status:{campaign.pk}'
+                ))
+            markup.add(types.InlineKeyboardButton('🔙 Назад в админку', callback_data='admin_back'))
+            return text, markup
+        
+        def broadcast_status_text(campaign):
+            counts = campaign_progress(campaign)
+            return (
+                f"📢 *Рассылка #{campaign.pk}* - {campaign.get_status_display()}\n\n"
+                f"👥 Получателей: `{campaign.total}`\n"
+                f"✅ Доставлено: `{counts['sent']}`\n"
+                f"⏳ В очереди: `{counts['pending']}` (~{estimated_seconds(counts['pending']) / 60:.0f} мин)\n"
+                f"❌ Ошибок: `{counts['failed']}`\n"
+                f"🚫 Заблокировали бота: `{counts['blocked']}`"
+            )
+        
+        def broadcast_text_received(message, user, segment, value):
+            """Следующее сообщение админа после выбора сегмента - текст рассылки"""
+            text = (message.html_text or '').strip() if message.content_type == 'text' else ''
+            if not text or text.startswith('/'):
+                bot.send_message(message.chat.id, "❌ Рассылка отменена.")
+                return
+            
+            campaign = BroadcastCampaign.objects.create(
+                text=text, segment=segment, segment_value=value, created_by=user,
+            )
+            recipients = segment_profiles(segment, value).count()
+            value_label = dict(Animal.CATEGORY_CHOICES + Animal.CITY_CHOICES).get(value, value)
+            
+            markup = types.InlineKeyboardMarkup()
+            markup.add(
+                types.InlineKeyboardButton(f'✅ Отправить ({recipients})', callback_data=f'bc_start:{campaign.pk}'),
+                types.InlineKeyboardButton('❌ Отмена', callback_data=f'bc_cancel:{campaign.pk}'),
+            )
+            bot.send_message(message.chat.id, "👀 Так увидят сообщение получатели:")
+            bot.send_message(message.chat.id, text, parse_mode='HTML')
+            bot.send_message(
+                message.chat.id,
+                f"{campaign.get_segment_display()}"
+                f"{' (' + value_label + ')' if value else ''}: *{recipients}* получателей, "
+                f"~{estimated_seconds(recipients) / 60:.0f} мин.",
+                parse_mode='Markdown',
+                reply_markup=markup
+            )
+        
+        def broadcast_callback(call, profile):
+            """admin_broadcast и кнопки bc_*"""
+            chat_id = call.message.chat.id
+            message_id = call.message.message_id
+            action, _, arg = call.data.partition(':')
+            
+            if call.data == 'admin_broadcast':
+                text, markup = broadcast_menu()
+                bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text,
+                                      parse_mode='Markdown', reply_markup=markup)
+            
+            elif action == 'bc_pick':
+                choices = Animal.CATEGORY_CHOICES if arg == 'sellers_category' else Animal.CITY_CHOICES
+                markup = types.InlineKeyboardMarkup(row_width=3)
+                markup.add(*[
+                    types.InlineKeyboardButton(label, callback_data=f'bc_seg:{arg}:{value}')
+                    for value, label in choices
+                ])
+                markup.add(types.InlineKeyboardButton('🔙 Назад', callback_data='admin_broadcast'))
+                bot.edit_message_text(chat_id=chat_id, message_id=message_id,
+                                      text="Выберите категорию:" if arg == 'sellers_category' else "Выберите город:",
+                                      reply_markup=markup)
+            
+            elif action == 'bc_seg':
+                segment, _, value = arg.partition(':')
+                prompt = bot.send_message(
+                    chat_id,
+                    "✍️ Отправьте текст рассылки одним сообщением (форматирование сохранится).\n"
+                    "Любая команда - отмена."
+                )
+                bot.register_next_step_handler(prompt, broadcast_text_received, profile.user, segment, value)
+            
+            elif action in ('bc_start', 'bc_cancel', 'bc_status'):
+                campaign = BroadcastCampaign.objects.filter(pk=int(arg)).first()
+                if campaign is None:
+                    bot.answer_callback_query(call.id, "Рассылка не найдена", show_alert=True)
+                    return
+                if action == 'bc_start' and campaign.status == 'draft':
+                    start_campaign(campaign)
+                elif action == 'bc_cancel':
+                    cancel_campaign(campaign)
+                    campaign.refresh_from_db()
+                
+                markup = types.InlineKeyboardMarkup()
+                if campaign.status in ('queued', 'running'):
+                    markup.add(
+                        types.InlineKeyboardButton('🔄 Обновить', callback_data=f'bc_status:{campaign.pk}'),
+                        types.InlineKeyboardButton('⏹️ Остановить', callback_data=f'bc_cancel:{campaign.pk}'),
+                    )
+                markup.add(types.InlineKeyboardButton('📢 Рассылки', callback_data='admin_broadcast'))
+                try:
+                    bot.edit_message_text(chat_id=chat_id, message_id=message_id,
+                                          text=broadcast_status_text(campaign), parse_mode='Markdown', reply_markup=markup)
+                except telebot.apihelper.ApiTelegramException as e:
+                    if 'message is not modified' not in str(e):  # "Обновить" без изменений
+                        raise
+            
+            bot.answer_callback_query(call.id)
+        
+        # ==================== SEARCH RESULTS ====================
+        
+        def escape_markdown(text):
+            """Экранирование для parse_mode='Markdown' (не MarkdownV2)"""
+            for char in ('_', '*', '`', '['):
+                text = text.replace(char, '\\' + char)
+            return text
+        
+        def search_results_message(search_query, page=1):
+            """Текст страницы результатов и кнопки листания (srch:<страница>:<ключ запроса>)"""
+            result = bot_search_page(search_query, page)
+            shown_query = escape_markdown(search_query)
+            
+            if not result['total']:
+                text = (
+                    f"🦅 По запросу '*{shown_query}*' ничего не найдено.\n\n"
+                    "Попробуйте другое название или просмотрите каталог на сайте."
+                )
+                return text, None
+            
+            text = f"🦅 *Найдено по запросу '{shown_query}': {result['total']}*\n"
+            if result['corrected']:
+                text += f"🔤 _Показаны результаты для «{escape_markdown(result['query'])}»_\n"
+            text += "\n"
+            
+            start = (result['page'] - 1) * settings.BOT_SEARCH_PAGE_SIZE
+            for idx, item in enumerate(result['items'], start + 1):
+                text += (
+                    f"{idx}. *{escape_markdown(item['title'])}*\n"
+                    f"   💰 {item['price']} TJS\n"
+                    f"   🔗 /view\\_{item['id']}\n\n"
+                )
+            text += "💡 _Нажмите /view\\_ID для подробностей_"
+            
+            markup = None
+            if result['pages'] > 1:
+                digest = remember_bot_query(search_query)
+                buttons = []
+                if result['page'] > 1:
+                    buttons.append(types.InlineKeyboardButton(
+                        '◀️ Назад', callback_data=f"srch:{result['page'] - 1}:{digest}"
+                    ))
+                buttons.append(types.InlineKeyboardButton(
+                    f"{result['page']}/{result['pages']}", callback_data=f"srch:{result['page']}:{digest}"
+                ))
+                if result['page'] < result['pages']:
+                    buttons.append(types.InlineKeyboardButton(
+                        'Далее ▶️', callback_data=f"srch:{result['page'] + 1}:{digest}"
+                    ))
+                markup = types.InlineKeyboardMarkup()
+                markup.row(*buttons)
+            return text, markup
+        
+        def search_callback(call):
+            """Кнопки листания результатов поиска"""
+            _, page, digest = call.data.split(':', 2)
+            search_query = recall_bot_query(digest)
+            if search_query is None:
+                bot.answer_callback_query(call.id, "⌛ Поиск устарел, отправьте запрос ещё раз", show_alert=True)
+                return
+            
+            text, markup = search_results_message(search_query, int(page))
+            try:
+                bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id,
+                                      text=text, parse_mode='Markdown', reply_markup=markup)
+            except telebot.apihelper.ApiTelegramException as e:
+                if 'message is not modified' not in str(e):  # кнопка текущей страницы
+                    raise
+            bot.answer_callback_query(call.id)
+        
         # ==================== CALLBACK QUERY HANDLERS ====================
         
         @bot.callback_query_handler(func=lambda call: True)
@@ -434,11 +709,11 @@ class Command(BaseCommand):
                 # ===== PROFILE =====
                 elif call.data == 'profile':
                     user = profile.user
-                    count_total = Pigeon.objects.filter(owner=user).count()
-                    count_active = Pigeon.objects.filter(owner=user, is_approved=True, is_sold=False).count()
-                    count_auctions = Pigeon.objects.filter(owner=user, listing_type='auction', is_approved=True, is_sold=False).count()
-                    count_vip = Pigeon.objects.filter(owner=user, is_vip=True).count()
-                    count_sold = Pigeon.objects.filter(owner=user, is_sold=True).count()
+                    count_total = Animal.objects.filter(owner=user).count()
+                    count_active = Animal.objects.filter(owner=user, is_approved=True, is_sold=False).count()
+                    count_auctions = Animal.objects.filter(owner=user, listing_type='auction', is_approved=True, is_sold=False).count()
+                    count_vip = Animal.objects.filter(owner=user, is_vip=True).count()
+                    count_sold = Animal.objects.filter(owner=user, is_sold=True).count()
                     
                     profile_text = (
                         "👤 *ЛИЧНОЕ ДЕЛО*\n\n"
@@ -464,7 +739,7 @@ class Command(BaseCommand):
                 
                 # ===== MY PIGEONS =====
                 elif call.data == 'my_pigeons':
-                    pigeons = Pigeon.objects.filter(owner=profile.user, is_approved=True)[:5]
+                    pigeons = Animal.objects.filter(owner=profile.user, is_approved=True)[:5]
                     
                     if not pigeons:
                         pigeons_text = (
@@ -504,7 +779,7 @@ class Command(BaseCommand):
                 # ===== BALANCE =====
                 elif call.data == 'balance':
                     user = profile.user
-                    total_sales = Pigeon.objects.filter(owner=user, is_sold=True).count()
+                    total_sales = Animal.objects.filter(owner=user, is_sold=True).count()
                     
                     balance_text = (
                         "💰 *ФИНАНСЫ*\n\n"
@@ -545,7 +820,7 @@ class Command(BaseCommand):
                 
                 # ===== ADMIN PANEL CALLBACKS =====
                 elif call.data == 'admin_pending':
-                    pending = Pigeon.objects.filter(is_approved=False).order_by('-created_at')[:5]
+                    pending = pending_listings().order_by('-created_at')[:5]
                     
                     if not pending:
                         text = "✅ *Нет объявлений ожидающих одобрения*"
@@ -574,7 +849,7 @@ class Command(BaseCommand):
                     bot.answer_callback_query(call.id)
                 
                 elif call.data == 'admin_payments':
-                    pending_payments = Pigeon.objects.filter(
+                    pending_payments = Animal.objects.filter(
                         listing_type='auction',
                         is_paid=False,
                         payment_receipt__isnull=False
@@ -607,12 +882,12 @@ class Command(BaseCommand):
                 
                 elif call.data == 'admin_stats':
                     total_users = User.objects.count()
-                    total_pigeons = Pigeon.objects.count()
-                    approved = Pigeon.objects.filter(is_approved=True).count()
-                    pending = Pigeon.objects.filter(is_approved=False).count()
-                    vip = Pigeon.objects.filter(is_vip=True).count()
-                    sold = Pigeon.objects.filter(is_sold=True).count()
-                    active_auctions = Pigeon.objects.filter(
+                    total_pigeons = Animal.objects.count()
+                    approved = Animal.objects.filter(is_approved=True).count()
+                    pending = pending_listings().count()
+                    vip = Animal.objects.filter(is_vip=True).count()
+                    sold = Animal.objects.filter(is_sold=True).count()
+                    active_auctions = Animal.objects.filter(
                         listing_type='auction',
                         is_approved=True,
                         is_sold=False,
@@ -686,48 +961,30 @@ class Command(BaseCommand):
                     )
                     bot.answer_callback_query(call.id)
                 
-                elif call.data == 'admin_broadcast':
+                elif call.data.startswith('srch:'):
+                    search_callback(call)
+                
+                elif call.data == 'admin_broadcast' or call.data.startswith('bc_'):
                     # Superuser only
-                    if not profile.user.is_superuser:
+                    if not profile or not profile.user.is_superuser:
                         bot.answer_callback_query(call.id, "🚫 Только для суперадминов", show_alert=True)
                         return
                     
-                    text = (
-                        "📢 *РАССЫЛКА СООБЩЕНИЙ*\n\n"
-                        "⚠️ Функция находится в разработке.\n\n"
-                        "В будущем здесь можно будет:\n"
-                        "• Отправлять сообщения всем пользователям\n"
-                        "• Создавать таргетированные рассылки\n"
-                        "• Просматривать статистику доставки\n\n"
-                        "Пока используйте Telegram Channel для анонсов."
-                    )
-                    
-                    markup = types.InlineKeyboardMarkup()
-                    markup.add(types.InlineKeyboardButton('📢 Открыть Channel', url='https://t.me/GolubBozorChannel'))
-                    markup.add(types.InlineKeyboardButton('🔙 Назад в админку', callback_data='admin_back'))
-                    
-                    bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=text,
-                        parse_mode='Markdown',
-                        reply_markup=markup
-                    )
-                    bot.answer_callback_query(call.id)
+                    broadcast_callback(call, profile)
                 
                 elif call.data == 'admin_back':
                     # Return to admin panel
                     # Re-call admin command logic
                     user = profile.user
                     total_users = User.objects.count()
-                    total_pigeons = Pigeon.objects.count()
-                    pending_approval = Pigeon.objects.filter(is_approved=False).count()
-                    pending_payments = Pigeon.objects.filter(
+                    total_pigeons = Animal.objects.count()
+                    pending_approval = pending_listings().count()
+                    pending_payments = Animal.objects.filter(
                         listing_type='auction',
                         is_paid=False,
                         payment_receipt__isnull=False
                     ).exclude(payment_receipt='').count()
-                    active_auctions = Pigeon.objects.filter(
+                    active_auctions = Animal.objects.filter(
                         listing_type='auction',
                         is_approved=True,
                         is_sold=False,
@@ -802,57 +1059,63 @@ class Command(BaseCommand):
         
         @bot.message_handler(func=lambda message: not message.text.startswith('/'))
         def search_handler(message):
-            """Handle text search for pigeons"""
+            """Handle text search for pigeons (core/search.py, по 5 результатов с листанием)"""
             try:
                 search_query = message.text.strip()
                 
                 if not search_query:
                     return
                 
-                # Search in Pigeon model
-                results = Pigeon.objects.filter(
-                    models.Q(title__icontains=search_query) | models.Q(description__icontains=search_query),
-                    is_approved=True,
-                    is_sold=False
-                ).order_by('-created_at')[:3]
-                
-                if results:
-                    response = f"🦅 *Найдено по запросу '{search_query}':*\n\n"
-                    
-                    for idx, pigeon in enumerate(results, 1):
-                        if pigeon.listing_type == 'auction':
-                            price = f"{pigeon.current_price} TJS"
-                        else:
-                            price = f"{pigeon.price} TJS"
-                        
-                        response += (
-                            f"{idx}. *{pigeon.title}*\n"
-                            f"   💰 {price}\n"
-                            f"   🔗 /view\\_{pigeon.id}\n\n"
-                        )
-                    
-                    response += "💡 _Нажмите /view\\_ID для подробностей_"
-                    
-                    bot.send_message(
-                        message.chat.id,
-                        response,
-                        parse_mode='Markdown'
-                    )
-                else:
-                    bot.send_message(
-                        message.chat.id,
-                        f"🦅 По запросу '*{search_query}*' ничего не найдено.\n\n"
-                        "Попробуйте другое название или просмотрите каталог на сайте.",
-                        parse_mode='Markdown'
-                    )
+                text, markup = search_results_message(search_query)
+                bot.send_message(message.chat.id, text, parse_mode='Markdown', reply_markup=markup)
                     
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Search error: {str(e)}'))
                 bot.send_message(message.chat.id, "❌ Ошибка поиска. Попробуйте позже.")
         
+        # ==================== INLINE MODE ====================
+        
+        def inline_result(entry):
+            """Статья inline-ответа: миниатюра фото, цена и ссылка на объявление"""
+            url = f"{settings.BOT_SITE_URL}/animal/{entry.pk}/"
+            price = f"{entry.price} TJS" if entry.price else "Цена договорная"
+            badge = "🔨 " if entry.listing_type == 'auction' else ""
+            vip = "💎 " if entry.is_vip else ""
+            text = (
+                f"{vip}*{escape_markdown(entry.title)}*\n"
+                f"{badge}💰 {price}\n"
+                f"📍 {escape_markdown(entry.city or 'Не указана')}\n\n"
+                f"🔗 [Открыть на сайте]({url})"
+            )
+            return types.InlineQueryResultArticle(
+                id=str(entry.pk),
+                title=f"{vip}{entry.title}",
+                description=" · ".join(part for part in (price, entry.breed, entry.city) if part),
+                input_message_content=types.InputTextMessageContent(text, parse_mode='Markdown'),
+                url=url,
+                thumbnail_url=f"{settings.BOT_SITE_URL}{settings.MEDIA_URL}{entry.photo}" if entry.photo else None,
+            )
+        
+        @bot.inline_handler(func=lambda query: True)
+        def inline_query_handler(query):
+            """@bot <запрос> в любом чате (включить в @BotFather: /setinline): поиск по индексу в памяти без БД"""
+            try:
+                offset = int(query.offset or 0)
+                entries = inline_index.search(query.query, offset=offset)
+                next_offset = str(offset + len(entries)) if len(entries) == INLINE_MAX_RESULTS else ''
+                bot.answer_inline_query(
+                    query.id,
+                    [inline_result(entry) for entry in entries],
+                    cache_time=settings.INLINE_CACHE_TIME,
+                    is_personal=False,
+                    next_offset=next_offset,
+                )
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Inline query error: {str(e)}'))
+        
         # ==================== VIEW DETAILS HANDLER ====================
         
-        @bot.message_handler(commands=['view'])
+        @bot.message_handler(func=lambda message: message.text and message.text.startswith('/view'))
         def view_command_handler(message):
             """Handle /view_<id> command - Show pigeon details"""
             try:
@@ -869,7 +1132,7 @@ class Command(BaseCommand):
                     return
                 
                 pigeon_id = int(command[1])
-                pigeon = Pigeon.objects.filter(id=pigeon_id, is_approved=True).first()
+                pigeon = Animal.objects.filter(id=pigeon_id, is_approved=True).first()
                 
                 if not pigeon:
                     bot.send_message(
@@ -888,7 +1151,7 @@ class Command(BaseCommand):
                 else:
                     price_info = f"💰 Цена: *{pigeon.price} TJS*"
                 
-                location = pigeon.location if pigeon.location else "Не указана"
+                location = pigeon.get_city_display() if pigeon.city else "Не указана"
                 seller_name = pigeon.owner.username
                 description = pigeon.description[:500] if pigeon.description else "Описание отсутствует"
                 
@@ -900,29 +1163,22 @@ class Command(BaseCommand):
                     f"👤 Продавец: @{seller_name}\n"
                     f"👁 Просмотров: {pigeon.views_count}\n\n"
                     f"📝 *Описание:*\n{description}\n\n"
-                    f"🔗 [Открыть на сайте](https://magaj.pythonanywhere.com/pigeon/{pigeon.id}/)"
+                    f"🔗 [Открыть на сайте](https://magaj.pythonanywhere.com/animal/{pigeon.id}/)"
                 )
                 
                 # Create Buy Now button (WebApp to specific page)
                 markup = types.InlineKeyboardMarkup()
                 btn_buy = types.InlineKeyboardButton(
                     '🛒 Купить / Сделать ставку',
-                    web_app=types.WebAppInfo(url=f'https://magaj.pythonanywhere.com/pigeon/{pigeon.id}/')
+                    web_app=types.WebAppInfo(url=f'https://magaj.pythonanywhere.com/animal/{pigeon.id}/')
                 )
                 markup.add(btn_buy)
                 markup.add(types.InlineKeyboardButton('🔙 Главное меню', callback_data='back_to_main'))
                 
                 # Send photo if exists
-                if pigeon.image:
+                if pigeon.main_photo:
                     try:
-                        photo_url = f"https://magaj.pythonanywhere.com{pigeon.image.url}"
-                        bot.send_photo(
-                            message.chat.id,
-                            photo_url,
-                            caption=details_text,
-                            parse_mode='Markdown',
-                            reply_markup=markup
-                        )
+                        send_listing_photo(message.chat.id, pigeon, details_text, markup)
                     except Exception as photo_error:
                         # If photo fails, send text only
                         self.stdout.write(self.style.WARNING(f'Photo error: {str(photo_error)}'))
@@ -962,3 +1218,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('\n⚠️ Bot stopped by user'))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'❌ Bot error: {str(e)}'))
+        finally:
+            inline_index.stop()
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,57 @@
+"""
+Django management command: worker for the Telegram notification queue
+Usage:
+    python manage.py send_notifications          # работает постоянно
+    python manage.py send_notifications --once   # отправить очередь и выйти (cron)
+    python manage.py send_notifications --concurrent --batch-size 500  # параллельно (core.telegram_async)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.notifications import claim_batch, deliver, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued Telegram notifications with rate limiting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+        parser.add_argument('--interval', type=float, default=settings.NOTIFICATION_SEND_INTERVAL,
+                            help='Seconds between messages (Telegram rate limit)')
+        parser.add_argument('--poll', type=float, default=5.0, help='Seconds between checks of an empty queue')
+        parser.add_argument('--batch-size', type=int, default=20, help='Notifications claimed per query')
+        parser.add_argument('--concurrent', action='store_true',
+                            help='Send each batch in parallel with per-chat/global rate limits (httpx)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('📨 Notification worker started'))
+        sent = failed = 0
+        try:
+            while True:
+                close_old_connections()
+                batch = claim_batch(options['batch_size'])
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                if options['concurrent']:
+                    results = deliver_batch(batch)
+                    sent += sum(results)
+                    failed += len(results) - sum(results)
+                    continue
+
+                for notification in batch:
+                    if deliver(notification):
+                        sent += 1
+                    else:
+                        failed += 1
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n⚠️ Worker stopped by user'))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Sent: {sent}, failed: {failed}'))
@@ -0,0 +1,399 @@
+"""
+Runtime metrics for ZooBozor in Prometheus text format.
+
+Небольшой потокобезопасный реестр (Counter / Gauge / Histogram) без
+внешних зависимостей. Метрики живут в памяти процесса:
+
+- web: /metrics (staff или METRICS_TOKEN), данные заполняет
+  RequestTimingMiddleware и core.utils.send_telegram_message
+- bot: python manage.py runbot --metrics-port 9101
+
+Несколько gunicorn workers: scrape /metrics попадает в случайный worker,
+поэтому без общего хранилища счётчики "прыгали" бы между scrape. С
+METRICS_DIR каждый процесс сбрасывает свои счётчики и гистограммы в
+<METRICS_DIR>/<pid>.json (не чаще METRICS_FLUSH_INTERVAL), а /metrics
+суммирует файлы всех процессов - значения других workers отстают не больше
+чем на интервал. Файлы завершившихся workers остаются, чтобы суммы не
+уменьшались; каталог очищается при деплое. Gauge - значение текущего процесса.
+Без METRICS_DIR (один процесс, runbot) всё только в памяти.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Секунды: от быстрых SQL до медленной загрузки фото в Telegram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_name = 'untyped'
+    shared = False  # суммируется между процессами (METRICS_DIR)
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name}: expected labels {self.labelnames}, got {tuple(labels)}')
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def samples(self, values=None):
+        """[(suffix, labels, value)]; values - состояние вместо своего (сумма процессов)"""
+        raise NotImplementedError
+
+    def state(self):
+        """Копия значений {labels: value} для сброса в файл процесса"""
+        with self._lock:
+            return {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+
+    def render(self, values=None):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        for suffix, labels, value in self.samples(values):
+            lines.append(f'{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type_name = 'counter'
+    shared = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def samples(self, values=None):
+        if values is None:
+            values = self.state()
+        return [('', key, value) for key, value in sorted(values.items())]
+
+
+class Gauge(Metric):
+    """
+    Gauge без меток. Значение задаётся set() или функцией set_function(),
+    которая вызывается при каждом scrape (например, длина очереди в БД).
+    """
+    type_name = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._value = None
+        self._function = None
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def samples(self, values=None):
+        if self._function is not None:
+            try:
+                return [('', (), self._function())]
+            except Exception as e:
+                logger.warning(f"Gauge {self.name} callback failed: {e}")
+                return []
+        with self._lock:
+            return [] if self._value is None else [('', (), self._value)]
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+    shared = True
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def merge(total, state):
+        return state if total is None else [a + b for a, b in zip(total, state)]
+
+    def samples(self, values=None):
+        if values is None:
+            values = self.state()
+        result = []
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                result.append(('_bucket', key + (('le', _format_value(float(bound))),), cumulative))
+            result.append(('_sum', key, state[-2]))
+            result.append(('_count', key, state[-1]))
+        return result
+
+
+_UNSET = object()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._dumped_at = 0.0
+        self.directory = _UNSET  # METRICS_DIR, читается при первом обращении
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric already registered: {metric.name}')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation):
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        totals = self.collect() if self.shared_dir() else {}
+        return '\n'.join(metric.render(totals.get(metric.name)) for metric in metrics) + '\n'
+
+    # ---------- несколько процессов (METRICS_DIR) ----------
+
+    def dump(self):
+        """Записать счётчики и гистограммы процесса в <METRICS_DIR>/<pid>.json"""
+        directory = self.shared_dir()
+        if directory is None:
+            return
+        with self._lock:
+            metrics = [metric for metric in self._metrics.values() if metric.shared]
+        data = {
+            metric.name: [[list(key), value] for key, value in metric.state().items()]
+            for metric in metrics
+        }
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{os.getpid()}.json'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp, path)  # читатель не увидит недописанный файл
+        self._dumped_at = time.monotonic()
+
+    def maybe_dump(self):
+        """dump(), если с прошлого прошло больше METRICS_FLUSH_INTERVAL"""
+        if self.shared_dir() and time.monotonic() - self._dumped_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.dump()
+
+    def collect(self):
+        """{метрика: {labels: сумма по процессам}}; свой процесс - текущие значения"""
+        self.dump()
+        totals = {}
+        for path in self.shared_dir().glob('*.json'):
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue  # файл удалён / повреждён - пропустить до следующего scrape
+            for name, items in data.items():
+                metric = self._metrics.get(name)
+                if metric is None or not metric.shared:
+                    continue
+                values = totals.setdefault(name, {})
+                for key, value in items:
+                    key = tuple(tuple(pair) for pair in key)
+                    values[key] = metric.merge(values.get(key), value)
+        return totals
+
+    def shared_dir(self):
+        if self.directory is _UNSET:
+            self.directory = Path(settings.METRICS_DIR) if settings.METRICS_DIR else None
+        return self.directory
+
+
+REGISTRY = Registry()
+
+
+# ==================== WEB ====================
+
+http_request_duration = REGISTRY.histogram(
+    'zoobozor_http_request_duration_seconds',
+    'HTTP request latency by URL name',
+    ['view', 'method'],
+)
+http_requests = REGISTRY.counter(
+    'zoobozor_http_requests_total',
+    'HTTP requests by URL name and status code',
+    ['view', 'method', 'status'],
+)
+db_queries = REGISTRY.counter(
+    'zoobozor_db_queries_total',
+    'SQL queries executed while handling HTTP requests',
+    ['view'],
+)
+db_query_seconds = REGISTRY.counter(
+    'zoobozor_db_query_seconds_total',
+    'Time spent in SQL queries while handling HTTP requests',
+    ['view'],
+)
+http_compression_bytes = REGISTRY.counter(
+    'zoobozor_http_compression_bytes_total',
+    'Dynamic response bytes before (stage=in) and after (stage=out) compression',
+    ['encoding', 'stage'],
+)
+http_compression_skipped = REGISTRY.counter(
+    'zoobozor_http_compression_skipped_total',
+    'Compressible responses sent uncompressed (small, csrf_form, not_smaller)',
+    ['reason'],
+)
+
+# ==================== TELEGRAM ====================
+
+telegram_send_duration = REGISTRY.histogram(
+    'zoobozor_telegram_send_duration_seconds',
+    'Telegram Bot API call latency',
+    ['method'],
+)
+telegram_send_failures = REGISTRY.counter(
+    'zoobozor_telegram_send_failures_total',
+    'Failed Telegram Bot API calls',
+    ['method', 'reason'],
+)
+telegram_file_cache_lookups = REGISTRY.counter(
+    'zoobozor_telegram_file_cache_lookups_total',
+    'Photo sends served by cached Telegram file_id (hit) or uploaded (miss)',
+    ['result'],
+)
+notification_queue_depth = REGISTRY.gauge(
+    'zoobozor_notification_queue_depth',
+    'Telegram notifications waiting to be sent',
+)
+
+# ==================== BOT ====================
+
+bot_handler_duration = REGISTRY.histogram(
+    'zoobozor_bot_handler_duration_seconds',
+    'Telegram bot handler latency',
+    ['handler'],
+)
+bot_handler_errors = REGISTRY.counter(
+    'zoobozor_bot_handler_errors_total',
+    'Telegram bot handler exceptions',
+    ['handler'],
+)
+bot_task_queue_depth = REGISTRY.gauge(
+    'zoobozor_bot_task_queue_depth',
+    'Telegram bot updates waiting for a worker',
+)
+bot_task_wait = REGISTRY.histogram(
+    'zoobozor_bot_task_wait_seconds',
+    'Time a bot update waited in the queue before a worker picked it up',
+)
+bot_profile_cache_lookups = REGISTRY.counter(
+    'zoobozor_bot_profile_cache_lookups_total',
+    'chat_id -> profile lookups served from the bot process cache (hit) or the database (miss)',
+    ['result'],
+)
+
+
+def record_request(view, method, status, duration_s, query_count, db_s):
+    """Вызывается из RequestTimingMiddleware для каждого запроса"""
+    view = view or 'unresolved'  # 404 и т.п. - не плодить метки по path
+    http_request_duration.observe(duration_s, view=view, method=method)
+    http_requests.inc(view=view, method=method, status=str(status))
+    db_queries.inc(query_count, view=view)
+    db_query_seconds.inc(db_s, view=view)
+    REGISTRY.maybe_dump()
+
+
+# ==================== STANDALONE SERVER (bot) ====================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        try:
+            body = REGISTRY.render().encode('utf-8')
+        finally:
+            # Gauge (очередь уведомлений) читает БД из потока сервера - поток
+            # завершится, а соединение осталось бы открытым
+            connections.close_all()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # не засорять вывод бота строками access-лога
+
+
+def start_metrics_server(port, addr='127.0.0.1'):
+    """Отдавать /metrics на отдельном порту в фоновом потоке (для runbot)"""
+    REGISTRY.directory = None  # свой порт - свои значения, без файлов web workers
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
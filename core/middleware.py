@@ -0,0 +1,337 @@
+"""
+Middleware for ZooBozor
+"""
+import json
+import logging
+import random
+import re
+import zlib
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import metrics as prometheus
+from .instrumentation import RequestMetrics, current_metrics, record_query
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli есть в requirements.txt (WhiteNoise)
+    brotli = None
+
+logger = logging.getLogger('core.performance')
+
+
+class RequestTimingMiddleware:
+    """
+    Количество SQL запросов, время БД, рендера шаблонов и попадания в кэш
+    для каждого запроса.
+
+    - заголовок Server-Timing (виден в DevTools -> Network -> Timing)
+    - структурированная строка лога (JSON) в логгер core.performance
+      (уровень INFO, по умолчанию выключен - PERFORMANCE_LOG_LEVEL)
+    - медленные запросы (SLOW_REQUEST_MS) логируются вместе с самыми
+      долгими SQL и повторяющимися запросами (признак N+1)
+    - гистограммы и счётчики для /metrics (core.metrics)
+
+    Работает и в async цепочке (ASGI + core/views_async.py) - без лишнего
+    перехода async -> sync -> async на каждом запросе.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.sample_rate = getattr(settings, 'SLOW_REQUEST_SAMPLE_RATE', 1.0)
+        self.max_logged_queries = getattr(settings, 'SLOW_REQUEST_MAX_QUERIES', 20)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack)
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            # Соединения с БД привязаны к потоку: обёртки ставятся в том же
+            # потоке (thread_sensitive), где async ORM выполняет запросы
+            stack = ExitStack()
+            await sync_to_async(self.wrap_connections)(stack)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            current_metrics.reset(token)
+
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def wrap_connections(stack):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(record_query))
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.elapsed_ms()
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(metrics, total_ms)
+        self.log_request(request, response, metrics, total_ms)
+
+        match = request.resolver_match
+        prometheus.record_request(
+            match.view_name if match else None, request.method, response.status_code,
+            total_ms / 1000, metrics.query_count, metrics.db_ms / 1000,
+        )
+        return response
+
+    @staticmethod
+    def server_timing_header(metrics, total_ms):
+        return ', '.join([
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.query_count} queries"',
+            f'tpl;dur={metrics.template_ms:.1f}',
+            f'cache;desc="hits={metrics.cache_hits} misses={metrics.cache_misses}"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+    def log_request(self, request, response, metrics, total_ms):
+        match = request.resolver_match
+        duplicates = metrics.duplicate_queries()
+        record = {
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 1),
+            'db_queries': metrics.query_count,
+            'db_ms': round(metrics.db_ms, 1),
+            'duplicate_queries': sum(duplicates.values()),
+            'template_ms': round(metrics.template_ms, 1),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+        }
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record, ensure_ascii=False))
+
+        if total_ms >= self.slow_ms and random.random() < self.sample_rate:
+            record['event'] = 'slow_request'
+            record['slowest_sql'] = [
+                {'sql': sql, 'ms': round(ms, 2)}
+                for sql, ms in metrics.slowest_queries(self.max_logged_queries)
+            ]
+            record['repeated_sql'] = [
+                {'sql': sql, 'count': count}
+                for sql, count in sorted(duplicates.items(), key=lambda item: -item[1])
+            ][:self.max_logged_queries]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+# ==================== СЖАТИЕ ОТВЕТОВ ====================
+
+# Статику сжимает WhiteNoise заранее; здесь - HTML, JSON, CSV и JSONL из views
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/manifest+json', 'application/x-ndjson', 'image/svg+xml',
+)
+ACCEPT_ENCODING_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*(?:,|$)')
+POST_FORM_RE = re.compile(rb'<form\b[^>]*\bmethod\s*=\s*["\']?post', re.IGNORECASE)
+CSRF_INPUT = b'csrfmiddlewaretoken'
+
+
+def accepted_encodings(header):
+    """Accept-Encoding -> {кодировка: q} (q=0 - кодировка запрещена)"""
+    encodings = {}
+    for name, q in ACCEPT_ENCODING_RE.findall(header or ''):
+        try:
+            encodings[name.lower()] = float(q) if q else 1.0
+        except ValueError:
+            encodings[name.lower()] = 0.0
+    return encodings
+
+
+def has_csrf_form(content):
+    """
+    Есть ли в HTML POST-форма с CSRF-токеном. Скрытый токен для AJAX вне
+    формы (base.html) не считается: он маскируется заново в каждом ответе
+    """
+    for match in POST_FORM_RE.finditer(content):
+        end = content.find(b'</form', match.end())
+        if CSRF_INPUT in content[match.end():end if end != -1 else len(content)]:
+            return True
+    return False
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 - gzip-заголовок
+
+    def process(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие динамических ответов: Brotli (если установлен brotli), иначе gzip -
+    по Accept-Encoding клиента.
+
+    - ответы меньше COMPRESSION_MIN_SIZE не сжимаются (заголовки дороже выигрыша)
+    - StreamingHttpResponse (выгрузки) сжимается потоком: каждый кусок
+      уходит клиенту сразу (flush), в памяти весь ответ не собирается
+    - BREACH: страницы с POST-формой, несущей CSRF-токен, отдаются без
+      сжатия (COMPRESSION_SKIP_CSRF_FORMS) - длина сжатого ответа с секретом
+      рядом с отражённым вводом не должна зависеть от их совпадения. На деле
+      это страницы авторизованного пользователя (форма выхода в шапке) и
+      формы добавления / оплаты; публичный каталог сжимается
+    - уже сжатое (Content-Encoding), Cache-Control: no-transform и
+      несжимаемые типы пропускаются; ETag становится слабым (W/)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY
+        self.skip_csrf_forms = settings.COMPRESSION_SKIP_CSRF_FORMS
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def encoder_for(self, request):
+        encodings = accepted_encodings(request.headers.get('Accept-Encoding'))
+        if brotli is not None and encodings.get('br', 0) > 0:
+            return BrotliEncoder(self.brotli_quality)
+        if encodings.get('gzip', 0) > 0:
+            return GzipEncoder(self.gzip_level)
+        return None
+
+    @staticmethod
+    def is_compressible(response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        return response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+
+        if response.streaming:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            encoder = self.encoder_for(request)
+            if encoder is None:
+                return response
+            if response.is_async:
+                response.streaming_content = self.acompress_stream(encoder, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_stream(encoder, response.streaming_content)
+            del response['Content-Length']
+        else:
+            content = response.content
+            if len(content) < self.min_size:
+                prometheus.http_compression_skipped.inc(reason='small')
+                return response
+            patch_vary_headers(response, ('Accept-Encoding',))
+            encoder = self.encoder_for(request)
+            if encoder is None:
+                return response
+            if self.skip_csrf_forms and CSRF_INPUT in content and has_csrf_form(content):
+                prometheus.http_compression_skipped.inc(reason='csrf_form')
+                return response
+            compressed = encoder.process(content) + encoder.finish()
+            if len(compressed) >= len(content):
+                prometheus.http_compression_skipped.inc(reason='not_smaller')
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+            self.record(encoder, len(content), len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder.name
+        return response
+
+    @staticmethod
+    def record(encoder, size_in, size_out):
+        prometheus.http_compression_bytes.inc(size_in, encoding=encoder.name, stage='in')
+        prometheus.http_compression_bytes.inc(size_out, encoding=encoder.name, stage='out')
+
+    def compress_stream(self, encoder, chunks):
+        size_in = size_out = 0
+        for chunk in chunks:
+            data = encoder.process(chunk) + encoder.flush()
+            size_in, size_out = size_in + len(chunk), size_out + len(data)
+            if data:
+                yield data
+        data = encoder.finish()
+        self.record(encoder, size_in, size_out + len(data))
+        yield data
+
+    async def acompress_stream(self, encoder, chunks):
+        size_in = size_out = 0
+        async for chunk in chunks:
+            data = encoder.process(chunk) + encoder.flush()
+            size_in, size_out = size_in + len(chunk), size_out + len(data)
+            if data:
+                yield data
+        data = encoder.finish()
+        self.record(encoder, size_in, size_out + len(data))
+        yield data
@@ -0,0 +1,40 @@
+# GIN индекс для полнотекстового поиска (core/search.py). Только PostgreSQL.
+
+from django.db import migrations
+
+# Копия выражения из core/search.py на момент миграции: миграция не должна
+# меняться вместе с кодом. Новое выражение поиска - новая миграция с индексом
+SEARCH_INDEX_NAME = 'core_animal_search_gin'
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', "
+    "coalesce(title, '') || ' ' || coalesce(breed, '') || ' ' || coalesce(description, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # CONCURRENTLY: не блокировать запись в большую таблицу на время построения
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {SEARCH_INDEX_NAME} "
+        f"ON core_animal USING GIN ({SEARCH_VECTOR_SQL})"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {SEARCH_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False  # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+
+    dependencies = [
+        ('core', '0009_animal_available_days_animal_cargo_capacity_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
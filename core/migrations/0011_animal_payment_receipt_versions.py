@@ -0,0 +1,23 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_animal_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='payment_receipt_review',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='receipts/review/', verbose_name='Чек оплаты (для проверки)'),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='payment_receipt_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='receipts/thumbs/', verbose_name='Чек оплаты (превью)'),
+        ),
+    ]
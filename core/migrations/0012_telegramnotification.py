@@ -0,0 +1,37 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_animal_payment_receipt_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=100, verbose_name='Chat ID')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('image_path', models.CharField(blank=True, max_length=500, verbose_name='Путь к фото')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('last_error', models.CharField(blank=True, max_length=500, verbose_name='Последняя ошибка')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Отправить не раньше')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+                ('animal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='core.animal', verbose_name='Объявление')),
+            ],
+            options={
+                'verbose_name': 'Telegram уведомление',
+                'verbose_name_plural': 'Telegram уведомления',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='core_telegr_status_0828e4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_telegramnotification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='moderation_claimed_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_animals', to=settings.AUTH_USER_MODEL, verbose_name='На проверке у'),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='moderation_lease_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Проверка заблокирована до'),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(condition=models.Q(('is_approved', False), ('status', 'active')), fields=['created_at'], name='animal_pending_moderation_idx'),
+        ),
+    ]
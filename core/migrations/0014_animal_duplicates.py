@@ -0,0 +1,44 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_animal_moderation_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reposts', to='core.animal', verbose_name='Похоже на объявление'),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='photo_hash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Хэш фото (dHash)'),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='text_minhash',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Подпись текста (MinHash)'),
+        ),
+        migrations.CreateModel(
+            name='AnimalFingerprintBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('photo', 'Фото'), ('text', 'Текст')], max_length=5, verbose_name='Отпечаток')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Полоса')),
+                ('value', models.IntegerField(verbose_name='Значение')),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint_bands', to='core.animal', verbose_name='Животное')),
+            ],
+            options={
+                'verbose_name': 'Полоса отпечатка',
+                'verbose_name_plural': 'Полосы отпечатков',
+                'indexes': [models.Index(fields=['kind', 'band', 'value'], name='fingerprint_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_animal_duplicates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAnimal',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID объявления')),
+                ('category', models.CharField(choices=[('cat', 'Кошки / Гурбаҳо'), ('dog', 'Собаки / Сагҳо'), ('parrot', 'Попугаи / Тӯтиҳо'), ('canary', 'Канарейки / Қанариҳо'), ('partridge', 'Кеклик / Кабкҳо'), ('chicken', 'Куры и Петухи / Мурғ ва Хурӯс'), ('pigeon', 'Голуби / Кафтарҳо'), ('rabbit', 'Кролики / Харгӯшҳо'), ('horse', 'Лошади / Аспҳо'), ('cow', 'Коровы / Говҳо'), ('goat', 'Козы / Бузҳо'), ('sheep', 'Бараны / Гӯсфандҳо'), ('fish', 'Рыбки / Моҳиҳо'), ('hamster', 'Хомяки / Хомякҳо'), ('turtle', 'Черепахи / Сангпуштҳо'), ('bird_other', 'Другие птицы / Паррандаҳои дигар'), ('reptile', 'Рептилии / Хазанда'), ('transport', 'Зоо-Такси / Ташвиқот'), ('other', 'Другие / Дигар')], max_length=50, verbose_name='Категория')),
+                ('title', models.CharField(max_length=200, verbose_name='Название')),
+                ('city', models.CharField(choices=[('dushanbe', 'Душанбе'), ('khujand', 'Худжанд'), ('kulob', 'Куляб'), ('qurghonteppa', 'Курган-Тюбе'), ('hisor', 'Гисар'), ('istaravshan', 'Истаравшан'), ('tursunzoda', 'Турсунзаде'), ('khorog', 'Хорог'), ('vahdat', 'Вахдат'), ('panjakent', 'Пенджикент'), ('other', 'Другой город')], max_length=50, verbose_name='Город')),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Цена (итоговая)')),
+                ('status', models.CharField(choices=[('active', 'Активно'), ('sold', 'Продано'), ('archived', 'В архиве')], max_length=20, verbose_name='Статус')),
+                ('main_photo', models.ImageField(blank=True, max_length=255, upload_to='', verbose_name='Главное фото')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('archived_at', models.DateTimeField(db_index=True, verbose_name='Дата архивации')),
+                ('data', models.JSONField(blank=True, null=True, verbose_name='Снимок (если хранится в БД)')),
+                ('archive_file', models.CharField(blank=True, max_length=255, verbose_name='Файл архива (JSONL.gz)')),
+                ('archive_offset', models.BigIntegerField(blank=True, null=True, verbose_name='Смещение в файле')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_animals', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+            ],
+            options={
+                'verbose_name': 'Архивное объявление',
+                'verbose_name_plural': 'Архив объявлений',
+                'ordering': ['-archived_at'],
+            },
+        ),
+    ]
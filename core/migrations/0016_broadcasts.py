@@ -0,0 +1,57 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_archived_animal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('segment', models.CharField(choices=[('all', 'Все с привязанным Telegram'), ('sellers_category', 'Продавцы категории'), ('sellers_city', 'Продавцы города'), ('bidders', 'Участники аукционов')], default='all', max_length=20, verbose_name='Сегмент')),
+                ('segment_value', models.CharField(blank=True, max_length=50, verbose_name='Категория / город сегмента')),
+                ('status', models.CharField(choices=[('draft', 'Черновик'), ('queued', 'В очереди'), ('running', 'Отправляется'), ('done', 'Завершена'), ('cancelled', 'Отменена')], default='draft', max_length=10, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Получателей')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Доставлено')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Ошибок')),
+                ('blocked', models.PositiveIntegerField(default=0, verbose_name='Заблокировали бота')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало отправки')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Рассылка',
+                'verbose_name_plural': 'Рассылки',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=50, verbose_name='Chat ID')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('sent', 'Доставлено'), ('failed', 'Ошибка'), ('blocked', 'Бот заблокирован')], default='pending', max_length=10, verbose_name='Статус')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Ошибка')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core.broadcastcampaign', verbose_name='Рассылка')),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcast_deliveries', to='core.userprofile', verbose_name='Профиль')),
+            ],
+            options={
+                'verbose_name': 'Доставка рассылки',
+                'verbose_name_plural': 'Доставки рассылок',
+                'indexes': [models.Index(fields=['campaign', 'status', 'id'], name='broadcast_delivery_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'chat_id'), name='unique_broadcast_recipient')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_broadcasts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramFileCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, verbose_name='Путь к файлу')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('file_id', models.CharField(max_length=255, verbose_name='Telegram file_id')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Повторных отправок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Загружено')),
+            ],
+            options={
+                'verbose_name': 'Telegram file_id',
+                'verbose_name_plural': 'Telegram file_id (кэш фото)',
+                'constraints': [models.UniqueConstraint(fields=('path', 'content_hash'), name='unique_telegram_file')],
+            },
+        ),
+    ]
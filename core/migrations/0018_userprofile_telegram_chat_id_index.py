@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_telegram_file_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='telegram_chat_id',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True, verbose_name='Telegram Chat ID'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.12 on 2026-10-19 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_userprofile_telegram_chat_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершён'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Строк')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Создано')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Строк с ошибками')),
+                ('errors_preview', models.JSONField(blank=True, default=list, help_text='[строка, поле, ошибка]; полный отчёт - CSV в IMPORT_ROOT', verbose_name='Первые ошибки')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Ошибка файла')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Загрузил')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Продавец')),
+            ],
+            options={
+                'verbose_name': 'Импорт объявлений',
+                'verbose_name_plural': 'Импорты объявлений',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='import_job_queue_idx')],
+            },
+        ),
+    ]
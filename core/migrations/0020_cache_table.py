@@ -0,0 +1,24 @@
+# Таблица DatabaseCache (CACHE_BACKEND=database - по умолчанию при DEBUG=False).
+# Без неё каждый кэшируемый путь отвечает 500, а createcachetable легко забыть
+# при деплое - создаём её вместе с остальной схемой. Если backend переключили на
+# database после миграций, таблицу создаёт python manage.py createcachetable.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Команда берёт таблицы из settings.CACHES и пропускает уже существующие;
+    # для locmem/redis ничего не делает
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_import_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,8 @@ from decimal import Decimal
 from PIL import Image, ImageDraw, ImageFont
 import os
 from io import BytesIO
+from .image_utils import receipt_versions
+from .duplicates import fingerprint, store_bands
 from django.core.files.base import ContentFile
 from django.utils.translation import gettext_lazy as _
 
@@ -359,6 +361,23 @@ class Animal(models.Model):
         help_text='Скриншот чека оплаты для аукциона (3 TJS)'
     )
     
+    # Уменьшенные копии чека (создаются при загрузке, см. _generate_receipt_versions)
+    payment_receipt_thumb = models.ImageField(
+        upload_to='receipts/thumbs/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Чек оплаты (превью)'
+    )
+    
+    payment_receipt_review = models.ImageField(
+        upload_to='receipts/review/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Чек оплаты (для проверки)'
+    )
+    
     is_paid = models.BooleanField(
         default=False,
         verbose_name='Оплачено'
@@ -450,6 +469,50 @@ class Animal(models.Model):
         help_text='Количество просмотров объявления'
     )
     
+    # ========== ОЧЕРЕДЬ МОДЕРАЦИИ (core/moderation.py) ==========
+    moderation_claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='claimed_animals',
+        verbose_name='На проверке у'
+    )
+    
+    moderation_lease_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Проверка заблокирована до'
+    )
+    
+    # ========== ДУБЛИКАТЫ (core/duplicates.py) ==========
+    photo_hash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Хэш фото (dHash)'
+    )
+    
+    text_minhash = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Подпись текста (MinHash)'
+    )
+    
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='reposts',
+        verbose_name='Похоже на объявление'
+    )
+    
     favorites = models.ManyToManyField(
         User,
         related_name='favorite_animals',
@@ -477,6 +540,12 @@ class Animal(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['category', '-created_at']),
             models.Index(fields=['city', 'category']),
+            # Очередь модерации: индекс только по ожидающим строкам (PostgreSQL, SQLite)
+            models.Index(
+                fields=['created_at'],
+                name='animal_pending_moderation_idx',
+                condition=models.Q(is_approved=False, status='active'),
+            ),
         ]
     
     def clean(self):
@@ -512,11 +581,57 @@ class Animal(models.Model):
         if self.listing_type == 'auction' and not self.current_price:
             self.current_price = self.start_price
         
-        # Добавляем водяной знак на фото перед сохранением
-        if self.main_photo:
+        # Отпечатки для поиска дубликатов - до водяного знака.
+        # save(update_fields=...) текст и фото не меняет
+        if kwargs.get('update_fields') is None and not getattr(self, '_fingerprinted', False):
+            fingerprint(self)
+        
+        # Водяной знак и превью чека - только для нового загруженного файла.
+        # Уже сохранённый файл (_committed) не перекодируем: save(update_fields=['views_count'])
+        # и одобрение оплаты не должны заново открывать и пережимать фото.
+        if self.main_photo and not self.main_photo._committed:
             self._add_watermark()
         
+        if self.payment_receipt and not self.payment_receipt._committed:
+            self._generate_receipt_versions()
+        elif not self.payment_receipt and (self.payment_receipt_thumb or self.payment_receipt_review):
+            self.delete_receipt_versions()
+        
         super().save(*args, **kwargs)
+        
+        if getattr(self, '_fingerprint_changed', False):
+            store_bands(self)
+        self._fingerprinted = self._fingerprint_changed = False
+    
+    def _generate_receipt_versions(self):
+        """Превью и версия для проверки чека оплаты (уменьшенные JPEG)"""
+        # Версии прежнего чека удаляются сразу: если новый не обработается,
+        # модератор увидит оригинал нового чека, а не превью старого
+        self.delete_receipt_versions()
+        try:
+            versions = receipt_versions(self.payment_receipt)
+            self.payment_receipt_thumb.save(*versions['thumb'], save=False)
+            self.payment_receipt_review.save(*versions['review'], save=False)
+        except Exception as e:
+            # Битый файл - в админке покажется оригинал
+            print(f"Ошибка создания превью чека: {str(e)}")
+    
+    def delete_receipt_versions(self):
+        """Удалить файлы превью чека (при замене или отклонении чека)"""
+        for field_file in (self.payment_receipt_thumb, self.payment_receipt_review):
+            if field_file:
+                field_file.delete(save=False)
+    
+    @property
+    def receipt_thumb_url(self):
+        """URL превью чека, для старых записей без превью - оригинал"""
+        receipt = self.payment_receipt_thumb or self.payment_receipt
+        return receipt.url if receipt else ''
+    
+    @property
+    def receipt_review_url(self):
+        receipt = self.payment_receipt_review or self.payment_receipt
+        return receipt.url if receipt else ''
     
     def _add_watermark(self):
         """
@@ -660,6 +775,48 @@ class AnimalImage(models.Model):
         return f"Фото для {self.animal.title}"
 
 
+class AnimalFingerprintBand(models.Model):
+    """
+    Полоса LSH отпечатка объявления (core/duplicates.py).
+    Поиск дубликатов - точное совпадение (kind, band, value) по индексу.
+    """
+    KIND_CHOICES = [
+        ('photo', 'Фото'),
+        ('text', 'Текст'),
+    ]
+
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.CASCADE,
+        related_name='fingerprint_bands',
+        verbose_name='Животное'
+    )
+
+    kind = models.CharField(
+        max_length=5,
+        choices=KIND_CHOICES,
+        verbose_name='Отпечаток'
+    )
+
+    band = models.PositiveSmallIntegerField(
+        verbose_name='Полоса'
+    )
+
+    value = models.IntegerField(
+        verbose_name='Значение'
+    )
+
+    class Meta:
+        verbose_name = 'Полоса отпечатка'
+        verbose_name_plural = 'Полосы отпечатков'
+        indexes = [
+            models.Index(fields=['kind', 'band', 'value'], name='fingerprint_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}[{self.band}]={self.value} #{self.animal_id}"
+
+
 class Offer(models.Model):
     """
     Price offers from buyers (Smart Offer feature)
@@ -854,6 +1011,7 @@ class UserProfile(models.Model):
         max_length=50,
         blank=True,
         null=True,
+        db_index=True,  # поиск профиля по чату на каждом апдейте бота
         verbose_name='Telegram Chat ID'
     )
     
@@ -1077,3 +1235,457 @@ class Comment(models.Model):
     
     def __str__(self):
         return f"Комментарий от {self.author.username}"
+
+
+class TelegramNotification(models.Model):
+    """
+    Очередь Telegram уведомлений (анонсы в канал после модерации).
+    Отправляет команда send_notifications с ограничением скорости.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+    
+    chat_id = models.CharField(
+        max_length=100,
+        verbose_name='Chat ID'
+    )
+    
+    text = models.TextField(
+        verbose_name='Текст'
+    )
+    
+    image_path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name='Путь к фото'
+    )
+    
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        verbose_name='Объявление'
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    
+    last_error = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+    
+    class Meta:
+        verbose_name = 'Telegram уведомление'
+        verbose_name_plural = 'Telegram уведомления'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.chat_id}: {self.text[:40]}"
+
+
+class ArchivedAnimal(models.Model):
+    """
+    Архив проданных и устаревших объявлений (core/archive.py).
+    pk совпадает с pk бывшего Animal - старые ссылки продолжают работать.
+    Полный снимок (ставки, комментарии, предложения) - в data или в сжатом JSONL на диске.
+    """
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID объявления'
+    )
+    
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_animals',
+        verbose_name='Владелец'
+    )
+    
+    category = models.CharField(
+        max_length=50,
+        choices=Animal.CATEGORY_CHOICES,
+        verbose_name='Категория'
+    )
+    
+    title = models.CharField(
+        max_length=200,
+        verbose_name='Название'
+    )
+    
+    city = models.CharField(
+        max_length=50,
+        choices=Animal.CITY_CHOICES,
+        verbose_name='Город'
+    )
+    
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name='Цена (итоговая)'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Animal.STATUS_CHOICES,
+        verbose_name='Статус'
+    )
+    
+    main_photo = models.ImageField(
+        max_length=255,
+        blank=True,
+        verbose_name='Главное фото'
+    )
+    
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания'
+    )
+    
+    archived_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='Дата архивации'
+    )
+    
+    data = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Снимок (если хранится в БД)'
+    )
+    
+    archive_file = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Файл архива (JSONL.gz)'
+    )
+    
+    archive_offset = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Смещение в файле'
+    )
+    
+    class Meta:
+        verbose_name = 'Архивное объявление'
+        verbose_name_plural = 'Архив объявлений'
+        ordering = ['-archived_at']
+    
+    def __str__(self):
+        return f"{self.title} (архив #{self.pk})"
+    
+    def get_absolute_url(self):
+        return reverse('animal_detail', args=[self.pk])
+
+
+class BroadcastCampaign(models.Model):
+    """
+    Рассылка бота по сегменту пользователей (core/broadcasts.py).
+    Получатели фиксируются в BroadcastDelivery при запуске,
+    отправляет команда run_broadcasts - после остановки продолжает с того же места.
+    """
+    SEGMENT_CHOICES = [
+        ('all', 'Все с привязанным Telegram'),
+        ('sellers_category', 'Продавцы категории'),
+        ('sellers_city', 'Продавцы города'),
+        ('bidders', 'Участники аукционов'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('draft', 'Черновик'),
+        ('queued', 'В очереди'),
+        ('running', 'Отправляется'),
+        ('done', 'Завершена'),
+        ('cancelled', 'Отменена'),
+    ]
+    
+    text = models.TextField(
+        verbose_name='Текст'
+    )
+    
+    segment = models.CharField(
+        max_length=20,
+        choices=SEGMENT_CHOICES,
+        default='all',
+        verbose_name='Сегмент'
+    )
+    
+    segment_value = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Категория / город сегмента'
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='draft',
+        verbose_name='Статус'
+    )
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='broadcasts',
+        verbose_name='Автор'
+    )
+    
+    total = models.PositiveIntegerField(default=0, verbose_name='Получателей')
+    sent = models.PositiveIntegerField(default=0, verbose_name='Доставлено')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Ошибок')
+    blocked = models.PositiveIntegerField(default=0, verbose_name='Заблокировали бота')
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало отправки'
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена'
+    )
+    
+    class Meta:
+        verbose_name = 'Рассылка'
+        verbose_name_plural = 'Рассылки'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"#{self.pk} {self.get_segment_display()}: {self.text[:40]}"
+
+
+class BroadcastDelivery(models.Model):
+    """Статус рассылки для одного получателя"""
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('sent', 'Доставлено'),
+        ('failed', 'Ошибка'),
+        ('blocked', 'Бот заблокирован'),
+    ]
+    
+    campaign = models.ForeignKey(
+        BroadcastCampaign,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name='Рассылка'
+    )
+    
+    profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='broadcast_deliveries',
+        verbose_name='Профиль'
+    )
+    
+    chat_id = models.CharField(
+        max_length=50,
+        verbose_name='Chat ID'
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+    
+    class Meta:
+        verbose_name = 'Доставка рассылки'
+        verbose_name_plural = 'Доставки рассылок'
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'chat_id'], name='unique_broadcast_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status', 'id'], name='broadcast_delivery_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.campaign_id} -> {self.chat_id}: {self.status}"
+
+
+class TelegramFileCache(models.Model):
+    """
+    file_id загруженных в Telegram фото (core/telegram_files.py).
+    Повторная отправка того же файла - по file_id, без загрузки байтов.
+    Ключ - путь + SHA-256 содержимого: заменённый файл загрузится заново.
+    """
+    path = models.CharField(
+        max_length=500,
+        verbose_name='Путь к файлу'
+    )
+    
+    content_hash = models.CharField(
+        max_length=64,
+        verbose_name='SHA-256'
+    )
+    
+    file_id = models.CharField(
+        max_length=255,
+        verbose_name='Telegram file_id'
+    )
+    
+    hits = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Повторных отправок'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Загружено'
+    )
+    
+    class Meta:
+        verbose_name = 'Telegram file_id'
+        verbose_name_plural = 'Telegram file_id (кэш фото)'
+        constraints = [
+            models.UniqueConstraint(fields=['path', 'content_hash'], name='unique_telegram_file'),
+        ]
+    
+    def __str__(self):
+        return f"{self.path} -> {self.file_id[:20]}"
+
+
+class ImportJob(models.Model):
+    """
+    Импорт объявлений со страницы /manager/import/ (core/imports.py).
+    Загруженные файлы и отчёт об ошибках лежат в IMPORT_ROOT (вне MEDIA_ROOT),
+    импортирует команда import_listings --queue - не в HTTP запросе.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Завершён'),
+        ('failed', 'Ошибка'),
+    ]
+    
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='Продавец'
+    )
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Загрузил'
+    )
+    
+    format = models.CharField(
+        max_length=10,
+        verbose_name='Формат'
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name='Статус'
+    )
+    
+    total = models.PositiveIntegerField(default=0, verbose_name='Строк')
+    created = models.PositiveIntegerField(default=0, verbose_name='Создано')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Строк с ошибками')
+    
+    errors_preview = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Первые ошибки',
+        help_text='[строка, поле, ошибка]; полный отчёт - CSV в IMPORT_ROOT'
+    )
+    
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Ошибка файла'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создан'
+    )
+    
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало'
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершён'
+    )
+    
+    class Meta:
+        verbose_name = 'Импорт объявлений'
+        verbose_name_plural = 'Импорты объявлений'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='import_job_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} @{self.owner_id}: {self.get_status_display()}"
@@ -0,0 +1,132 @@
+"""
+Bulk moderation for Animal listings.
+
+queryset.update() не вызывает post_save, а save() по одному объекту -
+N запросов и N синхронных отправок в Telegram. Здесь одобрение делается
+одним UPDATE, анонсы в канал ставятся в очередь одним INSERT
+(core.notifications), кэш объявлений сбрасывается после commit.
+
+Очередь модерации: модератор "забирает" пачку ожидающих объявлений
+(claim_listings) на MODERATION_LEASE_MINUTES. Пока аренда действует,
+другие модераторы эти объявления не получают; по истечении аренды
+необработанные объявления возвращаются в очередь сами.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache_utils import bump_listings_version
+from .models import Animal
+from .notifications import enqueue_channel_announcements
+
+
+RELEASED = {'moderation_claimed_by': None, 'moderation_lease_until': None}
+
+
+def pending_listings():
+    """Ожидающие модерации (условие совпадает с частичным индексом animal_pending_moderation_idx)"""
+    return Animal.objects.filter(is_approved=False, status='active')
+
+
+def claim_listings(moderator, limit=None, lease_minutes=None, exclude_ids=()):
+    """
+    Забрать до limit объявлений на проверку: свободные, с истёкшей арендой
+    или уже взятые этим модератором. SKIP LOCKED - параллельные модераторы
+    не ждут друг друга и не получают одни и те же строки (PostgreSQL).
+    exclude_ids - пропущенные модератором (достанутся другим).
+    """
+    limit = limit or settings.MODERATION_BATCH_SIZE
+    lease_minutes = lease_minutes or settings.MODERATION_LEASE_MINUTES
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            pending_listings()
+            .filter(
+                Q(moderation_lease_until__isnull=True) |
+                Q(moderation_lease_until__lt=now) |
+                Q(moderation_claimed_by=moderator)
+            )
+            .exclude(pk__in=list(exclude_ids))
+            .order_by('created_at')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:limit]
+        )
+        if ids:
+            Animal.objects.filter(pk__in=ids).update(
+                moderation_claimed_by=moderator,
+                moderation_lease_until=now + timedelta(minutes=lease_minutes),
+            )
+    return (
+        Animal.objects.filter(pk__in=ids)
+        .select_related('owner')
+        .prefetch_related('gallery')
+        .order_by('created_at')
+    )
+
+
+def claimed_by(moderator, ids):
+    """
+    Только объявления, закреплённые за этим модератором.
+    Истёкшая аренда не мешает, пока объявление не забрал кто-то другой.
+    """
+    return pending_listings().filter(pk__in=ids, moderation_claimed_by=moderator)
+
+
+def release_listings(queryset):
+    """Вернуть объявления в очередь (пропуск)"""
+    return queryset.update(**RELEASED)
+
+
+def approve_listings(queryset):
+    """
+    Одобрить объявления из queryset.
+    Анонсируются только те, что ещё не были одобрены.
+    Возвращает (одобрено, поставлено в очередь уведомлений).
+    """
+    with transaction.atomic():
+        animals = list(
+            queryset.filter(is_approved=False)
+            .select_related('owner')
+            .select_for_update(of=('self',))
+        )
+        if not animals:
+            return 0, 0
+
+        updated = Animal.objects.filter(pk__in=[a.pk for a in animals]).update(
+            is_approved=True, updated_at=timezone.now(), **RELEASED
+        )
+        for animal in animals:
+            animal.is_approved = True
+        queued = enqueue_channel_announcements(animals)
+        transaction.on_commit(bump_listings_version)
+    return updated, queued
+
+
+def disapprove_listings(queryset):
+    """Снять объявления с публикации одним UPDATE"""
+    with transaction.atomic():
+        updated = queryset.filter(is_approved=True).update(is_approved=False, updated_at=timezone.now())
+        transaction.on_commit(bump_listings_version)
+    return updated
+
+
+def reject_listings(queryset):
+    """
+    Отклонить объявления из очереди модерации: статус 'archived'.
+    (is_approved=False остаётся - без смены статуса объявление вернулось бы в очередь)
+    """
+    with transaction.atomic():
+        updated = queryset.update(status='archived', is_approved=False, updated_at=timezone.now(), **RELEASED)
+        transaction.on_commit(bump_listings_version)
+    return updated
+
+
+def announce_listing(animal):
+    """
+    Анонс одного объявления, одобренного вручную (форма или list_editable в админке).
+    Кэш сбрасывает сигнал post_save.
+    """
+    return enqueue_channel_announcements([animal])
@@ -0,0 +1,208 @@
+"""
+Telegram notifications for ZooBozor.
+
+- тексты уведомлений (общие для сигналов, модерации и очереди)
+- очередь TelegramNotification: enqueue_* кладут сообщения одним
+  bulk_create, команда send_notifications отправляет их по одному
+  с ограничением скорости (Telegram: ~20 сообщений в минуту в группу)
+  или пачкой параллельно (--concurrent, core.telegram_async)
+"""
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import notification_queue_depth
+from .models import TelegramNotification
+from .utils import send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+# Category emoji mapping
+CATEGORY_EMOJIS = {
+    'cat': '🐈',
+    'dog': '🐕',
+    'parrot': '🦜',
+    'canary': '🐤',
+    'partridge': '🦅',
+    'chicken': '🐔',
+    'pigeon': '🕊️',
+    'rabbit': '🐰',
+    'horse': '🐎',
+    'cow': '🐄',
+    'goat': '🐐',
+    'sheep': '🐑',
+    'fish': '🐠',
+    'hamster': '🐹',
+    'turtle': '🐢',
+    'bird_other': '🦅',
+    'reptile': '🦎',
+    'other': '🦁',
+}
+
+CATEGORY_NAMES_RU = {
+    'cat': 'КОШКА',
+    'dog': 'СОБАКА',
+    'parrot': 'ПОПУГАЙ',
+    'canary': 'КАНАРЕЙКА',
+    'partridge': 'КЕКЛИК',
+    'chicken': 'КУРИЦА/ПЕТУХ',
+    'pigeon': 'ГОЛУБЬ',
+    'rabbit': 'КРОЛИК',
+    'horse': 'ЛОШАДЬ',
+    'cow': 'КОРОВА',
+    'goat': 'КОЗА',
+    'sheep': 'БАРАН',
+    'fish': 'РЫБКА',
+    'hamster': 'ХОМЯК',
+    'turtle': 'ЧЕРЕПАХА',
+    'bird_other': 'ПТИЦА',
+    'reptile': 'РЕПТИЛИЯ',
+    'other': 'ЖИВОТНОЕ',
+}
+
+MAX_ATTEMPTS = 5
+
+
+def site_domain():
+    return os.environ.get('SITE_DOMAIN', 'http://127.0.0.1:8000')
+
+
+def channel_chat_id():
+    return os.environ.get('TELEGRAM_CHAT_ID', '')
+
+
+def build_new_animal_message(animal):
+    """Текст анонса нового объявления для канала"""
+    emoji = CATEGORY_EMOJIS.get(animal.category, '🦁')
+    animal_name = CATEGORY_NAMES_RU.get(animal.category, 'ЖИВОТНОЕ')
+
+    message = f"{emoji} НОВОЕ ОБЪЯВЛЕНИЕ: {animal_name}!\n\n"
+    message += f"📝 {animal.title}\n"
+    message += f"💰 Цена: {animal.price} TJS\n"
+
+    if animal.breed:
+        message += f"🏷️ Порода: {animal.breed}\n"
+
+    if animal.age:
+        message += f"📅 Возраст: {animal.age}\n"
+
+    message += f"📍 {animal.get_city_display()}\n"
+    message += f"👤 Продавец: {animal.owner.username}\n"
+
+    if animal.listing_type == 'auction' and animal.auction_end_date:
+        message += f"\n🔨 АУКЦИОН до {animal.auction_end_date.strftime('%d.%m.%Y %H:%M')}\n"
+
+    message += f"\n🔗 {site_domain()}/animal/{animal.pk}/"
+    return message
+
+
+def animal_photo_path(animal):
+    try:
+        return animal.main_photo.path if animal.main_photo else ''
+    except (ValueError, NotImplementedError):  # нет файла / удалённое хранилище
+        return ''
+
+
+# ==================== ОЧЕРЕДЬ ====================
+
+def enqueue_channel_announcements(animals):
+    """
+    Поставить анонсы объявлений в очередь одним INSERT.
+    animals - объекты с загруженным owner (select_related).
+    """
+    chat_id = channel_chat_id()
+    if not chat_id:
+        return 0
+    created = TelegramNotification.objects.bulk_create([
+        TelegramNotification(
+            chat_id=chat_id,
+            text=build_new_animal_message(animal),
+            image_path=animal_photo_path(animal),
+            animal=animal,
+        )
+        for animal in animals
+    ])
+    return len(created)
+
+
+def pending_count():
+    return TelegramNotification.objects.filter(status='pending').count()
+
+
+notification_queue_depth.set_function(pending_count)
+
+
+def claim_batch(limit):
+    """
+    Забрать пачку готовых к отправке уведомлений.
+    SKIP LOCKED: второй запущенный worker не возьмёт те же строки (PostgreSQL).
+    """
+    with transaction.atomic():
+        batch = list(
+            TelegramNotification.objects
+            .filter(status='pending', available_at__lte=timezone.now())
+            .order_by('available_at', 'id')
+            .select_for_update(skip_locked=True)[:limit]
+        )
+        # Отодвигаем available_at - пока идёт отправка, строки "заняты"
+        if batch:
+            TelegramNotification.objects.filter(pk__in=[n.pk for n in batch]).update(
+                available_at=timezone.now() + timedelta(minutes=10)
+            )
+    return batch
+
+
+def deliver(notification):
+    """Отправить одно уведомление и записать результат"""
+    ok = send_telegram_message(notification.chat_id, notification.text, image_path=notification.image_path or None)
+    if not ok and notification.image_path:
+        # Фото не ушло - хотя бы текст
+        ok = send_telegram_message(notification.chat_id, notification.text)
+    record_delivery(notification, ok)
+    return ok
+
+
+async def _adeliver_all(batch):
+    from .telegram_async import AsyncTelegramSender
+
+    async def adeliver(sender, notification):
+        ok = await sender.send_message(notification.chat_id, notification.text, notification.image_path or None)
+        if not ok and notification.image_path:
+            ok = await sender.send_message(notification.chat_id, notification.text)
+        return ok
+
+    async with AsyncTelegramSender() as sender:
+        return await asyncio.gather(*(adeliver(sender, notification) for notification in batch))
+
+
+def deliver_batch(batch):
+    """
+    Отправить пачку параллельно (лимиты Telegram соблюдает AsyncTelegramSender)
+    и записать результаты. Возвращает список True/False
+    """
+    results = async_to_sync(_adeliver_all)(batch)
+    for notification, ok in zip(batch, results):
+        record_delivery(notification, ok)
+    return results
+
+
+def record_delivery(notification, ok):
+    """Записать результат отправки: sent / повтор с паузой / failed"""
+    notification.attempts += 1
+    if ok:
+        notification.status = 'sent'
+        notification.sent_at = timezone.now()
+        notification.last_error = ''
+    elif notification.attempts >= MAX_ATTEMPTS:
+        notification.status = 'failed'
+        notification.last_error = 'Telegram API error (see logs)'
+    else:
+        # Экспоненциальная пауза: 1, 2, 4, 8 минут
+        notification.available_at = timezone.now() + timedelta(minutes=2 ** (notification.attempts - 1))
+        notification.last_error = 'Telegram API error (see logs)'
+    notification.save(update_fields=['status', 'attempts', 'sent_at', 'last_error', 'available_at'])
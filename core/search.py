@@ -0,0 +1,212 @@
+"""
+Search backend for Animal listings.
+
+PostgreSQL: полнотекстовый поиск по title / breed / description через
+GIN индекс (миграция 0010_animal_search_index). Выражение в запросе
+должно совпадать с выражением индекса буква в букву — иначе Postgres
+не использует индекс, поэтому оно задано одной константой.
+
+Другие БД (SQLite в разработке): icontains, как раньше.
+
+bot_search_page - постраничный поиск для Telegram бота с кэшем страниц
+и исправлением опечаток в названиях пород.
+"""
+import difflib
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .cache_utils import LISTINGS_CACHE_TIMEOUT, listings_cache_key
+
+# Конфигурация 'simple': без стемминга, одинаково для русского, таджикского и латиницы
+SEARCH_CONFIG = 'simple'
+SEARCH_VECTOR_SQL = (
+    f"to_tsvector('{SEARCH_CONFIG}', "
+    "coalesce(title, '') || ' ' || coalesce(breed, '') || ' ' || coalesce(description, ''))"
+)
+# Индекс по этому выражению - migrations/0010; изменение выражения требует новой миграции
+SEARCH_INDEX_NAME = 'core_animal_search_gin'
+
+PHONE_RE = re.compile(r'^\+?[\d\s\-()]{5,}$')
+
+
+def uses_fulltext(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def fulltext_filter(queryset, query):
+    """
+    Полнотекстовый фильтр: каждое слово запроса - префикс (бойн -> бойный).
+    Возвращает queryset или None, если в запросе нет слов.
+    """
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    tsquery = ' & '.join(f'{word}:*' for word in words)
+    return queryset.filter(RawSQL(
+        f"{SEARCH_VECTOR_SQL} @@ to_tsquery('{SEARCH_CONFIG}', %s)",
+        [tsquery],
+        output_field=BooleanField(),
+    ))
+
+
+def search_animals(queryset, query):
+    """
+    Поиск объявлений по строке запроса.
+
+    - число            -> ID объявления
+    - телефон          -> phone (окончание номера)
+    - @username        -> владелец
+    - остальное        -> полнотекстовый поиск (Postgres) / icontains
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    if query.isdigit() and len(query) < 9:
+        return queryset.filter(pk=int(query))
+
+    if PHONE_RE.match(query):
+        digits = re.sub(r'\D', '', query)
+        return queryset.filter(phone__endswith=digits[-9:])
+
+    if query.startswith('@'):
+        return queryset.filter(owner__username__iexact=query[1:])
+
+    if uses_fulltext(queryset):
+        filtered = fulltext_filter(queryset, query)
+        if filtered is not None:
+            return filtered
+
+    return queryset.filter(
+        Q(title__icontains=query) |
+        Q(description__icontains=query) |
+        Q(breed__icontains=query)
+    )
+
+
+# ==================== ПОИСК В БОТЕ (runbot) ====================
+#
+# Страницы результатов кэшируются по нормализованному запросу на
+# BOT_SEARCH_CACHE_TIMEOUT секунд (ключ содержит версию кэша объявлений -
+# после изменения объявлений старые страницы не отдаются). Опечатки в
+# названиях пород исправляются по словарю пород активных объявлений.
+
+BREED_FIELDS = ('breed', 'pigeon_breed', 'livestock_breed', 'pet_breed')
+TYPO_CUTOFF = 0.75  # минимальное сходство difflib для замены слова
+
+
+def normalize_query(query):
+    return ' '.join((query or '').lower().split())
+
+
+def query_digest(query):
+    """Короткий ключ запроса (кэш, callback_data кнопок - до 64 байт)"""
+    return hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+
+
+def bot_listings():
+    from .models import Animal
+
+    return Animal.objects.filter(is_approved=True, is_sold=False, status='active')
+
+
+def breed_vocabulary():
+    """Слова из пород активных объявлений (кэш до изменения объявлений)"""
+    key = listings_cache_key('breed_vocabulary')
+    words = cache.get(key)
+    if words is None:
+        words = set()
+        for field in BREED_FIELDS:
+            values = bot_listings().exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            for value in values.order_by().values_list(field, flat=True).distinct():
+                words.update(word for word in re.findall(r'\w+', value.lower()) if len(word) > 2)
+        words = sorted(words)
+        cache.set(key, words, LISTINGS_CACHE_TIMEOUT)
+    return words
+
+
+def correct_query(query):
+    """
+    Исправить опечатки в словах запроса по словарю пород (бойнный -> бойный).
+    None - исправлять нечего
+    """
+    words = normalize_query(query).split()
+    vocabulary = breed_vocabulary()
+    known = set(vocabulary)
+    corrected = []
+    for word in words:
+        if word in known or len(word) < 4 or not word.isalpha():
+            corrected.append(word)
+            continue
+        matches = difflib.get_close_matches(word, vocabulary, n=1, cutoff=TYPO_CUTOFF)
+        corrected.append(matches[0] if matches else word)
+    return ' '.join(corrected) if corrected != words else None
+
+
+def rank_results(queryset, query):
+    """Совпадение в названии/породе выше совпадения только в описании, затем VIP и новые"""
+    query = normalize_query(query)
+    match = Q(title__icontains=query) | Q(breed__icontains=query)
+    return queryset.annotate(
+        search_rank=Case(When(match, then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).order_by('-search_rank', '-is_vip', '-created_at')
+
+
+def _search_page(query, page, per_page):
+    queryset = rank_results(search_animals(bot_listings(), query), query)
+    total = queryset.count()
+    pages = max(1, -(-total // per_page))
+    page = min(max(page, 1), pages)
+    items = [
+        {
+            'id': animal.pk,
+            'title': animal.title,
+            'price': animal.current_price if animal.listing_type == 'auction' else animal.price,
+            'listing_type': animal.listing_type,
+        }
+        for animal in queryset[(page - 1) * per_page:page * per_page]
+    ]
+    return {'query': query, 'corrected': False, 'total': total, 'page': page, 'pages': pages, 'items': items}
+
+
+def bot_search_page(query, page=1, per_page=None):
+    """
+    Страница результатов поиска для бота:
+    {'query', 'corrected', 'total', 'page', 'pages', 'items': [{'id', 'title', 'price', 'listing_type'}]}.
+    Если по запросу ничего нет, ищет по запросу с исправленными опечатками
+    """
+    per_page = per_page or settings.BOT_SEARCH_PAGE_SIZE
+    key = listings_cache_key(f'bot_search:{query_digest(query)}:{page}:{per_page}')
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    query = (query or '').strip()
+    result = _search_page(query, page, per_page)
+    if not result['total']:
+        corrected = correct_query(query)
+        if corrected:
+            result = _search_page(corrected, page, per_page)
+            result['corrected'] = True
+    cache.set(key, result, settings.BOT_SEARCH_CACHE_TIMEOUT)
+    return result
+
+
+BOT_QUERY_TIMEOUT = 3600  # сколько живут кнопки листания результатов
+
+
+def remember_bot_query(query):
+    """Сохранить текст запроса для кнопок листания, вернуть его ключ"""
+    digest = query_digest(query)
+    cache.set(f'bot_search_query:{digest}', query.strip(), BOT_QUERY_TIMEOUT)
+    return digest
+
+
+def recall_bot_query(digest):
+    return cache.get(f'bot_search_query:{digest}')
@@ -1,96 +1,37 @@
 """
 Signals for ZooBozor - Telegram notifications with category-based emojis
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from .cache_utils import bump_listings_version
+from .chat_profiles import invalidate_chat
 from .models import Animal, Bid, UserProfile
+from .notifications import (
+    CATEGORY_EMOJIS, animal_photo_path, build_new_animal_message, channel_chat_id,
+)
 from .utils import send_telegram_message
 from django.contrib.auth.models import User
 import os
 
 
-# Category emoji mapping
-CATEGORY_EMOJIS = {
-    'cat': '🐈',
-    'dog': '🐕',
-    'parrot': '🦜',
-    'canary': '🐤',
-    'partridge': '🦅',
-    'chicken': '🐔',
-    'pigeon': '🕊️',
-    'rabbit': '🐰',
-    'horse': '🐎',
-    'cow': '🐄',
-    'goat': '🐐',
-    'sheep': '🐑',
-    'fish': '🐠',
-    'hamster': '🐹',
-    'turtle': '🐢',
-    'bird_other': '🦅',
-    'reptile': '🦎',
-    'other': '🦁',
-}
-
-CATEGORY_NAMES_RU = {
-    'cat': 'КОШКА',
-    'dog': 'СОБАКА',
-    'parrot': 'ПОПУГАЙ',
-    'canary': 'КАНАРЕЙКА',
-    'partridge': 'КЕКЛИК',
-    'chicken': 'КУРИЦА/ПЕТУХ',
-    'pigeon': 'ГОЛУБЬ',
-    'rabbit': 'КРОЛИК',
-    'horse': 'ЛОШАДЬ',
-    'cow': 'КОРОВА',
-    'goat': 'КОЗА',
-    'sheep': 'БАРАН',
-    'fish': 'РЫБКА',
-    'hamster': 'ХОМЯК',
-    'turtle': 'ЧЕРЕПАХА',
-    'bird_other': 'ПТИЦА',
-    'reptile': 'РЕПТИЛИЯ',
-    'other': 'ЖИВОТНОЕ',
-}
-
-
 @receiver(post_save, sender=Animal)
 def notify_new_animal(sender, instance, created, **kwargs):
     """
     Send Telegram notification when a new animal listing is created
+    (объявления, одобренные модератором, анонсируются через очередь - core.moderation)
     """
     if created and instance.is_approved:
-        # Get emoji and name for category
-        emoji = CATEGORY_EMOJIS.get(instance.category, '🦁')
-        animal_name = CATEGORY_NAMES_RU.get(instance.category, 'ЖИВОТНОЕ')
-        
-        # Build message
-        message = f"{emoji} НОВОЕ ОБЪЯВЛЕНИЕ: {animal_name}!\n\n"
-        message += f"📝 {instance.title}\n"
-        message += f"💰 Цена: {instance.price} TJS\n"
-        
-        if instance.breed:
-            message += f"🏷️ Порода: {instance.breed}\n"
-        
-        if instance.age:
-            message += f"📅 Возраст: {instance.age}\n"
-        
-        message += f"📍 {instance.get_city_display()}\n"
-        message += f"👤 Продавец: {instance.owner.username}\n"
-        
-        if instance.listing_type == 'auction':
-            message += f"\n🔨 АУКЦИОН до {instance.auction_end_date.strftime('%d.%m.%Y %H:%M')}\n"
-        
-        # Add site link
-        site_domain = os.environ.get('SITE_DOMAIN', 'http://127.0.0.1:8000')
-        message += f"\n🔗 {site_domain}/animal/{instance.pk}/"
+        message = build_new_animal_message(instance)
         
         # Send to channel/group
-        chat_id = os.environ.get('TELEGRAM_CHAT_ID', '')
+        chat_id = channel_chat_id()
         if chat_id:
             # Try to send with image if main_photo exists
-            if instance.main_photo:
+            image_path = animal_photo_path(instance)
+            if image_path:
                 try:
-                    send_telegram_message(chat_id, message, image_path=instance.main_photo.path)
+                    send_telegram_message(chat_id, message, image_path=image_path)
                 except:
                     # If image fails, send text only
                     send_telegram_message(chat_id, message)
@@ -98,6 +39,22 @@ def notify_new_animal(sender, instance, created, **kwargs):
                 send_telegram_message(chat_id, message)
 
 
+# Счётчик просмотров меняется на каждом открытии объявления - кэш из-за него не сбрасываем
+CACHE_NEUTRAL_FIELDS = {'views_count'}
+
+
+@receiver(post_save, sender=Animal)
+def invalidate_listings_cache(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= CACHE_NEUTRAL_FIELDS:
+        return
+    transaction.on_commit(bump_listings_version)
+
+
+@receiver(post_delete, sender=Animal)
+def invalidate_listings_cache_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(bump_listings_version)
+
+
 @receiver(post_save, sender=Bid)
 def notify_new_bid(sender, instance, created, **kwargs):
     """
@@ -126,6 +83,13 @@ def notify_new_bid(sender, instance, created, **kwargs):
             pass  # Profile doesn't exist or no telegram_chat_id
 
 
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_chat_profile(sender, instance, **kwargs):
+    """Кэш chat_id -> профиль бота (core/chat_profiles.py): новый и прежний chat_id профиля"""
+    invalidate_chat(instance.telegram_chat_id, instance.pk)
+
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """
@@ -13,10 +13,15 @@ class AnimalSitemap(Sitemap):
     protocol = 'https'
 
     def items(self):
-        return Animal.objects.filter(is_sold=False).order_by('-created_at')
+        # Только активные одобренные; архив (ArchivedAnimal) в sitemap не попадает
+        return (
+            Animal.objects.filter(is_approved=True, status='active', is_sold=False)
+            .only('pk', 'updated_at')
+            .order_by('-created_at')
+        )
 
     def lastmod(self, obj):
-        return obj.updated_at if hasattr(obj, 'updated_at') else obj.created_at
+        return obj.updated_at
 
     def location(self, obj):
         return reverse('animal_detail', args=[obj.pk])
@@ -0,0 +1,96 @@
+"""
+Static files storage for ZooBozor.
+
+Хешированные имена файлов (manifest) + gzip/Brotli версии от WhiteNoise.
+При collectstatic дополнительно генерируется ``sw-precache.js`` —
+список хешированных URL для предзагрузки в Service Worker (static/sw.js).
+"""
+import hashlib
+import json
+import logging
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+# Файлы самого Service Worker никогда не попадают в precache
+SERVICE_WORKER_FILES = ('sw.js', 'sw-precache.js')
+
+
+class PrecacheManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Manifest storage с gzip/Brotli сжатием и генерацией precache-списка.
+
+    - Хешированные файлы (``main.3f2a9c.js``) WhiteNoise отдаёт с
+      ``Cache-Control: immutable`` — повторные визиты без ревалидации.
+    - Отсутствующие файлы (ссылки в CSS, ``{% static %}`` в шаблонах) не
+      ломают collectstatic и страницы: используется исходное имя, как
+      раньше с CompressedStaticFilesStorage.
+    """
+    manifest_strict = False
+    precache_name = 'sw-precache.js'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._missing_files = set()
+
+    def stored_name(self, name):
+        # Не искать отсутствующий файл на диске при каждом рендере шаблона
+        if name in self._missing_files:
+            return name
+        return super().stored_name(name)
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if self.manifest_strict or content is not None:
+                raise
+            if name not in self._missing_files:
+                self._missing_files.add(name)
+                logger.warning("Static file not found, serving unhashed name: %s", name)
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+
+        if not kwargs.get('dry_run'):
+            self.save_precache_manifest()
+
+    def get_precache_names(self):
+        """Оригинальные имена файлов из manifest, подходящие под шаблоны"""
+        patterns = settings.PWA_PRECACHE_PATTERNS
+        names = []
+        for name in sorted(self.hashed_files):
+            if name in SERVICE_WORKER_FILES:
+                continue
+            if any(fnmatch(name, pattern) for pattern in patterns):
+                names.append(name)
+        return names
+
+    def save_precache_manifest(self):
+        """
+        Записать sw-precache.js: версия кэша + хешированные URL.
+
+        Версия — хеш от списка хешированных имён, поэтому CACHE_VERSION
+        больше не нужно менять вручную: любой изменённый файл даёт новую версию.
+        """
+        names = self.get_precache_names()
+        urls = [self.url(name) for name in names]
+        version = hashlib.sha256(
+            '\n'.join(self.hashed_files[name] for name in names).encode()
+        ).hexdigest()[:12]
+
+        content = (
+            "// Сгенерировано collectstatic — не редактировать вручную.\n"
+            f"self.PRECACHE_VERSION = {json.dumps(version)};\n"
+            f"self.PRECACHE_URLS = {json.dumps(urls, indent=2)};\n"
+        )
+
+        if self.exists(self.precache_name):
+            self.delete(self.precache_name)
+        self._save(self.precache_name, ContentFile(content.encode()))
+        logger.info("Service worker precache: %d files, version %s", len(urls), version)
@@ -0,0 +1,287 @@
+"""
+Async Telegram sender for ZooBozor.
+
+core.utils.send_telegram_message блокирующий - рассылка многим
+получателям идёт строго по одному. Здесь то же самое на asyncio:
+
+- один пул HTTP соединений (httpx.AsyncClient, keep-alive)
+- не больше TELEGRAM_ASYNC_CONCURRENCY запросов одновременно
+- общий лимит бота (TELEGRAM_GLOBAL_RATE сообщений/сек) и лимит на чат:
+  личный чат - раз в секунду, группа/канал - NOTIFICATION_SEND_INTERVAL
+- 429 Too Many Requests: ждём parameters.retry_after (пауза для всего
+  бота, а не только этого чата) и повторяем,
+  сетевые ошибки и 5xx - повтор с экспоненциальной паузой
+- фото, уже загружавшиеся в Telegram, уходят по file_id (core/telegram_files.py)
+
+Использование:
+    async with AsyncTelegramSender() as sender:
+        await sender.send_many([(chat_id, text), ...])
+
+    send_messages([(chat_id, text, image_path), ...])  # из синхронного кода
+"""
+import asyncio
+import logging
+import os
+from typing import NamedTuple
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+from .metrics import telegram_send_duration, telegram_send_failures
+from .telegram_files import (
+    cached_file_id, forget_file_id, is_stale_file_id_error, photo_file_id, remember_file_id,
+)
+from .utils import telegram_api_url, telegram_error_description
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx есть в requirements.txt
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+PRIVATE_CHAT_INTERVAL = 1.0  # Telegram: ~1 сообщение в секунду в личный чат
+
+
+class Throttle:
+    """Не чаще одного раза в interval секунд (слоты раздаются по очереди)"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_at = 0.0
+        self.pauses = 0  # номер паузы: слот, выданный до неё, недействителен
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            async with self.lock:
+                now = loop.time()
+                slot = max(now, self.next_at)
+                self.next_at = slot + self.interval
+                pauses = self.pauses
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            if self.pauses == pauses:
+                return
+            # Пока ждали, случился 429 - новый слот после паузы
+
+    def pause(self, seconds):
+        """
+        После 429: лимит Telegram общий на бота - никто не отправляет раньше
+        чем через seconds, уже выданные слоты пересчитываются после паузы
+        """
+        self.next_at = max(self.next_at, asyncio.get_running_loop().time() + seconds)
+        self.pauses += 1
+
+
+class ChatThrottle:
+    """
+    Лимит одного чата: сообщения уходят по очереди (порядок сохраняется),
+    следующее - не раньше interval секунд после начала предыдущего
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.lock.acquire()
+        try:
+            await self.wait_turn()
+        except BaseException:
+            self.lock.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.lock.release()
+
+    async def wait_turn(self):
+        delay = self.next_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def started(self):
+        """Отметить начало отправки"""
+        self.next_at = asyncio.get_running_loop().time() + self.interval
+
+    def pause(self, seconds):
+        """После 429: следующая попытка не раньше чем через seconds"""
+        self.next_at = max(self.next_at, asyncio.get_running_loop().time() + seconds)
+
+
+class SendResult(NamedTuple):
+    ok: bool
+    error: str = ''
+    blocked: bool = False  # бот заблокирован / чат удалён - дальше этому чату не писать
+
+
+# Ответы Bot API, после которых в чат писать бесполезно
+BLOCKED_ERRORS = ('bot was blocked', 'user is deactivated', 'chat not found', 'bot was kicked')
+
+
+def is_group_chat(chat_id):
+    """Группы/каналы: отрицательный id или @username"""
+    chat_id = str(chat_id)
+    return chat_id.startswith('-') or chat_id.startswith('@')
+
+
+class AsyncTelegramSender:
+    """Отправка сообщений Bot API с ограничением параллельности и скорости"""
+
+    def __init__(self, token=None, concurrency=None, global_rate=None, group_interval=None, timeout=30):
+        if httpx is None:
+            raise RuntimeError('httpx is required for core.telegram_async (pip install httpx)')
+        self.token = token if token is not None else os.environ.get('TELEGRAM_BOT_TOKEN', '')
+        self.concurrency = concurrency or settings.TELEGRAM_ASYNC_CONCURRENCY
+        global_rate = global_rate or settings.TELEGRAM_GLOBAL_RATE
+        self.group_interval = (
+            group_interval if group_interval is not None else settings.NOTIFICATION_SEND_INTERVAL
+        )
+        self.timeout = timeout
+        self.client = None
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.global_throttle = Throttle(1.0 / global_rate)
+        self.chat_throttles = {}
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=telegram_api_url('', self.token),
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            timeout=self.timeout,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def chat_throttle(self, chat_id):
+        throttle = self.chat_throttles.get(chat_id)
+        if throttle is None:
+            interval = self.group_interval if is_group_chat(chat_id) else PRIVATE_CHAT_INTERVAL
+            throttle = self.chat_throttles[chat_id] = ChatThrottle(interval)
+        return throttle
+
+    async def _post(self, api_method, chat_id, text, image_path):
+        if api_method == 'sendPhoto':
+            data = {'chat_id': chat_id, 'caption': text, 'parse_mode': 'Markdown'}
+            # Уже загружавшееся фото - по file_id (core/telegram_files.py)
+            file_id, digest = await sync_to_async(cached_file_id)(image_path)
+            if file_id:
+                response = await self.client.post(api_method, data={**data, 'photo': file_id})
+                if response.status_code != 400 or not is_stale_file_id_error(telegram_error_description(response)):
+                    return response
+                await sync_to_async(forget_file_id)(image_path, digest)
+
+            photo = await asyncio.to_thread(_read_file, image_path)
+            response = await self.client.post(
+                api_method, data=data, files={'photo': (os.path.basename(image_path), photo)},
+            )
+            if response.status_code == 200:
+                await sync_to_async(remember_file_id)(
+                    image_path, digest, photo_file_id(response.json().get('result', {}))
+                )
+            return response
+        return await self.client.post(
+            api_method, json={'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'},
+        )
+
+    async def send_message(self, chat_id, text, image_path=None):
+        """Отправить одно сообщение (с фото, если файл есть). True - доставлено"""
+        return (await self.send(chat_id, text, image_path)).ok
+
+    async def send(self, chat_id, text, image_path=None):
+        """Как send_message, но с причиной ошибки (SendResult)"""
+        if not chat_id:
+            logger.warning("Cannot send Telegram message: chat_id is empty")
+            return SendResult(False, 'empty chat_id')
+
+        api_method = 'sendPhoto' if image_path and os.path.isfile(image_path) else 'sendMessage'
+        error = ''
+        async with self.chat_throttle(chat_id) as throttle:
+            for attempt in range(MAX_RETRIES + 1):
+                if attempt:
+                    await throttle.wait_turn()
+                await self.global_throttle.wait()
+                throttle.started()
+                response = await self._request(api_method, chat_id, text, image_path)
+
+                if response is not None and response.status_code == 200:
+                    return SendResult(True)
+
+                if response is not None and response.status_code == 429:
+                    telegram_send_failures.inc(method=api_method, reason='http_429')
+                    retry_after = _retry_after(response)
+                    logger.warning(f"Telegram rate limit for {chat_id}: retry after {retry_after}s")
+                    throttle.pause(retry_after)
+                    self.global_throttle.pause(retry_after)  # остальные отправки тоже получили бы 429
+                    error = 'http_429'
+                    continue
+
+                if response is not None and response.status_code < 500:
+                    # 400/403 (бот заблокирован, неверный chat_id) - повтор не поможет
+                    telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
+                    logger.error(
+                        f"Failed to send Telegram message. Status: {response.status_code}, Response: {response.text}"
+                    )
+                    description = telegram_error_description(response)
+                    blocked = response.status_code == 403 or any(
+                        marker in description.lower() for marker in BLOCKED_ERRORS
+                    )
+                    return SendResult(False, description or f'http_{response.status_code}', blocked)
+
+                if response is not None:
+                    telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
+                    error = f'http_{response.status_code}'
+                else:
+                    error = 'network'
+                # Сеть / 5xx - экспоненциальная пауза 1, 2, 4 сек
+                throttle.pause(2 ** attempt)
+        return SendResult(False, error)
+
+    async def _request(self, api_method, chat_id, text, image_path):
+        """Один вызов Bot API. None - сетевая ошибка"""
+        async with self.semaphore:
+            try:
+                with telegram_send_duration.time(method=api_method):
+                    return await self._post(api_method, chat_id, text, image_path)
+            except httpx.TimeoutException:
+                telegram_send_failures.inc(method=api_method, reason='timeout')
+                logger.error(f"Telegram API request timed out ({chat_id})")
+            except (httpx.HTTPError, OSError) as e:
+                telegram_send_failures.inc(method=api_method, reason='network')
+                logger.error(f"Error sending Telegram message to {chat_id}: {str(e)}")
+        return None
+
+    async def send_many(self, messages):
+        """
+        messages: [(chat_id, text) или (chat_id, text, image_path), ...]
+        Возвращает список True/False в том же порядке
+        """
+        return await asyncio.gather(*(self.send_message(*message) for message in messages))
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _retry_after(response):
+    try:
+        return float(response.json().get('parameters', {}).get('retry_after', 1))
+    except ValueError:
+        return float(response.headers.get('Retry-After', 1))
+
+
+async def asend_messages(messages, **kwargs):
+    async with AsyncTelegramSender(**kwargs) as sender:
+        return await sender.send_many(messages)
+
+
+def send_messages(messages, **kwargs):
+    """Синхронная обёртка: разослать пачку сообщений параллельно, вернуть список True/False"""
+    return async_to_sync(asend_messages)(list(messages), **kwargs)
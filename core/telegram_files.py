@@ -0,0 +1,82 @@
+"""
+Telegram file_id cache for photos sent by the site and the bot.
+
+После первой загрузки фото Telegram возвращает file_id - дальше то же
+фото отправляется строкой file_id без загрузки байтов (мгновенно и без
+исходящего трафика). Ключ кэша - путь + SHA-256 содержимого, хэш
+пересчитывается только при изменении размера/mtime файла.
+
+file_id действителен только для того бота, который загрузил файл.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+from django.db.models import F
+
+from .metrics import telegram_file_cache_lookups
+
+
+@lru_cache(maxsize=2048)
+def _digest(path, mtime_ns, size):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def content_hash(path):
+    stat = os.stat(path)
+    return _digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def cached_file_id(path):
+    """(file_id или None, хэш содержимого) для локального файла"""
+    from .models import TelegramFileCache
+
+    digest = content_hash(path)
+    file_id = (
+        TelegramFileCache.objects.filter(path=path, content_hash=digest)
+        .values_list('file_id', flat=True).first()
+    )
+    telegram_file_cache_lookups.inc(result='hit' if file_id else 'miss')
+    if file_id:
+        TelegramFileCache.objects.filter(path=path, content_hash=digest).update(hits=F('hits') + 1)
+    return file_id, digest
+
+
+def remember_file_id(path, digest, file_id):
+    from .models import TelegramFileCache
+
+    if file_id:
+        TelegramFileCache.objects.update_or_create(
+            path=path, content_hash=digest, defaults={'file_id': file_id},
+        )
+
+
+# Описания ошибок 400 Bot API про сам file_id. Остальные 400 (ошибка
+# разметки подписи, chat not found) не значат, что file_id устарел
+STALE_FILE_ERRORS = ('wrong file identifier', 'wrong remote file identifier', 'file_id', 'file reference')
+
+
+def is_stale_file_id_error(description):
+    """Ответ 400 на отправку по file_id: загрузить файл заново?"""
+    description = (description or '').lower()
+    return any(marker in description for marker in STALE_FILE_ERRORS)
+
+
+def forget_file_id(path, digest):
+    """file_id отвергнут Telegram (другой бот, файл удалён) - загрузим заново"""
+    from .models import TelegramFileCache
+
+    TelegramFileCache.objects.filter(path=path, content_hash=digest).delete()
+
+
+def photo_file_id(payload):
+    """file_id самого большого размера из ответа sendPhoto (dict result или telebot Message)"""
+    photos = payload.get('photo') if isinstance(payload, dict) else getattr(payload, 'photo', None)
+    if not photos:
+        return ''
+    largest = photos[-1]
+    return largest['file_id'] if isinstance(largest, dict) else largest.file_id
@@ -1,4 +0,0 @@
-# Django tests for core app
-from django.test import TestCase
-
-# Create your tests here.
@@ -0,0 +1,121 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.api import LISTING_DEFAULT_FIELDS
+from core.models import Animal, AnimalImage
+
+from .utils import make_animal, make_user
+
+
+class ListingsApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        now = timezone.now()
+        cls.animals = []
+        for i in range(7):
+            animal = make_animal(cls.seller, title=f'#{i}', is_approved=True, is_vip=i in (2, 5),
+                                 category='pigeon' if i % 2 else 'parrot')
+            cls.animals.append(animal)
+        # Одинаковое время создания - порядок решает id
+        Animal.objects.filter(pk__in=[a.pk for a in cls.animals[:4]]).update(created_at=now - timedelta(hours=1))
+        cls.hidden = make_animal(cls.seller, title='На модерации')
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, json.loads(response.content) if response.status_code != 304 else None
+
+    def expected_order(self):
+        return list(
+            Animal.objects.filter(is_approved=True)
+            .order_by('-is_vip', '-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_default_fields(self):
+        response, data = self.get('/api/v1/listings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data['results'][0]), list(LISTING_DEFAULT_FIELDS))
+        self.assertNotIn(self.hidden.pk, [row['id'] for row in data['results']])
+
+    def test_selected_fields(self):
+        _, data = self.get('/api/v1/listings/', fields='id,version, seller,id')
+        self.assertEqual(list(data['results'][0]), ['id', 'version', 'seller'])
+        self.assertEqual(data['results'][0]['seller'], 'seller')
+
+    def test_unknown_field(self):
+        response, data = self.get('/api/v1/listings/', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown fields: password', data['error'])
+
+    def test_cursor_pages(self):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {'fields': 'id', 'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            _, data = self.get('/api/v1/listings/', **params)
+            ids += [row['id'] for row in data['results']]
+            cursor, pages = data['next'], pages + 1
+            if cursor is None:
+                break
+        self.assertEqual(ids, self.expected_order())
+        self.assertEqual(pages, 4)
+
+    def test_cursor_with_filter(self):
+        _, first = self.get('/api/v1/listings/', fields='id,category', category='pigeon', limit=2)
+        _, second = self.get('/api/v1/listings/', fields='id,category', category='pigeon', limit=2,
+                             cursor=first['next'])
+        rows = first['results'] + second['results']
+        self.assertEqual({row['category'] for row in rows}, {'pigeon'})
+        self.assertEqual(len(rows), 3)
+        self.assertIsNone(second['next'])
+
+    def test_invalid_cursor_and_limit(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'cursor': 'WzEsMl0'}, {'limit': 'ten'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get('/api/v1/listings/', **params)[0].status_code, 400)
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_limit_is_clamped(self):
+        _, data = self.get('/api/v1/listings/', limit=1000)
+        self.assertEqual(len(data['results']), 3)
+
+    def test_etag(self):
+        response, _ = self.get('/api/v1/listings/')
+        cached = self.client.get('/api/v1/listings/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_new_listing_invalidates_cache(self):
+        self.get('/api/v1/listings/', fields='id')
+        with self.captureOnCommitCallbacks(execute=True):
+            new = make_animal(self.seller, is_approved=True, is_vip=True)
+        _, data = self.get('/api/v1/listings/', fields='id')
+        self.assertEqual(data['results'][0]['id'], new.pk)
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post('/api/v1/listings/').status_code, 405)
+
+
+class ListingDetailApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = make_user('seller')
+        cls.animal = make_animal(seller, is_approved=True, breed='Бухарский', description='Описание')
+        AnimalImage.objects.create(animal=cls.animal, image='animals/gallery/1.jpg')
+        cls.hidden = make_animal(seller)
+
+    def test_fields(self):
+        data = json.loads(self.client.get(f'/api/v1/listings/{self.animal.pk}/', {'fields': 'breed,description'}).content)
+        self.assertEqual(data, {'breed': 'Бухарский', 'description': 'Описание'})
+
+    def test_photos_only_when_requested(self):
+        data = json.loads(self.client.get(f'/api/v1/listings/{self.animal.pk}/', {'fields': 'id,photos'}).content)
+        self.assertEqual(data['photos'], ['/media/animals/gallery/1.jpg'])
+
+    def test_not_approved(self):
+        self.assertEqual(self.client.get(f'/api/v1/listings/{self.hidden.pk}/').status_code, 404)
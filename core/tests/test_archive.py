@@ -0,0 +1,126 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.archive import archivable_listings, archive_listings, load_snapshot
+from core.models import Animal, ArchivedAnimal, Bid, Comment, Offer
+
+from .utils import make_animal, make_user
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.buyer = make_user('buyer')
+        long_ago = timezone.now() - timedelta(days=200)
+
+        cls.sold = make_animal(cls.seller, title='Проданный голубь', status='sold', is_sold=True,
+                               is_approved=True, listing_type='auction', start_price=Decimal('100'),
+                               current_price=Decimal('180.00'), auction_end_date=long_ago)
+        Bid.objects.create(animal=cls.sold, bidder=cls.buyer, amount=Decimal('180.00'))
+        Comment.objects.create(animal=cls.sold, author=cls.buyer, text='Отличная птица!')
+        Offer.objects.create(animal=cls.sold, buyer=cls.buyer, price=Decimal('150.00'))
+        cls.withdrawn = make_animal(cls.seller, title='Снятое', status='archived')
+        cls.recent = make_animal(cls.seller, title='Недавно продан', status='sold', is_sold=True)
+        cls.active = make_animal(cls.seller, title='Активное', is_approved=True)
+        Animal.objects.filter(pk__in=[cls.sold.pk, cls.withdrawn.pk, cls.active.pk]).update(updated_at=long_ago)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(ARCHIVE_ROOT=directory.name, ARCHIVE_AFTER_DAYS=180)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_archivable(self):
+        self.assertEqual(set(archivable_listings()), {self.sold, self.withdrawn})
+        self.assertIn(self.recent, archivable_listings(days=0))
+
+    def assert_round_trip(self, target):
+        self.assertEqual(archive_listings(target=target, batch_size=1), 2)
+
+        self.assertFalse(Animal.objects.filter(pk__in=[self.sold.pk, self.withdrawn.pk]).exists())
+        self.assertFalse(Bid.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(Animal.objects.filter(pk=self.recent.pk).exists())
+
+        archived = ArchivedAnimal.objects.get(pk=self.sold.pk)
+        self.assertEqual((archived.status, archived.price, archived.owner), ('sold', Decimal('180.00'), self.seller))
+        data = load_snapshot(archived)
+        self.assertEqual(data['title'], 'Проданный голубь')
+        self.assertEqual(data['owner_username'], 'seller')
+        self.assertEqual([bid['amount'] for bid in data['bids']], ['180.00'])
+        self.assertEqual([comment['text'] for comment in data['comments']], ['Отличная птица!'])
+        self.assertEqual([offer['price'] for offer in data['offers']], ['150.00'])
+        self.assertEqual(load_snapshot(ArchivedAnimal.objects.get(pk=self.withdrawn.pk))['title'], 'Снятое')
+        return archived
+
+    def test_round_trip_db(self):
+        archived = self.assert_round_trip('db')
+        self.assertIsNotNone(archived.data)
+
+    def test_round_trip_jsonl(self):
+        archived = self.assert_round_trip('jsonl')
+        self.assertIsNone(archived.data)
+        # Файл из отдельных gzip-членов читается целиком как обычный .jsonl.gz
+        with gzip.open(os.path.join(settings.ARCHIVE_ROOT, archived.archive_file), 'rt', encoding='utf-8') as f:
+            titles = [json.loads(line)['title'] for line in f]
+        self.assertEqual(sorted(titles), ['Проданный голубь', 'Снятое'])
+
+    def test_conflict_keeps_listing(self):
+        ArchivedAnimal.objects.create(id=self.sold.pk, owner=self.seller, title='old',
+                                      archived_at=timezone.now(), created_at=timezone.now())
+        with self.assertRaises(IntegrityError):
+            archive_listings()
+        self.assertTrue(Animal.objects.filter(pk=self.sold.pk).exists())
+        self.assertEqual(Bid.objects.count(), 1)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('archive_listings', '--dry-run', stdout=out)
+        self.assertIn('Listings to archive: 2', out.getvalue())
+        call_command('archive_listings', '--to', 'jsonl', stdout=out)
+        self.assertEqual(ArchivedAnimal.objects.count(), 2)
+
+
+class ArchivedAnimalDetailTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = make_user('seller')
+        buyer = make_user('buyer')
+        animal = make_animal(seller, title='Старый аукцион', status='sold', is_sold=True)
+        Comment.objects.create(animal=animal, author=buyer, text='Поздравляю с продажей')
+        Bid.objects.create(animal=animal, bidder=buyer, amount=Decimal('120.00'))
+        cls.pk = animal.pk
+        archive_listings(days=0)
+
+    def test_old_link_shows_archive(self):
+        response = self.client.get(f'/animal/{self.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'core/animal_archived.html')
+        self.assertEqual(response['X-Robots-Tag'], 'noindex')
+        self.assertContains(response, 'Старый аукцион')
+        self.assertContains(response, 'Поздравляю с продажей')
+        self.assertEqual(response.context['bids_count'], 1)
+
+    def test_missing_listing(self):
+        self.assertEqual(self.client.get(f'/animal/{self.pk + 1000}/').status_code, 404)
+
+    def test_missing_snapshot_file(self):
+        ArchivedAnimal.objects.filter(pk=self.pk).update(data=None, archive_file='missing.jsonl.gz')
+        response = self.client.get(f'/animal/{self.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Старый аукцион')  # заголовок из строки таблицы
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from core.bot_runtime import ChatSerialExecutor, chat_key
+
+
+class ChatSerialExecutorTests(SimpleTestCase):
+
+    def make_executor(self, **kwargs):
+        executor = ChatSerialExecutor(**kwargs)
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def test_order_within_chat(self):
+        executor = self.make_executor(workers=4, queue_size=1000)
+        lock = threading.Lock()
+        seen = {}
+        running = set()
+        overlaps = []
+
+        def task(chat, n):
+            with lock:
+                if chat in running:
+                    overlaps.append((chat, n))
+                running.add(chat)
+            time.sleep(random.random() / 1000)
+            with lock:
+                running.discard(chat)
+                seen.setdefault(chat, []).append(n)
+
+        for n in range(50):
+            for chat in range(5):
+                executor.submit(chat, task, chat, n)
+        executor.shutdown()
+
+        self.assertEqual(overlaps, [])
+        self.assertEqual(seen, {chat: list(range(50)) for chat in range(5)})
+
+    def test_chats_run_in_parallel(self):
+        executor = self.make_executor(workers=2)
+        slow_started = threading.Event()
+        release = threading.Event()
+        fast_done = threading.Event()
+
+        def slow():
+            slow_started.set()
+            release.wait(5)
+
+        executor.submit('slow', slow)
+        self.assertTrue(slow_started.wait(5))
+        executor.submit('fast', fast_done.set)
+        # Медленный чат не держит остальные
+        self.assertTrue(fast_done.wait(5))
+        release.set()
+
+    def test_error_does_not_stop_chat(self):
+        errors = []
+        executor = self.make_executor(workers=1, on_error=lambda e: errors.append(e) or True)
+        done = []
+
+        def fail():
+            raise ValueError('boom')
+
+        executor.submit(1, fail)
+        executor.submit(1, done.append, 'next')
+        executor.shutdown()
+
+        self.assertEqual(done, ['next'])
+        self.assertEqual([str(e) for e in errors], ['boom'])
+
+    def test_full_queue_blocks_submit(self):
+        executor = self.make_executor(workers=1, queue_size=2)
+        release = threading.Event()
+        executor.submit(1, release.wait, 5)
+        executor.submit(2, lambda: None)
+
+        submitted = threading.Event()
+        thread = threading.Thread(target=lambda: (executor.submit(3, lambda: None), submitted.set()))
+        thread.start()
+        self.assertFalse(submitted.wait(0.2))
+        release.set()
+        self.assertTrue(submitted.wait(5))
+        thread.join()
+
+    def test_submit_after_shutdown(self):
+        executor = self.make_executor(workers=1)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            executor.submit(1, lambda: None)
+
+
+class ChatKeyTests(SimpleTestCase):
+
+    def test_message_uses_chat(self):
+        message = SimpleNamespace(chat=SimpleNamespace(id=10), from_user=SimpleNamespace(id=20))
+        self.assertEqual(chat_key(message), 10)
+
+    def test_callback_uses_message_chat(self):
+        callback = SimpleNamespace(message=SimpleNamespace(chat=SimpleNamespace(id=10)),
+                                   from_user=SimpleNamespace(id=20))
+        self.assertEqual(chat_key(callback), 10)
+
+    def test_inline_query_uses_user(self):
+        self.assertEqual(chat_key(SimpleNamespace(from_user=SimpleNamespace(id=20))), 20)
+
+    def test_unknown_update(self):
+        self.assertIsNone(chat_key([]))
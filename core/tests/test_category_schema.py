@@ -0,0 +1,97 @@
+import json
+
+from django.template.loader import get_template
+from django.test import SimpleTestCase, TestCase
+
+from core.category_schema import DYNAMIC_FORM, LISTING_FORM
+from core.forms import AnimalForm
+from core.forms_dynamic import DynamicAnimalForm
+from core.models import Animal
+
+from .utils import make_user
+
+BASE = {
+    'title': 'Объявление', 'description': 'Описание', 'price': '100', 'listing_type': 'fixed',
+    'city': 'dushanbe', 'phone': '+992900000000',
+}
+
+
+def errors(form_class, category, **data):
+    form = form_class({**BASE, 'category': category, **data})
+    form.is_valid()
+    return form.errors
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_every_category_has_schema(self):
+        for registry in (LISTING_FORM, DYNAMIC_FORM):
+            self.assertEqual(set(registry.schemas), {value for value, _ in Animal.CATEGORY_CHOICES})
+
+    def test_unknown_category_uses_default_group(self):
+        for category in ('', 'dragon', None):
+            self.assertEqual(LISTING_FORM.get(category).group, 'basic')
+
+    def test_fields_exist_in_model_and_forms(self):
+        model_fields = {field.name for field in Animal._meta.get_fields()}
+        for registry, form_class in ((LISTING_FORM, AnimalForm), (DYNAMIC_FORM, DynamicAnimalForm)):
+            with self.subTest(form=form_class.__name__):
+                self.assertLessEqual(set(registry.field_names), model_fields)
+                self.assertLessEqual(set(registry.field_names), set(form_class.base_fields))
+
+    def test_templates_exist(self):
+        for registry in (LISTING_FORM, DYNAMIC_FORM):
+            for _group, template in registry.templates:
+                get_template(template)
+
+    def test_schema_json(self):
+        schema = json.loads(LISTING_FORM.json)
+        self.assertEqual(schema['categories']['cow']['group'], 'livestock')
+        weight = next(field for field in schema['groups']['livestock']['fields'] if field['name'] == 'weight')
+        self.assertEqual((weight['widget'], weight['min'], weight['max']), ('number', 0.1, 5000.0))
+        breed = schema['groups']['pigeon']['fields'][0]
+        self.assertEqual((breed['name'], breed['required']), ('breed', True))
+
+
+class ValidationTests(TestCase):
+
+    def test_required_by_category(self):
+        self.assertEqual(errors(AnimalForm, 'pigeon')['breed'], ['Укажите породу голубя'])
+        self.assertNotIn('breed', errors(AnimalForm, 'pigeon', breed='Бухарский'))
+        self.assertNotIn('breed', errors(AnimalForm, 'cat'))  # у питомцев порода не обязательна
+
+        transport = errors(AnimalForm, 'transport')
+        self.assertEqual(transport['transport_type'], ['Выберите тип транспорта'])
+        self.assertEqual(transport['route_from'], ['Укажите, откуда'])
+
+    def test_validators(self):
+        self.assertEqual(errors(AnimalForm, 'cow', weight='6000')['weight'], ['Проверьте вес: больше 5000 кг'])
+        self.assertNotIn('weight', errors(AnimalForm, 'cow'))          # пустой необязательный не проверяется
+        self.assertNotIn('weight', errors(AnimalForm, 'pigeon', weight='6000'))  # не поле категории
+
+    def test_field_errors_not_duplicated(self):
+        # Ошибка самого поля формы - без второй ошибки из реестра
+        self.assertEqual(len(errors(AnimalForm, 'cow', weight='abc')['weight']), 1)
+
+    def test_dynamic_form(self):
+        livestock = errors(DynamicAnimalForm, 'sheep', weight='0')
+        self.assertEqual(livestock['livestock_breed'], ['Укажите породу'])
+        self.assertEqual(livestock['weight'], ['Вес должен быть больше 0'])
+        self.assertEqual(livestock['age'], ['Укажите возраст'])
+        self.assertNotIn('pet_breed', errors(DynamicAnimalForm, 'parrot'))
+
+
+class CategorySchemaViewTests(TestCase):
+
+    def test_etag(self):
+        response = self.client.get('/category-schema/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(LISTING_FORM.json))
+        self.assertEqual(response['ETag'], f'"{LISTING_FORM.etag}"')
+        cached = self.client.get('/category-schema/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_category_fields_partial(self):
+        self.client.force_login(make_user('seller'))
+        response = self.client.get('/get-animal-fields/', {'category': 'goat'})
+        self.assertTemplateUsed(response, 'core/partials/livestock_fields.html')
@@ -0,0 +1,125 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.chat_profiles import ChatProfileCache, MISSING, chat_profiles, profile_for_chat
+from core.models import UserProfile
+
+from .utils import make_user
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def link(user, chat_id):
+    profile = user.profile
+    profile.telegram_chat_id = chat_id
+    profile.save()
+    return profile
+
+
+class ChatProfileCacheTests(TestCase):
+    """LRU с TTL сам по себе, без БД"""
+
+    def test_lru_eviction(self):
+        lru = ChatProfileCache(size=2, ttl=60)
+        lru.set('1', 'a')
+        lru.set('2', 'b')
+        lru.get('1')  # '1' свежее, вытесняется '2'
+        lru.set('3', 'c')
+        self.assertEqual(lru.get('1'), 'a')
+        self.assertIs(lru.get('2'), MISSING)
+        self.assertEqual(lru.get('3'), 'c')
+
+    def test_ttl_expiry(self):
+        lru = ChatProfileCache(size=2, ttl=60)
+        lru.set('1', 'a')
+        with mock.patch('core.chat_profiles.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIs(lru.get('1'), MISSING)
+        self.assertEqual(len(lru.entries), 0)
+
+
+@override_settings(CACHES=LOCMEM)
+class ProfileForChatTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin', is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        cache.clear()
+        chat_profiles.clear()
+        self.addCleanup(chat_profiles.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile = link(self.admin, '100')
+
+    def test_miss_then_hit(self):
+        with self.assertNumQueries(1):
+            profile = profile_for_chat(100)
+        self.assertEqual(profile.pk, self.profile.pk)
+        self.assertEqual(profile.user.username, 'admin')
+        self.assertTrue(profile.user.is_staff)
+        with self.assertNumQueries(0):
+            again = profile_for_chat('100')
+        self.assertEqual(again.user.pk, self.admin.pk)
+
+    def test_unlinked_chat_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(profile_for_chat(200))
+        with self.assertNumQueries(0):
+            self.assertIsNone(profile_for_chat(200))
+
+    def test_demotion_in_this_process(self):
+        profile_for_chat(100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.is_staff = self.admin.is_superuser = False
+            self.admin.save()
+        self.assertFalse(profile_for_chat(100).user.is_staff)
+
+    def test_demotion_in_other_process(self):
+        """Локальная запись жива, но общий кэш получил новую метку профиля"""
+        profile_for_chat(100)
+        with mock.patch.object(chat_profiles, 'invalidate'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.admin.is_staff = self.admin.is_superuser = False
+                self.admin.save()
+        self.assertIsNotNone(chat_profiles.get('100'))
+        with self.assertNumQueries(1):
+            self.assertFalse(profile_for_chat(100).user.is_superuser)
+
+    def test_shared_mark_published_after_commit(self):
+        profile_for_chat(100)
+        with mock.patch.object(chat_profiles, 'invalidate'):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self.admin.is_staff = False
+                self.admin.save()
+            # До commit другие процессы продолжают отдавать запись из памяти
+            with self.assertNumQueries(0):
+                self.assertTrue(profile_for_chat(100).user.is_staff)
+            for callback in callbacks:
+                callback()
+        self.assertFalse(profile_for_chat(100).user.is_staff)
+
+    def test_relink_drops_old_chat_in_other_process(self):
+        profile_for_chat(100)
+        with mock.patch.object(chat_profiles, 'invalidate'):
+            with self.captureOnCommitCallbacks(execute=True):
+                link(self.admin, '300')
+        self.assertIsNone(profile_for_chat(100))
+        self.assertEqual(profile_for_chat(300).pk, self.profile.pk)
+
+    def test_unlinked_chat_is_linked_in_other_process(self):
+        self.assertIsNone(profile_for_chat(200))
+        user = make_user('seller')
+        with mock.patch.object(chat_profiles, 'invalidate'):
+            with self.captureOnCommitCallbacks(execute=True):
+                link(user, '200')
+        self.assertEqual(profile_for_chat(200).user.username, 'seller')
+
+    def test_deleted_profile(self):
+        profile_for_chat(100)
+        with mock.patch.object(chat_profiles, 'invalidate'):
+            with self.captureOnCommitCallbacks(execute=True):
+                UserProfile.objects.get(pk=self.profile.pk).delete()
+        self.assertIsNone(profile_for_chat(100))
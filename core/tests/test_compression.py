@@ -0,0 +1,145 @@
+import asyncio
+import gzip
+import zlib
+
+import brotli
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from core.middleware import CompressionMiddleware, accepted_encodings, has_csrf_form
+
+PAGE = ('<html><body>' + '<p>Голуби, кеклики и попугаи</p>' * 200 + '</body></html>').encode()
+CSRF_FORM = b'<form method="post"><input type="hidden" name="csrfmiddlewaretoken" value="x"></form>'
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=1024, COMPRESSION_SKIP_CSRF_FORMS=True)
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def process(self, response, accept='gzip, deflate, br'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def test_brotli_preferred(self):
+        response = self.process(HttpResponse(PAGE))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), PAGE)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip(self):
+        for accept in ('gzip', 'gzip, br;q=0'):
+            with self.subTest(accept=accept):
+                response = self.process(HttpResponse(PAGE), accept)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(gzip.decompress(response.content), PAGE)
+
+    def test_not_accepted(self):
+        for accept in ('', 'identity', 'gzip;q=0'):
+            with self.subTest(accept=accept):
+                self.assertFalse(self.process(HttpResponse(PAGE), accept).has_header('Content-Encoding'))
+
+    def test_weak_etag(self):
+        response = HttpResponse(PAGE)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_small_body_skipped(self):
+        response = self.process(HttpResponse(b'<p>ok</p>' * 10))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'<p>ok</p>' * 10)
+
+    def test_csrf_form_skipped(self):
+        body = PAGE.replace(b'</body>', CSRF_FORM + b'</body>')
+        response = self.process(HttpResponse(body))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, body)
+        with override_settings(COMPRESSION_SKIP_CSRF_FORMS=False):
+            self.assertEqual(self.process(HttpResponse(body))['Content-Encoding'], 'br')
+
+    def test_csrf_token_outside_post_form_compressed(self):
+        # Токен для AJAX (base.html) и GET-формы поиска - сжатие остаётся
+        body = PAGE.replace(b'<body>', b'<body><input name="csrfmiddlewaretoken" value="x">'
+                                       b'<form method="get"><input name="q"></form>')
+        self.assertFalse(has_csrf_form(body))
+        self.assertEqual(self.process(HttpResponse(body))['Content-Encoding'], 'br')
+
+    def test_skipped_responses(self):
+        encoded = HttpResponse(PAGE)
+        encoded['Content-Encoding'] = 'gzip'
+        no_transform = HttpResponse(PAGE)
+        no_transform['Cache-Control'] = 'no-transform'
+        cases = {
+            'image': HttpResponse(PAGE, content_type='image/png'),
+            'encoded': encoded,
+            'no-transform': no_transform,
+            'not-modified': HttpResponse(status=304),
+        }
+        for name, response in cases.items():
+            with self.subTest(name):
+                self.assertNotEqual(self.process(response).get('Content-Encoding'), 'br')
+
+    def test_json_types(self):
+        for content_type in ('application/json', 'application/x-ndjson; charset=utf-8', 'text/csv'):
+            with self.subTest(content_type=content_type):
+                response = self.process(HttpResponse(PAGE, content_type=content_type), 'gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_streaming(self):
+        chunks = [PAGE[:3000], PAGE[3000:], b'', b'tail']
+        response = StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        response['Content-Length'] = str(sum(map(len, chunks)))
+        response = self.process(response, 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        decompressor = zlib.decompressobj(31)
+        received = b''
+        for chunk, sent in zip(response.streaming_content, chunks):
+            # Каждый кусок уходит сразу (flush) - без накопления всего ответа
+            received += decompressor.decompress(chunk)
+            self.assertTrue(received.endswith(sent))
+        self.assertEqual(received + decompressor.flush(), b''.join(chunks))
+
+    def test_small_streaming_compressed(self):
+        # Размер потока заранее неизвестен - порог COMPRESSION_MIN_SIZE не применяется
+        response = self.process(StreamingHttpResponse(iter([b'id\n', b'1\n']), content_type='text/csv'), 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'id\n1\n')
+
+    def test_async_streaming(self):
+        async def chunks():
+            yield PAGE[:100]
+            yield PAGE[100:]
+
+        async def get_response(request):
+            return StreamingHttpResponse(chunks(), content_type='text/html')
+
+        async def run():
+            middleware = CompressionMiddleware(get_response)
+            response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br'))
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        response, body = asyncio.run(run())
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(body), PAGE)
+
+
+class CompressedPagesTests(TestCase):
+    """Страницы целиком: публичная сжимается, форма входа (CSRF) - нет"""
+
+    def test_home(self):
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'</html>', gzip.decompress(response.content))
+
+    def test_login_form(self):
+        response = self.client.get('/login/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class AcceptEncodingTests(SimpleTestCase):
+
+    def test_parse(self):
+        self.assertEqual(accepted_encodings('gzip, br;q=0.5, *;q=0'), {'gzip': 1.0, 'br': 0.5, '*': 0.0})
+        self.assertEqual(accepted_encodings(None), {})
@@ -0,0 +1,110 @@
+import io
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image, ImageDraw
+
+from core.duplicates import (
+    blocking_duplicate, find_duplicates, hamming, text_minhash, text_similarity, to_signed,
+)
+from core.image_utils import photo_dhash
+from core.models import AnimalFingerprintBand
+
+from .utils import make_animal, make_user
+
+DESCRIPTION = 'Продаю пару бойных голубей, летают по 6 часов, здоровые, привиты. Звоните вечером.'
+
+
+def picture(shapes, size=None, quality=95):
+    """JPEG с фигурами; size - то же изображение, уменьшенное (повторная загрузка)"""
+    # Градиентный фон: у однотонного фона dHash сравнивает равные пиксели - шум
+    img = Image.linear_gradient('L').rotate(90).resize((320, 240)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for box, color in shapes:
+        draw.ellipse(box, fill=color)
+    if size:
+        img = img.resize(size)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+    return buffer
+
+
+PIGEON = [((40, 40, 200, 180), 'gray'), ((150, 20, 300, 120), 'black')]
+PARROT = [((0, 100, 120, 240), 'green'), ((200, 0, 320, 200), 'red')]
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_short_text_has_no_signature(self):
+        self.assertIsNone(text_minhash('Голубь'))
+
+    def test_text_similarity(self):
+        original = text_minhash(DESCRIPTION)
+        self.assertEqual(text_similarity(original, text_minhash(DESCRIPTION.upper())), 1.0)
+        edited = text_minhash(DESCRIPTION.replace('вечером', 'днём'))
+        self.assertGreaterEqual(text_similarity(original, edited), 0.6)
+        other = text_minhash('Щенки немецкой овчарки, 2 месяца, документы РКФ, родители чемпионы.')
+        self.assertLess(text_similarity(original, other), 0.3)
+
+    def test_photo_hash_survives_recompression(self):
+        original = photo_dhash(picture(PIGEON))
+        recompressed = photo_dhash(picture(PIGEON, size=(160, 120), quality=40))
+        self.assertLessEqual(hamming(original, recompressed), 6)
+        self.assertGreater(hamming(original, photo_dhash(picture(PARROT))), 6)
+
+    def test_signed_hash(self):
+        value = (1 << 64) - 1
+        self.assertLess(to_signed(value), 0)
+        self.assertEqual(hamming(to_signed(value), value), 0)
+
+
+class FindDuplicatesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.other = make_user('other')
+        cls.photo = to_signed(photo_dhash(picture(PIGEON)))
+        cls.original = make_animal(cls.seller, title='Бойные голуби', description=DESCRIPTION,
+                                   photo_hash=cls.photo)
+
+    def new_listing(self, owner=None, **kwargs):
+        fields = {'title': 'Бойные голуби', 'description': DESCRIPTION}
+        fields.update(kwargs)
+        return make_animal(owner or self.seller, **fields)
+
+    def test_bands_stored_on_save(self):
+        kinds = set(AnimalFingerprintBand.objects.filter(animal=self.original).values_list('kind', flat=True))
+        self.assertEqual(kinds, {'photo', 'text'})
+
+    def test_same_text_same_owner(self):
+        repost = self.new_listing(description=DESCRIPTION.replace('вечером', 'днём'))
+        matches = find_duplicates(repost)
+        self.assertEqual([(m[0], m[1]) for m in matches], [(self.original, 'text')])
+        self.assertIsNone(blocking_duplicate(repost, matches))  # по тексту - только пометка
+
+    def test_same_photo_blocks(self):
+        repost = self.new_listing(title='Другое', description='Совсем другой текст объявления про птиц',
+                                  photo_hash=self.photo ^ 0b101)
+        matches = find_duplicates(repost)
+        self.assertEqual(matches[0][:2], (self.original, 'photo'))
+        self.assertEqual(blocking_duplicate(repost, matches), self.original)
+        with override_settings(DUPLICATE_LISTINGS_BLOCK=False):
+            self.assertIsNone(blocking_duplicate(repost, matches))
+
+    def test_same_phone_other_account(self):
+        repost = self.new_listing(self.other)
+        self.assertEqual([m[0] for m in find_duplicates(repost)], [self.original])
+
+    def test_other_seller_ignored(self):
+        repost = self.new_listing(self.other, phone='+992911111111', photo_hash=self.photo)
+        self.assertEqual(find_duplicates(repost), [])
+
+    def test_archived_ignored(self):
+        self.original.status = 'archived'
+        self.original.save()
+        self.assertEqual(find_duplicates(self.new_listing()), [])
+
+    def test_unrelated_listing(self):
+        listing = self.new_listing(title='Щенки', description='Щенки немецкой овчарки, 2 месяца, документы РКФ.')
+        self.assertEqual(find_duplicates(listing), [])
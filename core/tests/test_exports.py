@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from core import exports
+from core.exports import ExportError, stream_export
+from core.models import Animal, Bid
+
+from .utils import make_animal, make_user
+
+
+def read_csv(chunks):
+    text = b''.join(chunks).decode('utf-8')
+    return list(csv.DictReader(io.StringIO(text.lstrip('\ufeff'))))
+
+
+def read_jsonl(chunks):
+    return [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+
+
+class StreamExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.bidder = make_user('bidder')
+        cls.pigeon = make_animal(cls.seller, title='Голубь, "бойный"', listing_type='auction',
+                                 start_price=Decimal('50.00'), current_price=Decimal('75.50'))
+        cls.parrot = make_animal(cls.seller, category='parrot', title='Попугай', breed='')
+        Bid.objects.create(animal=cls.pigeon, bidder=cls.bidder, amount=Decimal('75.50'))
+        # Старое объявление - для фильтра по датам
+        cls.old = make_animal(cls.seller, title='Старое')
+        Animal.objects.filter(pk=cls.old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+    def test_csv(self):
+        chunks = list(stream_export('animals', 'csv'))
+        self.assertTrue(chunks[0].startswith('\ufeff'.encode('utf-8')))
+        rows = read_csv(chunks)
+        self.assertEqual([int(row['id']) for row in rows], [self.pigeon.pk, self.parrot.pk, self.old.pk])
+        self.assertEqual(rows[0]['title'], 'Голубь, "бойный"')
+        self.assertEqual(rows[0]['current_price'], '75.50')
+        self.assertEqual(rows[1]['current_price'], '')  # None -> пустая ячейка
+        self.assertEqual(rows[0]['owner'], 'seller')
+
+    def test_jsonl(self):
+        rows = read_jsonl(stream_export('bids', 'jsonl'))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '75.50')  # Decimal без потери точности
+        self.assertEqual(rows[0]['category'], 'pigeon')
+        self.assertEqual(rows[0]['bidder'], 'bidder')
+        self.assertIsNotNone(datetime.fromisoformat(rows[0]['created_at']).tzinfo)
+
+    def test_filters(self):
+        today = timezone.localdate()
+        rows = read_jsonl(stream_export('animals', 'jsonl', date_from=today - timedelta(days=1)))
+        self.assertNotIn(self.old.pk, [row['id'] for row in rows])
+        rows = read_jsonl(stream_export('animals', 'jsonl', date_to=today - timedelta(days=30)))
+        self.assertEqual([row['id'] for row in rows], [self.old.pk])
+        rows = read_jsonl(stream_export('animals', 'jsonl', category='parrot'))
+        self.assertEqual([row['id'] for row in rows], [self.parrot.pk])
+        self.assertEqual(read_jsonl(stream_export('bids', 'jsonl', category='parrot')), [])
+
+    def test_chunked_output_is_complete(self):
+        with mock.patch.object(exports, 'FLUSH_BYTES', 10):
+            csv_chunks = list(stream_export('animals', 'csv', chunk_size=1))
+            jsonl_chunks = list(stream_export('animals', 'jsonl', chunk_size=1))
+        self.assertGreater(len(csv_chunks), 3)
+        self.assertEqual(read_csv(csv_chunks), read_csv(stream_export('animals', 'csv')))
+        self.assertEqual(read_jsonl(jsonl_chunks), read_jsonl(stream_export('animals', 'jsonl')))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ExportError):
+            stream_export('users', 'csv')
+        with self.assertRaises(ExportError):
+            stream_export('animals', 'xml')
+        with self.assertRaises(ExportError):
+            stream_export('transactions', 'csv', category='pigeon')
+
+    @unittest.skipIf(exports.pyarrow is not None, 'pyarrow installed')
+    def test_parquet_requires_pyarrow(self):
+        with self.assertRaises(ExportError):
+            stream_export('animals', 'parquet')
+        self.assertNotIn('parquet', exports.available_formats())
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bids.jsonl')
+            call_command('export_data', 'bids', '--format', 'jsonl', '--output', path, stdout=io.StringIO())
+            with open(path, 'rb') as f:
+                self.assertEqual(len(read_jsonl([f.read()])), 1)
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'transactions', '--category', 'pigeon', stdout=io.StringIO())
+
+
+class ExportViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = make_user('manager', is_staff=True)
+        make_animal(cls.staff)
+
+    def test_staff_only(self):
+        response = self.client.get('/manager/export/animals/')
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(make_user('buyer'))
+        self.assertEqual(self.client.get('/manager/export/animals/').status_code, 302)
+
+    def test_streaming_download(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/manager/export/animals/', {'format': 'jsonl', 'category': 'pigeon'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn('attachment; filename="animals', response['Content-Disposition'])
+        self.assertEqual(len(read_jsonl(response.streaming_content)), 1)
+
+    def test_bad_request(self):
+        self.client.force_login(self.staff)
+        for params in ({'format': 'xml'}, {'date_from': '2026-13-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/manager/export/animals/', params).status_code, 400)
+        self.assertEqual(self.client.get('/manager/export/users/').status_code, 400)
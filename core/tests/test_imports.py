@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+import tempfile
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.imports import (
+    ImportFileError, claim_job, errors_path, import_listings, job_dir, queue_import, run_job,
+)
+from core.models import Animal, ImportJob
+
+from .utils import make_user
+
+FIELDS = ['category', 'title', 'description', 'price', 'listing_type', 'city', 'phone', 'breed', 'is_vip', 'main_photo']
+VALID = {
+    'category': 'pigeon', 'title': 'Бойный голубь', 'description': 'Летает 5 часов, здоров',
+    'price': '250', 'listing_type': 'fixed', 'city': 'dushanbe', 'phone': '+992900000000',
+    'breed': 'Таджикский', 'is_vip': '', 'main_photo': 'a.jpg',
+}
+
+
+def jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'gray').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def photo_archive(*names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name in names:
+            archive.writestr(name, jpeg())
+    buffer.seek(0)
+    return buffer
+
+
+def csv_file(rows):
+    text = io.StringIO()
+    writer = csv.DictWriter(text, FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.BytesIO(text.getvalue().encode('utf-8'))
+
+
+class ImportTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('farm')
+        cls.staff = make_user('manager', is_staff=True)
+
+    def setUp(self):
+        for setting in ('MEDIA_ROOT', 'IMPORT_ROOT'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            override = override_settings(**{setting: directory.name})
+            override.enable()
+            self.addCleanup(override.disable)
+
+
+class ImportListingsTests(ImportTestCase):
+
+    def test_row_errors(self):
+        rows = [
+            VALID,
+            {**VALID, 'breed': ''},                       # порода обязательна для голубей
+            {**VALID, 'main_photo': 'missing.jpg'},
+            {**VALID, 'price': 'abc'},
+            {**VALID, 'title': 'VIP', 'is_vip': 'да', 'main_photo': 'B.JPG'},
+        ]
+        result = import_listings(csv_file(rows), 'csv', photo_archive('a.jpg', 'photos/b.jpg'), self.seller)
+
+        self.assertEqual((result.total, result.created, result.failed), (5, 2, 3))
+        # Номер строки - как в файле (1 - заголовок)
+        self.assertEqual([(row, name) for row, name, _ in result.errors], [(3, 'breed'), (4, 'main_photo'), (5, 'price')])
+        self.assertEqual(result.errors[0][2], 'Укажите породу голубя')
+
+        created = Animal.objects.filter(owner=self.seller)
+        self.assertEqual(created.count(), 2)
+        self.assertFalse(created.filter(is_approved=True).exists())
+        self.assertFalse(created.filter(is_vip=True).exists())  # платные опции не импортируются
+        self.assertTrue(all(animal.main_photo for animal in created))
+        self.assertEqual(created.get(title='VIP').fingerprint_bands.filter(kind='text').count(), 16)
+
+        report = io.StringIO()
+        result.write_errors(report)
+        self.assertEqual(report.getvalue().splitlines()[0], 'row,field,error')
+
+    def test_jsonl_invalid_line(self):
+        data = io.BytesIO(f'{json.dumps(VALID)}\n\nnot json\n'.encode('utf-8'))
+        result = import_listings(data, 'jsonl', photo_archive('a.jpg'), self.seller)
+        self.assertEqual((result.total, result.created), (2, 1))
+        self.assertEqual(result.errors[0][:2], (3, ''))
+        self.assertTrue(result.errors[0][2].startswith('Invalid JSON'))
+
+    def test_bad_archive(self):
+        with self.assertRaises(ImportFileError):
+            import_listings(csv_file([VALID]), 'csv', io.BytesIO(b'not a zip'), self.seller)
+
+    def test_batches_report_progress(self):
+        seen = []
+        result = import_listings(
+            csv_file([VALID] * 5), 'csv', photo_archive('a.jpg'), self.seller,
+            batch_size=2, progress=lambda result: seen.append(result.created),
+        )
+        self.assertEqual(result.created, 5)
+        self.assertEqual(seen, [2, 4, 5])
+
+
+class ImportQueueTests(ImportTestCase):
+
+    def queue(self, rows, archive=None):
+        return queue_import(
+            SimpleUploadedFile('listings.csv', csv_file(rows).getvalue()),
+            SimpleUploadedFile('photos.zip', (archive or photo_archive('a.jpg')).getvalue()),
+            self.seller, created_by=self.staff,
+        )
+
+    def test_run_job(self):
+        job = self.queue([VALID, {**VALID, 'breed': ''}])
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(claim_job(), job)
+        self.assertIsNone(claim_job())  # уже running
+
+        job = run_job(ImportJob.objects.get(pk=job.pk))
+        self.assertEqual((job.status, job.total, job.created, job.failed), ('done', 2, 1, 1))
+        self.assertEqual(job.errors_preview, [[3, 'breed', 'Укажите породу голубя']])
+        self.assertIsNotNone(job.finished_at)
+        # Загрузки удалены, отчёт остался
+        self.assertEqual(sorted(path.name for path in job_dir(job).iterdir()), ['errors.csv'])
+
+    def test_failed_job(self):
+        job = self.queue([VALID], archive=io.BytesIO(b'not a zip'))
+        job = run_job(claim_job())
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Bad photo archive', job.error)
+        self.assertFalse(errors_path(job).exists())
+
+    def test_command_runs_queue(self):
+        job = self.queue([VALID])
+        call_command('import_listings', '--queue', '--once', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.created), ('done', 1))
+
+    def test_page_queues_job(self):
+        self.client.force_login(self.staff)
+        response = self.client.post('/manager/import/', {
+            'owner': '@farm',
+            'data_file': SimpleUploadedFile('listings.csv', csv_file([VALID]).getvalue()),
+            'photos': SimpleUploadedFile('photos.zip', photo_archive('a.jpg').getvalue()),
+        })
+        self.assertEqual(response.status_code, 302)
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.owner, job.created_by), ('queued', self.seller, self.staff))
+        self.assertFalse(Animal.objects.exists())  # импорт - не в запросе
+
+    def test_error_report_is_staff_only(self):
+        self.queue([{**VALID, 'breed': ''}])
+        job = run_job(claim_job())
+        url = f'/manager/import/{job.pk}/errors.csv'
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'breed', b''.join(response.streaming_content))
+        response.close()
@@ -0,0 +1,66 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.listing_feed import VERSION_HEADER, touch_listings
+from core.models import Comment
+
+from .utils import make_animal, make_user
+
+
+class ListingVersionTests(TestCase):
+    """Версия карточки в ленте SW меняется вместе со всем, что карточка показывает"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.buyer = make_user('buyer')
+        cls.animal = make_animal(cls.seller, is_approved=True, listing_type='auction',
+                                 start_price=Decimal('100'), current_price=Decimal('100'))
+
+    def feed_version(self):
+        listings = json.loads(self.client.get('/feed/listings.json').content)['listings']
+        return next(listing['v'] for listing in listings if listing['id'] == self.animal.pk)
+
+    def page_version(self):
+        return self.client.get(f'/animal/{self.animal.pk}/')[VERSION_HEADER]
+
+    def assert_new_version(self, change):
+        before = self.feed_version()
+        self.assertEqual(self.page_version(), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.client.get(f'/animal/{self.animal.pk}/')  # показать flash-сообщение
+        after = self.feed_version()
+        self.assertNotEqual(after, before)
+        self.assertEqual(self.page_version(), after)
+
+    def test_comment(self):
+        self.client.force_login(self.buyer)
+        self.assert_new_version(
+            lambda: self.client.post(f'/animal/{self.animal.pk}/comment/', {'text': 'Сколько лет птице?'})
+        )
+
+    def test_bid(self):
+        self.client.force_login(self.buyer)
+        self.assert_new_version(
+            lambda: self.client.post(f'/animal/{self.animal.pk}/bid/', {'amount': '150'})
+        )
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.current_price, Decimal('150'))
+
+    def test_deleted_comment(self):
+        comment = Comment.objects.create(animal=self.animal, author=self.buyer, text='Спам')
+
+        def delete():
+            comment.delete()
+            touch_listings([self.animal.pk])
+
+        self.assert_new_version(delete)
+
+    def test_page_with_message_not_cacheable(self):
+        self.client.force_login(self.buyer)
+        self.client.post(f'/animal/{self.animal.pk}/comment/', {'text': 'Вопрос'})
+        response = self.client.get(f'/animal/{self.animal.pk}/')
+        self.assertFalse(response.has_header(VERSION_HEADER))
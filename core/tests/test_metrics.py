@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from core.metrics import Registry
+
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsAuthTests(TestCase):
+    """/metrics: staff или Authorization: Bearer <METRICS_TOKEN>"""
+
+    def test_anonymous_forbidden(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_regular_user_forbidden(self):
+        self.client.force_login(User.objects.create_user('buyer', password='x'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_staff_allowed(self):
+        self.client.force_login(User.objects.create_user('moder', password='x', is_staff=True))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'zoobozor_http_requests_total', response.content)
+
+    def test_bearer_token(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_wrong_token_forbidden(self):
+        for header in ('Bearer wrong', 's3cret', 'Bearer s3cret '):
+            with self.subTest(header=header):
+                response = self.client.get('/metrics', HTTP_AUTHORIZATION=header)
+                self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_disables_bearer(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+
+class SharedRegistryTests(TestCase):
+    """METRICS_DIR: счётчики и гистограммы суммируются по процессам, gauge - нет"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.registry = Registry()
+        self.registry.directory = Path(tmp.name)
+        self.requests = self.registry.counter('test_requests_total', 'Requests', ['status'])
+        self.latency = self.registry.histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        self.queue = self.registry.gauge('test_queue_depth', 'Queue depth')
+
+    def write_other_process(self, data):
+        (self.registry.directory / '999999.json').write_text(json.dumps(data), encoding='utf-8')
+
+    def test_counters_summed_across_processes(self):
+        self.requests.inc(status='200')
+        self.requests.inc(status='200')
+        self.write_other_process({
+            'test_requests_total': [[[['status', '200']], 3], [[['status', '500']], 1]],
+        })
+        output = self.registry.render()
+        self.assertIn('test_requests_total{status="200"} 5', output)
+        self.assertIn('test_requests_total{status="500"} 1', output)
+
+    def test_histograms_summed_across_processes(self):
+        self.latency.observe(0.05)
+        self.registry.dump()
+        own = self.registry.directory / f'{os.getpid()}.json'
+        self.write_other_process(json.loads(own.read_text(encoding='utf-8')))
+        output = self.registry.render()
+        self.assertIn('test_latency_seconds_count 2', output)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', output)
+
+    def test_gauge_is_local(self):
+        self.queue.set(7)
+        self.write_other_process({'test_queue_depth': [[[], 100]]})
+        self.assertIn('test_queue_depth 7', self.registry.render())
+
+    def test_corrupt_file_skipped(self):
+        self.requests.inc(status='200')
+        (self.registry.directory / '999999.json').write_text('{not json', encoding='utf-8')
+        self.assertIn('test_requests_total{status="200"} 1', self.registry.render())
@@ -0,0 +1,136 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.cache_utils import listings_version
+from core.models import Animal, TelegramNotification
+from core.moderation import approve_listings, claim_listings, claimed_by, release_listings
+
+from .utils import make_animal, make_user
+
+
+@override_settings(MODERATION_BATCH_SIZE=3, MODERATION_LEASE_MINUTES=15)
+class ClaimListingsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.alice = make_user('alice', is_staff=True)
+        cls.bob = make_user('bob', is_staff=True)
+        cls.pending = [make_animal(cls.seller, title=f'Голубь {i}') for i in range(7)]
+        make_animal(cls.seller, is_approved=True)
+        make_animal(cls.seller, status='archived')
+
+    def ids(self, queryset):
+        return {animal.pk for animal in queryset}
+
+    def test_batches_are_disjoint(self):
+        first = self.ids(claim_listings(self.alice))
+        second = self.ids(claim_listings(self.bob))
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(first & second)
+
+    def test_only_pending_listings(self):
+        claimed = set()
+        for moderator in (self.alice, self.bob, make_user('carol', is_staff=True)):
+            claimed |= self.ids(claim_listings(moderator))
+        self.assertEqual(claimed, {animal.pk for animal in self.pending})
+
+    def test_own_claim_is_returned_again(self):
+        first = self.ids(claim_listings(self.alice))
+        self.assertEqual(self.ids(claim_listings(self.alice)), first)
+
+    def test_expired_lease_is_reclaimed(self):
+        taken = self.ids(claim_listings(self.alice))
+        Animal.objects.filter(pk__in=taken).update(
+            moderation_lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.ids(claim_listings(self.bob, limit=7)) & taken, taken)
+        # Забранное другим больше не принадлежит первому модератору
+        self.assertFalse(claimed_by(self.alice, taken).exists())
+
+    def test_active_lease_is_not_reclaimed(self):
+        taken = self.ids(claim_listings(self.alice))
+        self.assertFalse(self.ids(claim_listings(self.bob, limit=7)) & taken)
+
+    def test_lease_length(self):
+        before = timezone.now()
+        animal = claim_listings(self.alice, limit=1)[0]
+        self.assertGreaterEqual(animal.moderation_lease_until, before + timedelta(minutes=15))
+        self.assertEqual(animal.moderation_claimed_by, self.alice)
+
+    def test_claimed_by_survives_expiry(self):
+        taken = self.ids(claim_listings(self.alice))
+        Animal.objects.filter(pk__in=taken).update(
+            moderation_lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.ids(claimed_by(self.alice, taken)), taken)
+
+    def test_release_and_exclude(self):
+        taken = self.ids(claim_listings(self.alice))
+        release_listings(claimed_by(self.alice, taken))
+        self.assertFalse(claimed_by(self.alice, taken).exists())
+
+        # Пропущенные модератором не возвращаются ему в той же сессии
+        again = self.ids(claim_listings(self.alice, exclude_ids=taken))
+        self.assertFalse(again & taken)
+        self.assertEqual(self.ids(claim_listings(self.bob)), taken)
+
+
+@mock.patch.dict(os.environ, {'TELEGRAM_CHAT_ID': '-100123'})
+class ApproveListingsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.moderator = make_user('moderator', is_staff=True)
+        cls.pending = [make_animal(cls.seller, title=f'Голубь {i}') for i in range(5)]
+        cls.approved = make_animal(cls.seller, title='Уже одобрен', is_approved=True)
+
+    def statements(self, queries, prefix):
+        return [q['sql'] for q in queries if q['sql'].startswith(prefix)]
+
+    def test_single_update_and_batched_announcements(self):
+        claim_listings(self.moderator, limit=5)
+        with CaptureQueriesContext(connection) as queries:
+            approved, queued = approve_listings(Animal.objects.all())
+        self.assertEqual((approved, queued), (5, 5))
+        self.assertEqual(len(self.statements(queries, 'UPDATE "core_animal"')), 1)
+        self.assertEqual(len(self.statements(queries, 'INSERT INTO "core_telegramnotification"')), 1)
+
+        self.assertFalse(Animal.objects.filter(is_approved=False).exists())
+        # Одобренные уходят из очереди модерации - аренда снята
+        self.assertFalse(Animal.objects.filter(moderation_claimed_by__isnull=False).exists())
+
+    def test_only_newly_approved_are_announced(self):
+        approve_listings(Animal.objects.all())
+        notifications = TelegramNotification.objects.all()
+        self.assertEqual(
+            {n.animal_id for n in notifications}, {animal.pk for animal in self.pending}
+        )
+        self.assertEqual({n.chat_id for n in notifications}, {'-100123'})
+        self.assertIn('Голубь 0', notifications.get(animal=self.pending[0]).text)
+
+        # Повторное одобрение ничего не делает
+        self.assertEqual(approve_listings(Animal.objects.all()), (0, 0))
+        self.assertEqual(TelegramNotification.objects.count(), 5)
+
+    def test_no_channel_nothing_queued(self):
+        with mock.patch.dict(os.environ, {'TELEGRAM_CHAT_ID': ''}):
+            self.assertEqual(approve_listings(Animal.objects.all()), (5, 0))
+        self.assertFalse(TelegramNotification.objects.exists())
+
+    def test_cache_version_bumped_on_commit(self):
+        before = listings_version()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            approve_listings(Animal.objects.filter(pk=self.pending[0].pk))
+            self.assertEqual(listings_version(), before)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(listings_version(), before)
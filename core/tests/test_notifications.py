@@ -0,0 +1,63 @@
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from core.fake_telegram import FakeTelegramServer
+from core.models import Animal, TelegramNotification
+from core.moderation import approve_listings
+
+from .utils import make_animal, make_user
+
+
+class SendNotificationsTests(TransactionTestCase):
+    """Очередь анонсов после массового одобрения -> send_notifications с паузами"""
+
+    def setUp(self):
+        environ = mock.patch.dict(os.environ, {'TELEGRAM_CHAT_ID': '-100123'})
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.server = FakeTelegramServer().start()
+        self.addCleanup(self.server.stop)
+        override = override_settings(TELEGRAM_API_BASE=self.server.url, NOTIFICATION_SEND_INTERVAL=0.2)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        seller = make_user('seller')
+        for i in range(3):
+            make_animal(seller, title=f'Голубь {i}')
+        approve_listings(Animal.objects.all())
+
+    def send(self, *args):
+        """Вызовы sendMessage за этот проход"""
+        start = len(self.server.calls)
+        call_command('send_notifications', '--once', *args, stdout=StringIO())
+        return [call for call in self.server.calls[start:] if call.method == 'sendMessage']
+
+    def assertThrottled(self, calls, interval):
+        self.assertEqual(len(calls), 3)
+        for previous, current in zip(calls, calls[1:]):
+            # Время записи на сервере - с погрешностью сети
+            self.assertGreaterEqual(current.at - previous.at, interval * 0.75)
+
+    def test_sequential_sender_waits_interval(self):
+        calls = self.send('--interval', '0.2')
+        self.assertThrottled(calls, 0.2)
+        self.assertEqual({call.params['chat_id'] for call in calls}, {'-100123'})
+        self.assertFalse(TelegramNotification.objects.exclude(status='sent').exists())
+
+    def test_concurrent_sender_keeps_group_interval(self):
+        calls = self.send('--concurrent')
+        self.assertThrottled(calls, 0.2)
+        self.assertEqual(TelegramNotification.objects.filter(status='sent').count(), 3)
+
+    def test_failed_send_is_retried_later(self):
+        self.server.error_rate = 1.0
+        with self.assertLogs('core', 'ERROR'):
+            self.send('--interval', '0')
+        notification = TelegramNotification.objects.first()
+        self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+        # Следующая попытка - не раньше паузы, второй проход её не берёт
+        self.assertEqual(self.send('--interval', '0'), [])
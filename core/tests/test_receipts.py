@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.models import Animal
+
+from .utils import make_animal, make_user
+
+
+def receipt(name, size=(2400, 1800)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def image_size(field_file):
+    with default_storage.open(field_file.name) as f, Image.open(f) as img:
+        return img.size
+
+
+class ReceiptVersionsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(MEDIA_ROOT=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def auction(self, **kwargs):
+        return make_animal(self.seller, listing_type='auction', **kwargs)
+
+    def test_versions_created_on_upload(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        self.assertTrue(animal.payment_receipt_thumb.name.startswith('receipts/thumbs/'))
+        self.assertLessEqual(max(image_size(animal.payment_receipt_thumb)), 160)
+        self.assertEqual(max(image_size(animal.payment_receipt_review)), 1280)
+        self.assertEqual(animal.receipt_thumb_url, animal.payment_receipt_thumb.url)
+        self.assertEqual(animal.receipt_review_url, animal.payment_receipt_review.url)
+
+    def test_saving_other_fields_keeps_versions(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        thumb = animal.payment_receipt_thumb.name
+        animal.is_paid = True
+        animal.save()
+        self.assertEqual(Animal.objects.get(pk=animal.pk).payment_receipt_thumb.name, thumb)
+
+    def test_replaced_receipt(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        old_thumb = animal.payment_receipt_thumb.name
+        animal.payment_receipt = receipt('r2.jpg')
+        animal.save()
+        self.assertFalse(default_storage.exists(old_thumb))
+        self.assertIn('r2', animal.payment_receipt_thumb.name)
+
+    def test_broken_receipt_falls_back_to_original(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        old_versions = [animal.payment_receipt_thumb.name, animal.payment_receipt_review.name]
+
+        animal.payment_receipt = SimpleUploadedFile('r2.jpg', b'not an image')
+        animal.save()
+
+        animal = Animal.objects.get(pk=animal.pk)
+        # Превью старого чека не показывается вместо нового
+        self.assertFalse(animal.payment_receipt_thumb)
+        self.assertFalse(animal.payment_receipt_review)
+        self.assertEqual(animal.receipt_thumb_url, animal.payment_receipt.url)
+        self.assertEqual(animal.receipt_review_url, animal.payment_receipt.url)
+        self.assertIn('r2', animal.receipt_thumb_url)
+        for name in old_versions:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_removed_receipt(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        thumb = animal.payment_receipt_thumb.name
+        animal.payment_receipt = None
+        animal.save()
+        self.assertFalse(default_storage.exists(thumb))
+        self.assertEqual(animal.receipt_thumb_url, '')
+
+    def test_generate_receipt_thumbnails(self):
+        # Старые записи: чек есть, превью нет
+        name = default_storage.save('receipts/old.jpg', receipt('old.jpg'))
+        old = self.auction()
+        Animal.objects.filter(pk=old.pk).update(payment_receipt=name)
+        broken_name = default_storage.save('receipts/broken.jpg', SimpleUploadedFile('broken.jpg', b'nope'))
+        broken = self.auction()
+        Animal.objects.filter(pk=broken.pk).update(payment_receipt=broken_name)
+        self.auction()  # без чека
+
+        out = io.StringIO()
+        call_command('generate_receipt_thumbnails', stdout=out)
+        self.assertIn('Receipts processed: 1, failed: 1', out.getvalue())
+        old.refresh_from_db()
+        self.assertEqual(max(image_size(old.payment_receipt_review)), 1280)
+
+        # Повторно - только необработанные; --force пересоздаёт все
+        call_command('generate_receipt_thumbnails', stdout=out)
+        self.assertIn('Receipts processed: 0, failed: 1', out.getvalue().splitlines()[-1])
+        call_command('generate_receipt_thumbnails', '--force', stdout=out)
+        self.assertIn('Receipts processed: 1, failed: 1', out.getvalue().splitlines()[-1])
+        old.refresh_from_db()
+        # Прежние версии удалены, имя не обросло суффиксом
+        self.assertEqual(old.payment_receipt_thumb.name, 'receipts/thumbs/old.jpg')
+        self.assertEqual(os.listdir(os.path.dirname(old.payment_receipt_thumb.path)), ['old.jpg'])
+
+    def test_manager_dashboard_links(self):
+        animal = self.auction(payment_receipt=receipt('r1.jpg'))
+        self.client.force_login(make_user('manager', is_staff=True))
+        response = self.client.get('/manager/dashboard/')
+        self.assertContains(response, f'href="{animal.payment_receipt_review.url}"')
+        self.assertContains(response, f'src="{animal.payment_receipt_thumb.url}"')
+        self.assertContains(response, f'href="{animal.payment_receipt.url}"')
@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.cache_utils import bump_listings_version
+from core.models import Animal
+from core.search import bot_search_page, correct_query
+
+from .utils import make_animal, make_user
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM, BOT_SEARCH_PAGE_SIZE=3)
+class BotSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = make_user('seller')
+        cls.animals = [
+            make_animal(cls.seller, title=f'Голубь {i}', breed='бойный', is_approved=True)
+            for i in range(7)
+        ]
+        # Совпадение только в описании - ниже совпадений в названии/породе
+        cls.by_description = make_animal(
+            cls.seller, title='Пара', description='от бойный линии', is_approved=True,
+        )
+        make_animal(cls.seller, title='Голубь на модерации', breed='бойный')
+        make_animal(cls.seller, title='Голубь продан', breed='бойный', is_approved=True, is_sold=True)
+        make_animal(cls.seller, title='Голубь в архиве', breed='бойный', is_approved=True, status='archived')
+        make_animal(cls.seller, title='Кеклик', breed='кеклик горный', category='partridge', is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, result):
+        return [item['id'] for item in result['items']]
+
+    def test_pages(self):
+        first = bot_search_page('бойный')
+        self.assertEqual((first['total'], first['pages'], first['page']), (8, 3, 1))
+        self.assertFalse(first['corrected'])
+
+        seen = []
+        for page in (1, 2, 3):
+            seen += self.ids(bot_search_page('бойный', page))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {a.pk for a in self.animals} | {self.by_description.pk})
+        self.assertEqual(seen[-1], self.by_description.pk)
+
+    def test_only_active_listings(self):
+        result = bot_search_page('бойный', per_page=20)
+        self.assertEqual(set(self.ids(result)), {a.pk for a in self.animals} | {self.by_description.pk})
+
+    def test_item_fields(self):
+        item = bot_search_page('кеклик')['items'][0]
+        self.assertEqual(set(item), {'id', 'title', 'price', 'listing_type'})
+        self.assertEqual(item['title'], 'Кеклик')
+
+    def test_out_of_range_pages_are_clamped(self):
+        self.assertEqual(bot_search_page('бойный', 10)['page'], 3)
+        self.assertEqual(bot_search_page('бойный', 0)['page'], 1)
+        self.assertEqual(bot_search_page('бойный', -5)['page'], 1)
+
+        empty = bot_search_page('страус', 4)
+        self.assertEqual((empty['total'], empty['pages'], empty['page'], empty['items']), (0, 1, 1, []))
+
+    def test_correct_query(self):
+        self.assertEqual(correct_query('бойнный'), 'бойный')
+        self.assertEqual(correct_query('голубь кекликк'), 'голубь кеклик')
+        # Известные, короткие и не буквенные слова не трогаются
+        self.assertIsNone(correct_query('бойный'))
+        self.assertIsNone(correct_query('бой'))
+        self.assertIsNone(correct_query('12345'))
+
+    def test_typo_is_corrected_when_nothing_found(self):
+        result = bot_search_page('бойнный')
+        self.assertTrue(result['corrected'])
+        self.assertEqual(result['query'], 'бойный')
+        self.assertEqual(result['total'], 8)
+
+    def test_breeds_of_hidden_listings_are_not_suggested(self):
+        make_animal(self.seller, title='Продан', breed='николаевский', is_approved=True, is_sold=True)
+        self.assertIsNone(correct_query('николаевскй'))
+
+    def test_pages_are_cached(self):
+        bot_search_page('бойный', 2)
+        with self.assertNumQueries(0):
+            bot_search_page('  Бойный ', 2)  # тот же нормализованный запрос
+
+    def test_cache_key_follows_listings_version(self):
+        before = bot_search_page('бойный')
+        # .update() без сигналов: версия не меняется - отдаётся кэш
+        Animal.objects.filter(pk=self.animals[0].pk).update(status='archived')
+        self.assertEqual(bot_search_page('бойный'), before)
+
+        bump_listings_version()
+        after = bot_search_page('бойный')
+        self.assertEqual(after['total'], 7)
+        self.assertNotIn(self.animals[0].pk, self.ids(after))
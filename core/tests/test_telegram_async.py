@@ -0,0 +1,121 @@
+import asyncio
+from collections import deque
+
+from django.test import SimpleTestCase, override_settings
+
+from core.fake_telegram import FAKE_TOKEN, FakeTelegramServer
+from core.telegram_async import MAX_RETRIES, AsyncTelegramSender, send_messages
+
+
+def too_many_requests(retry_after):
+    return 429, {
+        'ok': False, 'error_code': 429,
+        'description': f'Too Many Requests: retry after {retry_after}',
+        'parameters': {'retry_after': retry_after},
+    }
+
+
+class ScriptedServer(FakeTelegramServer):
+    """Fake Bot API: первые ответы на отправку - из script, дальше как обычно"""
+
+    def __init__(self, script=(), repeat=None, **kwargs):
+        super().__init__(**kwargs)
+        self.script = deque(script)
+        self.repeat = repeat  # отвечать так на все отправки
+
+    async def handle(self, method, params):
+        if method == 'sendMessage':
+            if self.script:
+                return self.script.popleft()
+            if self.repeat:
+                return self.repeat
+        return await super().handle(method, params)
+
+    def sends(self):
+        return [call for call in self.calls if call.method == 'sendMessage']
+
+
+class AsyncTelegramSenderTests(SimpleTestCase):
+
+    def serve(self, **kwargs):
+        server = ScriptedServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        override = override_settings(TELEGRAM_API_BASE=server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+        return server
+
+    def sender(self, **kwargs):
+        # Короткий интервал группы - паузы в тестах задаёт retry_after
+        kwargs.setdefault('group_interval', 0.05)
+        return AsyncTelegramSender(token=FAKE_TOKEN, **kwargs)
+
+    def send_many(self, messages, **kwargs):
+        async def run():
+            async with self.sender(**kwargs) as sender:
+                return await sender.send_many(messages)
+        return asyncio.run(run())
+
+    def send(self, chat_id, text):
+        async def run():
+            async with self.sender() as sender:
+                return await sender.send(chat_id, text)
+        return asyncio.run(run())
+
+    def test_429_is_retried_after_retry_after(self):
+        server = self.serve(script=[too_many_requests(0.3)])
+        with self.assertLogs('core.telegram_async', 'WARNING') as logs:
+            self.assertEqual(self.send_many([(-100, 'Анонс')]), [True])
+        self.assertIn('retry after 0.3s', logs.output[0])
+
+        first, second = server.sends()
+        self.assertEqual((first.status, second.status), (429, 200))
+        self.assertGreaterEqual(second.at - first.at, 0.3)
+
+    def test_429_pauses_all_chats(self):
+        server = self.serve(script=[too_many_requests(0.5)])
+        chats = [-100 - i for i in range(5)]
+        # 5 сообщений/сек: после первого ответа 429 остальные ещё не отправлены
+        with self.assertLogs('core.telegram_async', 'WARNING'):
+            results = self.send_many([(chat_id, 'Анонс') for chat_id in chats], global_rate=5)
+        self.assertEqual(results, [True] * 5)
+
+        calls = server.sends()
+        limited = next(call for call in calls if call.status == 429)
+        later = [call for call in calls if call.at > limited.at]
+        self.assertEqual(len(later), 5)  # 4 других чата и повтор
+        for call in later:
+            self.assertGreaterEqual(call.at - limited.at, 0.5 - 0.01)
+        self.assertEqual(sorted(int(call.params['chat_id']) for call in calls if call.status == 200), sorted(chats))
+
+    def test_429_gives_up_after_retries(self):
+        server = self.serve(repeat=too_many_requests(0.05))
+        with self.assertLogs('core.telegram_async', 'WARNING'):
+            result = self.send(-100, 'Анонс')
+        self.assertEqual((result.ok, result.error, result.blocked), (False, 'http_429', False))
+        self.assertEqual(len(server.sends()), MAX_RETRIES + 1)
+
+    def test_blocked_chat_is_not_retried(self):
+        server = self.serve(repeat=(403, {'ok': False, 'error_code': 403,
+                                          'description': 'Forbidden: bot was blocked by the user'}))
+        with self.assertLogs('core.telegram_async', 'ERROR'):
+            result = self.send(42, 'Привет')
+        self.assertTrue(result.blocked)
+        self.assertIn('bot was blocked', result.error)
+        self.assertEqual(len(server.sends()), 1)
+
+    def test_order_within_chat(self):
+        server = self.serve()
+        results = self.send_many([(-100, f'#{n}') for n in range(5)], group_interval=0.1)
+        self.assertEqual(results, [True] * 5)
+
+        calls = server.sends()
+        self.assertEqual([call.params['text'] for call in calls], [f'#{n}' for n in range(5)])
+        for previous, call in zip(calls, calls[1:]):
+            self.assertGreaterEqual(call.at - previous.at, 0.1 - 0.01)
+
+    def test_sync_wrapper(self):
+        server = self.serve()
+        with self.assertLogs('core.telegram_async', 'WARNING'):  # пустой chat_id
+            self.assertEqual(send_messages([(-100, 'a'), ('', 'b')], token=FAKE_TOKEN), [True, False])
+        self.assertEqual(len(server.sends()), 1)
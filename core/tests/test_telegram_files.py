@@ -0,0 +1,108 @@
+import asyncio
+import os
+import tempfile
+
+from django.test import TransactionTestCase, override_settings
+
+from core.fake_telegram import FAKE_TOKEN, FakeTelegramServer
+from core.models import TelegramFileCache
+from core.telegram_async import AsyncTelegramSender
+from core.telegram_files import content_hash
+from core.utils import send_telegram_message
+
+
+class FileIdServer(FakeTelegramServer):
+    """Fake Bot API, который не знает file_id из stale (загружены другим ботом)"""
+
+    def __init__(self, stale=(), **kwargs):
+        super().__init__(**kwargs)
+        self.stale = set(stale)
+
+    async def handle(self, method, params):
+        if method == 'sendPhoto' and params.get('photo') in self.stale:
+            return 400, {
+                'ok': False, 'error_code': 400,
+                'description': 'Bad Request: wrong file identifier/HTTP URL specified',
+            }
+        if method == 'sendPhoto' and params.get('chat_id') == 'missing':
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat not found'}
+        return await super().handle(method, params)
+
+    def photos(self):
+        return [call.params['photo'] for call in self.calls if call.method == 'sendPhoto']
+
+
+class FileIdCacheMixin:
+    """Общие сценарии для синхронной (utils) и асинхронной (telegram_async) отправки"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'photo.jpg')
+        with open(self.path, 'wb') as f:
+            f.write(b'first photo')
+
+    def serve(self, **kwargs):
+        server = FileIdServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        override = override_settings(TELEGRAM_API_BASE=server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+        return server
+
+    def cached(self):
+        return dict(TelegramFileCache.objects.values_list('content_hash', 'file_id'))
+
+    def test_first_send_uploads_and_remembers(self):
+        server = self.serve()
+        self.assertTrue(self.send(self.path))
+        self.assertEqual(server.photos(), ['<file photo.jpg>'])
+        self.assertEqual(self.cached(), {content_hash(self.path): 'fake-file-1'})
+
+    def test_cached_file_id_is_sent_instead_of_upload(self):
+        server = self.serve()
+        self.send(self.path)
+        self.assertTrue(self.send(self.path))
+        self.assertEqual(server.photos(), ['<file photo.jpg>', 'fake-file-1'])
+        self.assertEqual(TelegramFileCache.objects.get().hits, 1)
+
+    def test_stale_file_id_falls_back_to_upload(self):
+        TelegramFileCache.objects.create(path=self.path, content_hash=content_hash(self.path), file_id='other-bot')
+        server = self.serve(stale={'other-bot'})
+        self.assertTrue(self.send(self.path))
+        self.assertEqual(server.photos(), ['other-bot', '<file photo.jpg>'])
+        # Запись заменена file_id новой загрузки
+        self.assertEqual(self.cached(), {content_hash(self.path): 'fake-file-1'})
+
+    def test_other_400_keeps_file_id(self):
+        TelegramFileCache.objects.create(path=self.path, content_hash=content_hash(self.path), file_id='known')
+        server = self.serve()
+        with self.assertLogs('core', 'ERROR'):
+            self.assertFalse(self.send(self.path, chat_id='missing'))
+        self.assertEqual(server.photos(), ['known'])
+        self.assertEqual(self.cached(), {content_hash(self.path): 'known'})
+
+    def test_changed_file_is_uploaded_again(self):
+        server = self.serve()
+        self.send(self.path)
+        with open(self.path, 'wb') as f:
+            f.write(b'replaced photo')
+        self.send(self.path)
+        self.assertEqual(server.photos(), ['<file photo.jpg>', '<file photo.jpg>'])
+        self.assertEqual(len(self.cached()), 2)
+
+
+# Оба - TransactionTestCase: асинхронный отправитель ходит в БД из другого потока
+class SyncFileIdCacheTests(FileIdCacheMixin, TransactionTestCase):
+
+    def send(self, path, chat_id='-100123'):
+        return send_telegram_message(chat_id, 'Анонс', image_path=path)
+
+
+class AsyncFileIdCacheTests(FileIdCacheMixin, TransactionTestCase):
+
+    def send(self, path, chat_id='-100123'):
+        async def run():
+            async with AsyncTelegramSender(token=FAKE_TOKEN, group_interval=0) as sender:
+                return await sender.send_message(chat_id, 'Анонс', path)
+        return asyncio.run(run())
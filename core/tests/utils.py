@@ -0,0 +1,28 @@
+"""Общие фабрики для тестов core"""
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from core.models import Animal
+
+
+def make_user(username, **kwargs):
+    return User.objects.create_user(username, password='test-pass', **kwargs)
+
+
+def make_animal(owner, **kwargs):
+    """
+    Объявление; по умолчанию ожидает модерации (анонс в канал не уходит).
+    main_photo - только имя файла: карточке нужен url, обработка фото не запускается
+    """
+    fields = {
+        'category': 'pigeon',
+        'title': 'Голубь',
+        'description': 'Тестовое объявление',
+        'price': Decimal('100.00'),
+        'city': 'dushanbe',
+        'phone': '+992900000000',
+        'main_photo': 'animals/test.jpg',
+    }
+    fields.update(kwargs)
+    return Animal.objects.create(owner=owner, **fields)
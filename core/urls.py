@@ -1,19 +1,25 @@
 """
 URL configuration for core app
 """
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import views, views_async
+
+# Публичные страницы чтения: нативные async версии под ASGI (core/views_async.py)
+public_views = views_async if settings.USE_ASYNC_VIEWS else views
 
 urlpatterns = [
     # Home
-    path('', views.home, name='home'),
+    path('', public_views.home, name='home'),
     
     # Animal listings
-    path('animal/<int:pk>/', views.animal_detail, name='animal_detail'),
+    path('animal/<int:pk>/', public_views.animal_detail, name='animal_detail'),
     path('animal/add/', views.add_animal, name='add_animal'),
     path('load-category-fields/', views.load_category_fields, name='load_category_fields'),  # HTMX
     path('get-animal-fields/', views.get_animal_fields, name='get_animal_fields'),  # HTMX для динамических полей
+    path('category-schema/', views.category_schema, name='category_schema'),  # JSON схема полей по категориям
+    path('feed/listings.json', views.listings_feed, name='listings_feed'),  # лента для Service Worker
     path('animal/<int:pk>/edit/', views.edit_animal, name='edit_animal'),
     path('animal/<int:pk>/delete/', views.delete_animal, name='delete_animal'),
     path('my-animals/', views.my_animals, name='my_animals'),
@@ -52,6 +58,10 @@ urlpatterns = [
     
     # Manager Dashboard
     path('manager/dashboard/', views.manager_dashboard, name='manager_dashboard'),
+    path('manager/moderation/', views.moderation_queue, name='moderation_queue'),
+    path('manager/export/<str:dataset>/', views.export_data, name='export_data'),
+    path('manager/import/', views.import_listings_page, name='import_listings'),
+    path('manager/import/<int:pk>/errors.csv', views.import_errors, name='import_errors'),
     path('manager/approve/<int:animal_id>/', views.approve_payment, name='approve_payment'),
     path('manager/reject/<int:animal_id>/', views.reject_payment, name='reject_payment'),
     
@@ -81,7 +91,7 @@ urlpatterns = [
     ), name='password_reset_complete'),
     
     # Veterinarians
-    path('veterinarians/', views.veterinarians_list, name='veterinarians_list'),
+    path('veterinarians/', public_views.veterinarians_list, name='veterinarians_list'),
     path('veterinarian/<int:pk>/', views.veterinarian_detail, name='veterinarian_detail'),
     path('veterinarian/add/', views.add_veterinarian, name='add_veterinarian'),
     path('veterinarian/<int:pk>/edit/', views.edit_veterinarian, name='edit_veterinarian'),
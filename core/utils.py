@@ -5,13 +5,32 @@ import requests
 import logging
 import os
 
+from django.conf import settings
+
+from .metrics import telegram_send_duration, telegram_send_failures
+from .telegram_files import (
+    cached_file_id, forget_file_id, is_stale_file_id_error, photo_file_id, remember_file_id,
+)
+
 logger = logging.getLogger(__name__)
 
 # Telegram Bot Configuration from environment variables
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-TELEGRAM_PHOTO_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
+
+
+def telegram_api_url(api_method, token=None):
+    """URL метода Bot API (TELEGRAM_API_BASE - реальный API или core/fake_telegram.py)"""
+    token = TELEGRAM_BOT_TOKEN if token is None else token
+    return f"{settings.TELEGRAM_API_BASE.rstrip('/')}/bot{token}/{api_method}"
+
+
+def telegram_error_description(response):
+    """description из ответа Bot API с ошибкой ('' - не JSON)"""
+    try:
+        return str(response.json().get('description', ''))[:255]
+    except ValueError:
+        return ''
 
 
 def send_telegram_message(chat_id, text, image_path=None):
@@ -31,23 +50,43 @@ def send_telegram_message(chat_id, text, image_path=None):
         logger.warning("Cannot send Telegram message: chat_id is empty")
         return False
     
+    api_method = 'sendPhoto' if image_path and os.path.isfile(image_path) else 'sendMessage'
     try:
         # Send with photo if image_path is provided
         if image_path and os.path.isfile(image_path):
+            data = {
+                'chat_id': chat_id,
+                'caption': text,
+                'parse_mode': 'Markdown'  # Use Markdown for photos
+            }
+            
+            # Фото уже загружалось - отправляем по file_id (core/telegram_files.py)
+            file_id, digest = cached_file_id(image_path)
+            if file_id:
+                with telegram_send_duration.time(method=api_method):
+                    response = requests.post(telegram_api_url('sendPhoto'), data={**data, 'photo': file_id}, timeout=30)
+                if response.status_code == 200:
+                    logger.info(f"Telegram photo sent by file_id to: {chat_id}")
+                    return True
+                if response.status_code == 400 and is_stale_file_id_error(telegram_error_description(response)):
+                    forget_file_id(image_path, digest)
+                else:
+                    telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
+                    logger.error(f"Failed to send Telegram photo. Status: {response.status_code}, Response: {response.text}")
+                    return False
+            
             with open(image_path, 'rb') as photo_file:
                 files = {'photo': photo_file}
-                data = {
-                    'chat_id': chat_id,
-                    'caption': text,
-                    'parse_mode': 'Markdown'  # Use Markdown for photos
-                }
                 
-                response = requests.post(TELEGRAM_PHOTO_URL, data=data, files=files, timeout=30)
+                with telegram_send_duration.time(method=api_method):
+                    response = requests.post(telegram_api_url('sendPhoto'), data=data, files=files, timeout=30)
                 
                 if response.status_code == 200:
                     logger.info(f"Telegram photo sent successfully to: {chat_id}")
+                    remember_file_id(image_path, digest, photo_file_id(response.json().get('result', {})))
                     return True
                 else:
+                    telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
                     logger.error(f"Failed to send Telegram photo. Status: {response.status_code}, Response: {response.text}")
                     return False
         else:
@@ -58,24 +97,26 @@ def send_telegram_message(chat_id, text, image_path=None):
                 'parse_mode': 'HTML'  # Support HTML formatting
             }
             
-            response = requests.post(TELEGRAM_API_URL, json=payload, timeout=10)
+            with telegram_send_duration.time(method=api_method):
+                response = requests.post(telegram_api_url('sendMessage'), json=payload, timeout=10)
             
             if response.status_code == 200:
                 logger.info(f"Telegram message sent successfully to: {chat_id}")
                 return True
             else:
+                telegram_send_failures.inc(method=api_method, reason=f'http_{response.status_code}')
                 logger.error(f"Failed to send Telegram message. Status: {response.status_code}, Response: {response.text}")
                 return False
             
     except requests.exceptions.Timeout:
+        telegram_send_failures.inc(method=api_method, reason='timeout')
         logger.error("Telegram API request timed out")
         return False
     except requests.exceptions.RequestException as e:
+        telegram_send_failures.inc(method=api_method, reason='network')
         logger.error(f"Error sending Telegram message: {str(e)}")
         return False
     except Exception as e:
-        logger.error(f"Unexpected error in send_telegram_message: {str(e)}")
-        return False
-    except Exception as e:
+        telegram_send_failures.inc(method=api_method, reason='error')
         logger.error(f"Unexpected error in send_telegram_message: {str(e)}")
         return False
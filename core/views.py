@@ -6,30 +6,48 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib import messages
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Avg
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST, require_http_methods
+from django.http import (
+    FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.utils.dateparse import parse_date
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST, require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
-from .models import Animal, AnimalImage, Veterinarian, Bid, Review, Comment, UserProfile, Offer
+from .models import (
+    Animal, AnimalImage, ArchivedAnimal, Veterinarian, Bid, Review, Comment, UserProfile, Offer, ImportJob,
+)
 from .forms import (
     AnimalSearchForm, AnimalForm, AnimalImageForm, BidForm,
     VeterinarianSearchForm, VeterinarianForm, ReviewForm, CommentForm,
     UserRegistrationForm
 )
 from .utils import send_telegram_message
+from .archive import load_snapshot
+from .cache_utils import cached_category_counts
+from .category_schema import LISTING_FORM
+from .listing_feed import cached_feed, listing_version, mark_cacheable, touch_listings
+from .duplicates import blocking_duplicate, find_duplicates
+from .exports import CONTENT_TYPES, export_filename, stream_export
+from .imports import errors_path, queue_import
+from .moderation import (
+    approve_listings, claim_listings, claimed_by, pending_listings, reject_listings, release_listings,
+)
+from . import metrics as prometheus
+from django.conf import settings
+import hmac
 import os
 
 
-def home(request):
+def home_queryset(form):
     """
-    Main page with animal listings and filters
-    Supports HTMX for dynamic filtering
+    Одобренные объявления с фильтрами формы поиска, VIP первыми
+    (общая часть home и views_async.home)
     """
-    # Get filter form
-    form = AnimalSearchForm(request.GET or None)
-    
     # Base queryset - only approved animals
     animals = Animal.objects.filter(is_approved=True).select_related('owner').prefetch_related('gallery')
     
@@ -70,15 +88,25 @@ def home(request):
             animals = animals.filter(listing_type=listing_type)
     
     # VIP animals first, then by date
-    animals = animals.order_by('-is_vip', '-created_at')
+    return animals.order_by('-is_vip', '-created_at')
+
+
+def home(request):
+    """
+    Main page with animal listings and filters
+    Supports HTMX for dynamic filtering
+    """
+    # Get filter form
+    form = AnimalSearchForm(request.GET or None)
+    animals = home_queryset(form)
     
     # Pagination
     paginator = Paginator(animals, 12)
     page_number = request.GET.get('page')
     animals_page = paginator.get_page(page_number)
     
-    # Count by categories for stats
-    category_counts = Animal.objects.filter(is_approved=True).values('category').annotate(count=Count('id'))
+    # Count by categories for stats (кэш сбрасывается при изменении объявлений)
+    category_counts = cached_category_counts()
     
     context = {
         'animals': animals_page,
@@ -100,10 +128,16 @@ def animal_detail(request, pk):
     """
     Animal detail page with comments and bidding
     """
-    animal = get_object_or_404(
-        Animal.objects.select_related('owner', 'owner__profile').prefetch_related('gallery', 'comments__author'),
-        pk=pk
-    )
+    try:
+        animal = Animal.objects.select_related('owner', 'owner__profile').prefetch_related(
+            'gallery', 'comments__author'
+        ).get(pk=pk)
+    except Animal.DoesNotExist:
+        # Старая ссылка на объявление, перенесённое в архив (core/archive.py)
+        return archived_animal_detail(request, pk)
+    
+    # Версия для Service Worker (core/listing_feed.py) - до save(): auto_now меняет updated_at в памяти
+    version = listing_version(animal.updated_at)
     
     # Increment view count
     animal.views_count += 1
@@ -130,7 +164,8 @@ def animal_detail(request, pk):
     # Similar animals (same category, different listing)
     similar_animals = Animal.objects.filter(
         category=animal.category,
-        is_approved=True
+        is_approved=True,
+        status='active',
     ).exclude(pk=animal.pk).order_by('-is_vip', '-created_at')[:6]
     
     context = {
@@ -143,7 +178,45 @@ def animal_detail(request, pk):
         'similar_animals': similar_animals,
     }
     
-    return render(request, 'core/animal_detail.html', context)
+    response = render(request, 'core/animal_detail.html', context)
+    return mark_cacheable(request, response, version)
+
+
+def archived_animal_detail(request, pk):
+    """Страница архивного объявления (только чтение, не индексируется)"""
+    archived = get_object_or_404(ArchivedAnimal.objects.select_related('owner'), pk=pk)
+    data = load_snapshot(archived)
+    
+    response = render(request, 'core/animal_archived.html', {
+        'archived': archived,
+        'data': data,
+        'comments': data.get('comments', []),
+        'bids_count': len(data.get('bids', [])),
+    })
+    response['X-Robots-Tag'] = 'noindex'
+    return response
+
+
+def listings_feed(request):
+    """
+    Лента последних объявлений для Service Worker (core/listing_feed.py):
+    id, название, цена, фото и версия каждого объявления
+    """
+    body, etag = cached_feed()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.PWA_FEED_MAX_AGE)
+    return response
+
+
+def category_fields_context():
+    """Все partial-шаблоны полей и группа каждой категории: поля переключаются в браузере"""
+    return {
+        'category_templates': LISTING_FORM.templates,
+        'category_groups': LISTING_FORM.category_groups,
+    }
 
 
 @login_required
@@ -160,7 +233,23 @@ def add_animal(request):
             animal = form.save(commit=False)
             animal.owner = request.user
             animal.is_approved = False  # Требует модерации
-            
+
+            # Повторная публикация: то же фото своего активного объявления - не сохраняем,
+            # остальные совпадения помечаем для модератора
+            duplicates = find_duplicates(animal)
+            original = blocking_duplicate(animal, duplicates)
+            if original:
+                messages.error(
+                    request,
+                    f'⚠️ Такое объявление уже опубликовано: «{original.title}» (#{original.pk}). '
+                    f'Отредактируйте его вместо повторной публикации.'
+                )
+                return render(request, 'core/add_animal.html', {
+                    'form': form, 'duplicate': original, **category_fields_context(),
+                })
+            if duplicates:
+                animal.duplicate_of = duplicates[0][0]
+
             try:
                 animal.save()
                 
@@ -181,7 +270,7 @@ def add_animal(request):
     else:
         form = AnimalForm()
     
-    return render(request, 'core/add_animal.html', {'form': form})
+    return render(request, 'core/add_animal.html', {'form': form, **category_fields_context()})
 
 
 def load_category_fields(request):
@@ -307,7 +396,7 @@ def place_bid(request, pk):
             
             # Update animal's current price
             animal.current_price = bid_amount
-            animal.save(update_fields=['current_price'])
+            animal.save(update_fields=['current_price', 'updated_at'])
             
             messages.success(request, f'✅ Ставка {bid_amount} TJS принята!')
             return redirect('animal_detail', pk=pk)
@@ -449,12 +538,8 @@ def toggle_favorite_htmx(request, pk):
     return render(request, 'core/partials/favorite_button.html', context)
 
 
-def veterinarians_list(request):
-    """
-    Veterinarians and clinics directory
-    """
-    form = VeterinarianSearchForm(request.GET or None)
-    
+def veterinarians_queryset(form):
+    """Одобренные ветеринары с фильтрами формы, VIP первыми (views_async тоже)"""
     vets = Veterinarian.objects.filter(is_approved=True)
     
     # Apply filters
@@ -472,7 +557,15 @@ def veterinarians_list(request):
             vets = vets.filter(city=city)
     
     # VIP first, then by date
-    vets = vets.order_by('-is_vip', '-created_at')
+    return vets.order_by('-is_vip', '-created_at')
+
+
+def veterinarians_list(request):
+    """
+    Veterinarians and clinics directory
+    """
+    form = VeterinarianSearchForm(request.GET or None)
+    vets = veterinarians_queryset(form)
     
     # Pagination
     paginator = Paginator(vets, 9)
@@ -536,6 +629,7 @@ def add_comment(request, pk):
             comment.animal = animal
             comment.author = request.user
             comment.save()
+            touch_listings([animal.pk])  # новая версия карточки для SW
             
             messages.success(request, '✅ Комментарий добавлен!')
     
@@ -811,7 +905,7 @@ def admin_dashboard(request):
     
     # Additional analytics
     approved_animals = Animal.objects.filter(is_approved=True).count()
-    pending_animals = Animal.objects.filter(is_approved=False).count()
+    pending_animals = pending_listings().count()
     vip_animals = Animal.objects.filter(is_vip=True).count()
     sold_animals = Animal.objects.filter(is_sold=True).count()
     
@@ -857,6 +951,46 @@ def manager_dashboard(request):
     return render(request, 'core/manager_dashboard.html', context)
 
 
+@staff_member_required
+def moderation_queue(request):
+    """
+    Moderation queue - keyboard-driven batch review of pending listings
+    Пачка закрепляется за модератором (claim/lease), другие её не видят.
+    """
+    skipped = request.session.get('moderation_skipped', [])
+    
+    if request.method == 'POST':
+        decisions = {'approve': [], 'reject': [], 'skip': []}
+        for key, value in request.POST.items():
+            if key.startswith('decision_') and value in decisions:
+                try:
+                    decisions[value].append(int(key[len('decision_'):]))
+                except ValueError:
+                    continue
+        
+        approved, queued = approve_listings(claimed_by(request.user, decisions['approve']))
+        rejected = reject_listings(claimed_by(request.user, decisions['reject']))
+        release_listings(claimed_by(request.user, decisions['skip']))
+        
+        # Пропущенные не показываем этому модератору снова (последние 500)
+        request.session['moderation_skipped'] = (skipped + decisions['skip'])[-500:]
+        
+        messages.success(
+            request,
+            f'✅ Одобрено: {approved} (анонсов в очереди: {queued}), ❌ отклонено: {rejected}, '
+            f'⏭ пропущено: {len(decisions["skip"])}'
+        )
+        return redirect('moderation_queue')
+    
+    batch = list(claim_listings(request.user, exclude_ids=skipped))
+    context = {
+        'batch': batch,
+        'pending_count': pending_listings().count(),
+        'lease_minutes': settings.MODERATION_LEASE_MINUTES,
+    }
+    return render(request, 'core/moderation_queue.html', context)
+
+
 @staff_member_required
 @require_POST
 def approve_payment(request, animal_id):
@@ -1070,25 +1204,97 @@ def get_animal_fields(request):
     """
     category = request.GET.get('category', '')
     
+    # Какой partial template рендерить - по реестру категорий (core/category_schema.py)
+    template = LISTING_FORM.get(category).template
+    
+    return render(request, template, {'category': category})
+
+
+@condition(etag_func=lambda request: LISTING_FORM.etag)
+@cache_control(public=True, max_age=settings.CATEGORY_SCHEMA_MAX_AGE)
+def category_schema(request):
+    """
+    JSON схема полей по категориям (core/category_schema.py) для клиента:
+    поля переключаются без запроса на сервер. Схема меняется только с кодом,
+    поэтому ETag постоянный, а ответ собран один раз при старте
+    """
+    return HttpResponse(LISTING_FORM.json, content_type='application/json; charset=utf-8')
+
+
+def metrics(request):
+    """
+    Prometheus metrics (text format).
+    Доступ: staff-пользователь или заголовок Authorization: Bearer <METRICS_TOKEN>
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    auth = request.headers.get('Authorization', '')
+    token_ok = bool(token) and hmac.compare_digest(auth, f'Bearer {token}')
+    if not (token_ok or request.user.is_staff):
+        return HttpResponseForbidden('Forbidden')
+
+    return HttpResponse(prometheus.REGISTRY.render(), content_type=prometheus.CONTENT_TYPE)
+
+
+@staff_member_required
+def export_data(request, dataset):
+    """
+    Потоковая выгрузка для персонала: /manager/export/<animals|bids|offers|transactions>/
+    GET: format=csv|jsonl|parquet, date_from, date_to (YYYY-MM-DD), category
+    """
+    fmt = request.GET.get('format', 'csv')
+    try:
+        date_from = parse_date(request.GET.get('date_from') or '') or None
+        date_to = parse_date(request.GET.get('date_to') or '') or None
+        chunks = stream_export(
+            dataset, fmt,
+            date_from=date_from, date_to=date_to,
+            category=request.GET.get('category') or None,
+        )
+    except ValueError as e:  # ExportError или неверная дата
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, fmt)}"'
+    response['X-Accel-Buffering'] = 'no'  # nginx: не буферизовать поток
+    return response
+
+
+@staff_member_required
+def import_listings_page(request):
+    """
+    Массовый импорт объявлений партнёров: CSV/JSONL + ZIP с фото.
+    Страница только ставит задачу в очередь (ImportJob) - импорт, водяные
+    знаки и отпечатки считает import_listings --queue вне HTTP запроса.
+    Объявления создаются неодобренными и попадают в очередь модерации.
+    """
+    if request.method == 'POST':
+        data_file = request.FILES.get('data_file')
+        photos = request.FILES.get('photos')
+        owner = User.objects.filter(username=request.POST.get('owner', '').strip().lstrip('@')).first()
+        if not (data_file and photos):
+            messages.error(request, '❌ Загрузите файл данных и архив с фото')
+        elif owner is None:
+            messages.error(request, '❌ Продавец не найден')
+        else:
+            job = queue_import(data_file, photos, owner, created_by=request.user)
+            messages.success(request, f'✅ Импорт #{job.pk} в очереди - статус обновляется ниже')
+            return redirect('import_listings')
+
+    jobs = ImportJob.objects.select_related('owner')[:20]
     context = {
-        'category': category,
+        'jobs': jobs,
+        'active': any(job.status in ('queued', 'running') for job in jobs),
     }
-    
-    # Определяем какой partial template рендерить
-    if category in ['cow', 'sheep', 'goat', 'horse']:
-        # Для скота: вес, порода скота, пол
-        template = 'core/partials/livestock_fields.html'
-    elif category == 'pigeon':
-        # Для голубей: порода голубя, стиль игры, длительность полета
-        template = 'core/partials/pigeon_fields.html'
-    elif category in ['cat', 'dog']:
-        # Для питомцев: порода питомца, паспорт
-        template = 'core/partials/pet_fields.html'
-    elif category == 'transport':
-        # Для транспорта: тип авто, маршрут
-        template = 'core/partials/transport_fields.html'
-    else:
-        # Для остальных категорий: только базовые поля (возраст)
-        template = 'core/partials/basic_fields.html'
-    
-    return render(request, template, context)
+    if request.headers.get('HX-Request'):
+        return render(request, 'core/partials/import_jobs.html', context)
+    return render(request, 'core/import_listings.html', context)
+
+
+@staff_member_required
+def import_errors(request, pk):
+    """Отчёт об ошибках импорта (CSV с данными продавцов) - только staff, не из MEDIA"""
+    job = get_object_or_404(ImportJob, pk=pk)
+    path = errors_path(job)
+    if not path.exists():
+        raise Http404('No error report')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'import_{job.pk}_errors.csv')
@@ -0,0 +1,120 @@
+"""
+Async versions of the public read views for ASGI (config.asgi).
+
+Под uvicorn/daphne синхронные views выполняются в пуле потоков - поток
+занят всё время ожидания БД. Здесь главная, карточка объявления и список
+ветеринаров читают данные через async ORM (aget, acount, async for) и
+async кэш, поток нужен только для рендера шаблона (шаблоны, сессия и
+context processors в Django синхронные).
+
+Включаются настройкой USE_ASYNC_VIEWS (core/urls.py), фильтры общие с
+синхронными версиями (views.home_queryset, views.veterinarians_queryset).
+Сравнение WSGI/ASGI: python manage.py benchmark_asgi.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db.models import F
+from django.shortcuts import render
+
+from .cache_utils import acached_category_counts
+from .forms import AnimalSearchForm, BidForm, CommentForm, VeterinarianSearchForm
+from .listing_feed import listing_version, mark_cacheable
+from .models import Animal
+from .views import archived_animal_detail, home_queryset, veterinarians_queryset
+
+arender = sync_to_async(render)
+
+
+async def apaginate(queryset, per_page, page_number):
+    """
+    Paginator.get_page без синхронных запросов: COUNT через acount,
+    объекты страницы загружаются заранее (шаблон получает готовый список)
+    """
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()  # вместо cached_property
+    page = paginator.get_page(page_number)
+    page.object_list = [obj async for obj in page.object_list]
+    return page
+
+
+async def home(request):
+    """Главная страница (async) - см. views.home"""
+    form = AnimalSearchForm(request.GET or None)
+    animals_page = await apaginate(home_queryset(form), 12, request.GET.get('page'))
+
+    context = {
+        'animals': animals_page,
+        'form': form,
+        'category_counts': await acached_category_counts(),
+        'total_animals': animals_page.paginator.count,
+    }
+
+    if request.headers.get('HX-Request'):
+        return await arender(request, 'core/_animal_list.html', context)
+    return await arender(request, 'core/home.html', context)
+
+
+async def animal_detail(request, pk):
+    """Карточка объявления (async) - см. views.animal_detail"""
+    try:
+        animal = await Animal.objects.select_related('owner', 'owner__profile').prefetch_related(
+            'gallery'
+        ).aget(pk=pk)
+    except Animal.DoesNotExist:
+        # Архивная страница редкая - синхронная версия в потоке
+        return await sync_to_async(archived_animal_detail)(request, pk)
+
+    # Счётчик просмотров одним UPDATE (без гонки между одновременными запросами)
+    await Animal.objects.filter(pk=pk).aupdate(views_count=F('views_count') + 1)
+    animal.views_count += 1
+
+    comments = [
+        comment async for comment in
+        animal.comments.select_related('author').order_by('-created_at')
+    ]
+
+    bid_form = None
+    bids = []
+    if animal.listing_type == 'auction' and animal.is_auction_active():
+        bid_form = BidForm()
+        bids = [
+            bid async for bid in
+            animal.bids.select_related('bidder').order_by('-created_at')[:10]
+        ]
+
+    user = await request.auser()
+    is_favorite = False
+    if user.is_authenticated:
+        is_favorite = await animal.favorites.filter(id=user.id).aexists()
+
+    similar_animals = [
+        similar async for similar in
+        Animal.objects.filter(
+            category=animal.category,
+            is_approved=True,
+            status='active',
+        ).exclude(pk=animal.pk).order_by('-is_vip', '-created_at')[:6]
+    ]
+
+    context = {
+        'animal': animal,
+        'comments': comments,
+        'comment_form': CommentForm(),
+        'bid_form': bid_form,
+        'bids': bids,
+        'is_favorite': is_favorite,
+        'similar_animals': similar_animals,
+    }
+    response = await arender(request, 'core/animal_detail.html', context)
+    return await sync_to_async(mark_cacheable)(request, response, listing_version(animal.updated_at))
+
+
+async def veterinarians_list(request):
+    """Каталог ветеринаров (async) - см. views.veterinarians_list"""
+    form = VeterinarianSearchForm(request.GET or None)
+    vets_page = await apaginate(veterinarians_queryset(form), 9, request.GET.get('page'))
+
+    return await arender(request, 'core/veterinarians.html', {
+        'veterinarians': vets_page,
+        'form': form,
+    })
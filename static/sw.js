@@ -1,19 +1,49 @@
 // Service Worker для ZooBozor PWA
-// Версия кэша - измени при обновлении
-const CACHE_VERSION = 'zoobozor-v1.0.0';
+
+// Список хешированных файлов и версия кэша генерируются при collectstatic
+// (core/storage.py -> sw-precache.js). Вручную версию менять не нужно.
+try {
+  importScripts('sw-precache.js');
+} catch (err) {
+  // Локальная разработка без collectstatic
+  self.PRECACHE_VERSION = 'dev';
+  self.PRECACHE_URLS = [];
+}
+
+const CACHE_VERSION = self.PRECACHE_VERSION;
 const CACHE_NAME = `zoobozor-cache-${CACHE_VERSION}`;
 
 // Критичные ресурсы для кэширования (офлайн)
-const STATIC_ASSETS = [
-  '/',
-  '/static/img/icon-192.png',
-  '/static/img/icon-512.png'
-];
+const STATIC_ASSETS = ['/', ...self.PRECACHE_URLS];
+
+// Хешированное имя файла: main.3f2a9c1b7d4e.js - содержимое никогда не меняется
+const HASHED_ASSET = /\.[0-9a-f]{12}\.[a-z0-9]+$/;
+
+// Офлайн-кэш объявлений:
+// - карточки /animal/<id>/ ссылаются на статику этой версии - кэш сбрасывается с ней
+// - фото из /media/ переживают обновления SW (имена загруженных файлов не переиспользуются)
+// - лента /feed/listings.json (core/listing_feed.py): версии объявлений
+const PAGES_CACHE = `zoobozor-pages-${CACHE_VERSION}`;
+const MEDIA_CACHE = 'zoobozor-media';
+const FEED_CACHE = 'zoobozor-feed';
+const RUNTIME_CACHES = [CACHE_NAME, PAGES_CACHE, MEDIA_CACHE, FEED_CACHE];
+
+// Лимиты кэшей (LRU: вытесняются давно не открытые)
+const MAX_PAGES = 60;
+const MAX_MEDIA = 300;
+
+const FEED_URL = '/feed/listings.json';
+const FEED_TTL = 60 * 1000; // лента старше минуты обновляется в фоне
+const VERSION_HEADER = 'X-Listing-Version';
+const DETAIL_PAGE = /^\/animal\/(\d+)\/$/;
+const LISTING_ACTION = /^\/animal\/(\d+)\//;
+// После входа / выхода в закэшированных страницах чужое меню и CSRF-токен
+const AUTH_PATHS = ['/login/', '/logout/', '/register/'];
 
 // Установка Service Worker
 self.addEventListener('install', (event) => {
   console.log('[SW] Установка Service Worker...');
-  
+
   event.waitUntil(
     caches.open(CACHE_NAME).then((cache) => {
       console.log('[SW] Кэширование статических ресурсов');
@@ -22,7 +52,7 @@ self.addEventListener('install', (event) => {
       });
     })
   );
-  
+
   // Активировать новый SW сразу
   self.skipWaiting();
 });
@@ -30,13 +60,13 @@ self.addEventListener('install', (event) => {
 // Активация Service Worker
 self.addEventListener('activate', (event) => {
   console.log('[SW] Активация Service Worker...');
-  
+
   event.waitUntil(
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
           // Удаляем старые версии кэша
-          if (cacheName !== CACHE_NAME) {
+          if (!RUNTIME_CACHES.includes(cacheName)) {
             console.log('[SW] Удаление старого кэша:', cacheName);
             return caches.delete(cacheName);
           }
@@ -44,39 +74,199 @@ self.addEventListener('activate', (event) => {
       );
     })
   );
-  
+
   // Взять контроль над всеми клиентами
   return self.clients.claim();
 });
 
-// Fetch Strategy: Network First, затем Cache (для динамического контента)
+// ==================== LRU ====================
+// Cache API отдаёт keys() в порядке добавления: при обращении запись
+// переставляется в конец, при переполнении удаляются первые
+
+async function putBounded(cacheName, key, response, limit) {
+  const cache = await caches.open(cacheName);
+  await cache.delete(key);
+  await cache.put(key, response);
+  const keys = await cache.keys();
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - limit)).map((old) => cache.delete(old)));
+}
+
+// ==================== ЛЕНТА ВЕРСИЙ ====================
+// SW останавливается после простоя - лента хранится в кэше, в памяти только копия
+
+const feed = { versions: new Map(), fetchedAt: 0, loaded: false, refreshing: null };
+
+function setFeed(data, fetchedAt) {
+  feed.versions = new Map(data.listings.map((listing) => [String(listing.id), listing.v]));
+  feed.fetchedAt = fetchedAt;
+}
+
+function refreshFeed() {
+  if (!feed.refreshing) {
+    // no-cache: браузер ревалидирует по ETag, неизменная лента - 304 без тела
+    feed.refreshing = fetch(FEED_URL, { cache: 'no-cache' })
+      .then(async (response) => {
+        if (!response.ok) {
+          return;
+        }
+        const body = await response.text();
+        const fetchedAt = Date.now();
+        setFeed(JSON.parse(body), fetchedAt);
+        const cache = await caches.open(FEED_CACHE);
+        await cache.put(FEED_URL, new Response(body, {
+          headers: { 'Content-Type': 'application/json', 'X-SW-Fetched': String(fetchedAt) },
+        }));
+      })
+      .catch((err) => console.warn('[SW] Лента объявлений не обновлена:', err))
+      .finally(() => { feed.refreshing = null; });
+  }
+  return feed.refreshing;
+}
+
+// Версии объявлений без ожидания сети: устаревшая лента обновляется в фоне
+async function listingVersions(event) {
+  if (!feed.loaded) {
+    feed.loaded = true;
+    const cached = await caches.match(FEED_URL, { cacheName: FEED_CACHE });
+    if (cached) {
+      setFeed(await cached.json(), Number(cached.headers.get('X-SW-Fetched')) || 0);
+    }
+  }
+  if (Date.now() - feed.fetchedAt > FEED_TTL) {
+    event.waitUntil(refreshFeed());
+  }
+  return feed.versions;
+}
+
+// ==================== КАРТОЧКИ И ФОТО ====================
+
+function fetchPage(request, key) {
+  return fetch(request).then((response) => {
+    // Кэшируются только карточки с версией (без flash-сообщений, см. listing_feed.mark_cacheable)
+    if (response.status === 200 && response.type === 'basic' && !response.redirected
+        && response.headers.has(VERSION_HEADER)) {
+      putBounded(PAGES_CACHE, key, response.clone(), MAX_PAGES);
+    } else if (response.status === 404) {
+      caches.open(PAGES_CACHE).then((cache) => cache.delete(key));
+    }
+    return response;
+  });
+}
+
+// Карточка объявления: версия в кэше совпадает с лентой -
+// stale-while-revalidate (кэш сразу, обновление в фоне: лента сама может
+// быть устаревшей), не совпадает - Network First, кэш только без сети
+async function listingPage(event, id, key) {
+  const [cached, versions] = await Promise.all([
+    caches.match(key, { cacheName: PAGES_CACHE }),
+    listingVersions(event),
+  ]);
+  if (!cached) {
+    return fetchPage(event.request, key).catch(() => caches.match('/'));
+  }
+
+  if (cached.headers.get(VERSION_HEADER) !== versions.get(id)) {
+    return fetchPage(event.request, key).catch(() => cached);
+  }
+  event.waitUntil(putBounded(PAGES_CACHE, key, cached.clone(), MAX_PAGES));
+  event.waitUntil(fetchPage(event.request, key).catch(() => {}));
+  return cached;
+}
+
+// Фото: имя загруженного файла уникально - Cache First, LRU по числу файлов
+async function mediaFile(event) {
+  const { request } = event;
+  const cached = await caches.match(request, { cacheName: MEDIA_CACHE });
+  if (cached) {
+    event.waitUntil(putBounded(MEDIA_CACHE, request, cached.clone(), MAX_MEDIA));
+    return cached;
+  }
+  const response = await fetch(request);
+  if (response.status === 200 && response.type === 'basic') {
+    event.waitUntil(putBounded(MEDIA_CACHE, request, response.clone(), MAX_MEDIA));
+  }
+  return response;
+}
+
+// Отправка формы меняет страницу: вход/выход - сбросить все карточки,
+// комментарий / ставка / избранное - карточку этого объявления
+function invalidatePages(url) {
+  if (AUTH_PATHS.includes(url.pathname)) {
+    return caches.delete(PAGES_CACHE);
+  }
+  const match = url.pathname.match(LISTING_ACTION);
+  if (match) {
+    return caches.open(PAGES_CACHE).then((cache) => cache.delete(`/animal/${match[1]}/`));
+  }
+  return Promise.resolve();
+}
+
+// Fetch Strategy:
+// - хешированная статика: Cache First (без сети и без ревалидации)
+// - карточки объявлений: версия совпала с лентой - Stale-While-Revalidate, иначе Network First
+// - фото объявлений (/media/): Cache First, LRU
+// - остальное: Network First, затем Cache
 self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
-        
-        return fetch(fetchRequest).then((response) => {
-          // Check if valid response
-          if (!response || response.status !== 200 || response.type !== 'basic') {
-            return response;
-          }
-          
-          // Clone the response
-          const responseToCache = response.clone();
-          
-          // Cache static assets only
-          if (event.request.url.includes('/static/')) {
-            caches.open(CACHE_NAME)
-              .then((cache) => {
-                cache.put(event.request, responseToCache);
-              });
+
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  if (request.method !== 'GET') {
+    event.waitUntil(invalidatePages(url));
+    return;
+  }
+
+  const detail = url.pathname.match(DETAIL_PAGE);
+  if (detail && !url.search && request.mode === 'navigate') {
+    event.respondWith(listingPage(event, detail[1], url.pathname));
+    return;
+  }
+
+  if (url.pathname.startsWith('/media/')) {
+    event.respondWith(mediaFile(event));
+    return;
+  }
+
+  if (url.pathname.startsWith('/static/') && HASHED_ASSET.test(url.pathname)) {
+    event.respondWith(
+      caches.match(request).then((cached) => {
+        if (cached) {
+          return cached;
+        }
+        return fetch(request).then((response) => {
+          if (response && response.status === 200 && response.type === 'basic') {
+            const responseToCache = response.clone();
+            caches.open(CACHE_NAME).then((cache) => cache.put(request, responseToCache));
           }
-          
           return response;
         });
       })
+    );
+    return;
+  }
+
+  event.respondWith(
+    fetch(request)
+      .then((response) => {
+        // Check if valid response
+        if (!response || response.status !== 200 || response.type !== 'basic') {
+          return response;
+        }
+
+        // Cache static assets only
+        if (url.pathname.startsWith('/static/')) {
+          const responseToCache = response.clone();
+          caches.open(CACHE_NAME).then((cache) => cache.put(request, responseToCache));
+        }
+
+        return response;
+      })
       .catch(() => {
-        // Return offline page if available
-        return caches.match('/');
+        // Return cached copy or offline page if available
+        return caches.match(request).then((cached) => cached || caches.match('/'));
       })
   );
 });